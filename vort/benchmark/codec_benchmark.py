@@ -0,0 +1,71 @@
+# compares codecs of .vrt sections on a text document and on an image heavy report
+#
+# run from the vort directory:
+# python -m benchmark.codec_benchmark --size 50
+
+import argparse
+import os
+import tempfile
+import time
+
+from benchmark.document_container_benchmark import makeDocumentFile
+from core.editor.document_writer import DocumentWriter
+from core.editor.document_container import DocumentContainerReader, SectionCodec, SectionKind
+from core.editor.document_file import DocumentFile
+
+
+# name, codec of text and settings, level, codec of images
+CODECS: list[tuple[str, SectionCodec, int | None, SectionCodec]] = [
+    ("raw", SectionCodec.Raw, None, SectionCodec.Raw),
+    ("zlib 1", SectionCodec.Zlib, 1, SectionCodec.Raw),
+    ("zlib 6", SectionCodec.Zlib, 6, SectionCodec.Raw),
+    ("zlib 9", SectionCodec.Zlib, 9, SectionCodec.Raw),
+    ("lzma 0", SectionCodec.Lzma, 0, SectionCodec.Raw),
+    ("lzma 6", SectionCodec.Lzma, 6, SectionCodec.Raw),
+    ("lzma 6, images too", SectionCodec.Lzma, 6, SectionCodec.Lzma),
+]
+
+
+def measure(name: str, file: DocumentFile, codec: SectionCodec, level: int | None, image_codec: SectionCodec) -> None:
+    writer: DocumentWriter = DocumentWriter()
+    writer.setCompression(SectionKind.Settings, codec, level)
+    writer.setCompression(SectionKind.Text, codec, level)
+    writer.setCompression(SectionKind.Image, image_codec, level)
+
+    with tempfile.TemporaryDirectory() as directory:
+        filepath: str = os.path.join(directory, "document.vrt")
+
+        start: float = time.perf_counter()
+        writer.writeDocumentFile(filepath, file)
+        save_time: float = time.perf_counter() - start
+
+        # every section is read, images are mapped when the document is opened, but they are read on paint
+        start = time.perf_counter()
+        with DocumentContainerReader(filepath) as reader:
+            for section in reader.sections():
+                reader.readSection(section)
+        load_time: float = time.perf_counter() - start
+
+        size: float = os.path.getsize(filepath) / 2**20
+
+    print(f"{name:<20} save {save_time:6.2f} s   load {load_time:6.2f} s   file {size:8.1f} MiB")
+
+
+def main() -> None:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=50, help="document size in MiB")
+    parser.add_argument("--image-size", type=int, default=1, help="size of one image in MiB")
+    args = parser.parse_args()
+
+    for title, image_share in [("text document", 0.0), ("image heavy report", 0.8)]:
+        file: DocumentFile = makeDocumentFile(args.size * 2**20, image_share, args.image_size * 2**20)
+        print(f"{title}: text {len(file.html_text) / 2**20:.1f} MiB, {len(file.png_image)} images")
+
+        for name, codec, level, image_codec in CODECS:
+            measure(name, file, codec, level, image_codec)
+
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# compares saving and loading of the .vrt container with the old pickle format
+#
+# run from the vort directory:
+# python -m benchmark.document_container_benchmark --size 100
+
+import argparse
+import lzma
+import os
+import pickle
+import random
+import tempfile
+import time
+from typing import Callable
+
+from core.editor.document_editor.component.file_component import FileComponent
+from core.editor.document_container import DocumentContainerReader, SectionKind
+from core.editor.document_file import DocumentFile
+
+
+def makeDocumentFile(size: int, image_share: float, image_size: int) -> DocumentFile:
+    # synthetic document, text of random words and incompressible image bytes like png has
+    file: DocumentFile = DocumentFile.default_file()
+
+    words: list[str] = "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod".split()
+    text_size: int = int(size * (1 - image_share))
+
+    rnd: random.Random = random.Random(1)
+    paragraphs: list[str] = []
+    paragraphs_size: int = 0
+    while paragraphs_size < text_size:
+        paragraph: str = f'<p style="margin: 0px;">{" ".join(rnd.choices(words, k=100))}</p>\n'
+        paragraphs.append(paragraph)
+        paragraphs_size += len(paragraph)
+
+    file.html_text = f"<html><body>\n{''.join(paragraphs)}</body></html>"
+
+    for i in range(int(size * image_share) // image_size):
+        file.png_image[f"image_{i}"] = rnd.randbytes(image_size)
+
+    return file
+
+
+def measure(name: str, save: Callable[[], None] | None, load: Callable[[], None], filepath: str) -> None:
+    save_text: str = "-"
+    if save is not None:
+        start: float = time.perf_counter()
+        save()
+        save_text = f"{time.perf_counter() - start:.2f} s"
+
+    start = time.perf_counter()
+    load()
+    load_text: str = f"{time.perf_counter() - start:.2f} s"
+
+    print(f"{name:<24} save {save_text:>10}   load {load_text:>10}   file {os.path.getsize(filepath) / 2**20:8.1f} MiB")
+
+
+def main() -> None:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=100, help="document size in MiB")
+    parser.add_argument("--image-share", type=float, default=0.7, help="share of images in the document")
+    parser.add_argument("--image-size", type=int, default=1, help="size of one image in MiB")
+    args = parser.parse_args()
+
+    file: DocumentFile = makeDocumentFile(args.size * 2**20, args.image_share, args.image_size * 2**20)
+    print(f"text {len(file.html_text) / 2**20:.1f} MiB, {len(file.png_image)} images of {args.image_size} MiB")
+
+    file_component: FileComponent = FileComponent()
+
+    with tempfile.TemporaryDirectory() as directory:
+        pickle_path: str = os.path.join(directory, "pickle.vrt")
+        container_path: str = os.path.join(directory, "container.vrt")
+
+        def savePickle() -> None:
+            with lzma.open(pickle_path, "wb") as f:
+                pickle.dump(file, f)
+
+        def loadPickle() -> None:
+            with lzma.open(pickle_path, "rb") as f:
+                pickle.load(f)
+
+        def loadContainerText() -> None:
+            # what is needed for the first screen
+            with DocumentContainerReader(container_path) as reader:
+                for kind in [SectionKind.Settings, SectionKind.Text]:
+                    for section in reader.sections(kind):
+                        reader.readSection(section)
+
+        measure("pickle + lzma", savePickle, loadPickle, pickle_path)
+        measure(
+            "container",
+            lambda: file_component.writeDocumentFile(container_path, file),
+            lambda: file_component.readDocumentFile(container_path),
+            container_path,
+        )
+        measure("container, text only", None, loadContainerText, container_path)
+
+
+if __name__ == "__main__":
+    main()
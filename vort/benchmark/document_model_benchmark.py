@@ -0,0 +1,133 @@
+# compares saving and opening the text as html and as the document model
+#
+# run from the vort directory:
+# python -m benchmark.document_model_benchmark --size 20
+
+import argparse
+import random
+import time
+
+from PySide6.QtGui import QGuiApplication, QTextCursor
+
+from core.editor.page_layout.page_layout import PageLayout
+from core.editor.text_editor.text_document import TextDocument
+from core.editor.text_editor.text_document_layout import TextDocumentLayout
+from core.editor.document_editor.component.file_component import FileComponent
+from core.editor.document_editor.document_editor_context import DocumentEditorContext
+from core.editor.document_file import DocumentFile
+from core.editor.document_model import DocumentModel
+
+
+def makeHtmlText(size: int) -> str:
+    # synthetic text with bold, colored and linked words in every paragraph
+    words: list[str] = "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod".split()
+    styles: list[str] = ["font-weight:700;", "font-style:italic;", "color:#c00000;", "font-size:20pt;"]
+
+    rnd: random.Random = random.Random(1)
+    paragraphs: list[str] = []
+    paragraphs_size: int = 0
+    while paragraphs_size < size:
+        runs: list[str] = []
+        for _ in range(10):
+            text: str = " ".join(rnd.choices(words, k=10))
+
+            match rnd.randrange(3):
+                case 0:
+                    runs.append(text)
+                case 1:
+                    runs.append(f'<span style="{rnd.choice(styles)}">{text}</span>')
+                case 2:
+                    runs.append(f'<a href="https://example.com/{rnd.randrange(100)}">{text}</a>')
+
+        paragraph: str = f'<p style="margin: 0px;">{" ".join(runs)}</p>\n'
+        paragraphs.append(paragraph)
+        paragraphs_size += len(paragraph)
+
+    return f"<html><body>\n{''.join(paragraphs)}</body></html>"
+
+
+def main() -> None:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=20, help="size of the html text in MiB")
+    args = parser.parse_args()
+
+    app: QGuiApplication = QGuiApplication([])
+
+    # page of the default document, text is laid out on it like in the editor
+    file_component: FileComponent = FileComponent()
+    contexts: list[DocumentEditorContext] = []
+    file_component.contextChanged.connect(contexts.append)
+    file_component.setDocumentFile(DocumentFile.default_file())
+
+    page_layout: PageLayout = contexts[-1].page_layout
+
+    def makeDocument(is_laid_out: bool) -> TextDocument:
+        document: TextDocument = TextDocument()
+        if is_laid_out:
+            document.setDocumentLayout(TextDocumentLayout(document, page_layout))
+        return document
+
+    html_text: str = makeHtmlText(args.size * 2**20)
+
+    # save
+
+    document: TextDocument = makeDocument(False)
+    QTextCursor(document).insertHtml(html_text)
+
+    start: float = time.perf_counter()
+    html_data: bytes = document.toHtml().encode("utf-8")
+    html_save_time: float = time.perf_counter() - start
+
+    start = time.perf_counter()
+    model: DocumentModel = DocumentModel.fromDocument(document)
+    model_data: bytes = model.toBytes()
+    model_save_time: float = time.perf_counter() - start
+
+    print(
+        f"text {len(html_text) / 2**20:.1f} MiB of html, {document.blockCount()} paragraphs, {len(model.runs) // 2} runs"
+    )
+
+    # open, the text is parsed alone and then with the layout of the editor
+
+    def loadHtml(document: TextDocument) -> None:
+        QTextCursor(document).insertHtml(html_data.decode("utf-8"))
+
+    def loadModel(document: TextDocument) -> None:
+        DocumentModel.fromBytes(model_data).insert(QTextCursor(document))
+
+    html_documents: list[TextDocument] = []
+    model_documents: list[TextDocument] = []
+    load_times: dict[str, list[float]] = {"html": [], "document model": []}
+
+    for is_laid_out in [False, True]:
+        for name, load, documents in [
+            ("html", loadHtml, html_documents),
+            ("document model", loadModel, model_documents),
+        ]:
+            document = makeDocument(is_laid_out)
+
+            start = time.perf_counter()
+            load(document)
+            load_times[name].append(time.perf_counter() - start)
+
+            documents.append(document)
+
+    for name, save_time, data in [("html", html_save_time, html_data), ("document model", model_save_time, model_data)]:
+        load_time, layout_load_time = load_times[name]
+        print(
+            f"{name:<16} save {save_time:6.2f} s   open {load_time:6.2f} s   "
+            f"open with layout {layout_load_time:6.2f} s   text {len(data) / 2**20:6.1f} MiB"
+        )
+
+    is_same: bool = all(
+        html_document.toHtml() == model_document.toHtml()
+        for html_document, model_document in zip(html_documents, model_documents)
+    )
+    print(f"same document: {is_same}")
+
+    file_component.closeDocumentFile()
+    app.quit()
+
+
+if __name__ == "__main__":
+    main()
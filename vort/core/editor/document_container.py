@@ -0,0 +1,269 @@
+import lzma
+import mmap
+import os
+import struct
+import zlib
+from enum import IntEnum
+from typing import BinaryIO, Self
+
+
+# .vrt container
+#
+# header | section | section | ... | table of contents
+#
+# sections are written one after another and compressed on their own,
+# the table of contents is written at the end and the header points to it,
+# so a section can be read without reading the others
+
+
+class SectionKind(IntEnum):
+    Settings = 1
+    Text = 2
+    Image = 3
+
+
+class SectionCodec(IntEnum):
+    Raw = 0
+    Lzma = 1
+    Zlib = 2
+
+
+class DocumentContainerError(Exception):
+    pass
+
+
+class Section:
+    def __init__(self) -> None:
+        self.kind: SectionKind = SectionKind.Settings
+        self.codec: SectionCodec = SectionCodec.Raw
+        self.name: str = ""
+        self.offset: int = 0
+        self.size: int = 0  # stored bytes
+        self.raw_size: int = 0  # bytes after decompression
+        self.checksum: int = 0  # crc32 of stored bytes
+
+
+class DocumentContainer:
+    MAGIC: bytes = b"VRT\x00"
+    VERSION: int = 1
+
+    # magic, version, flags, table offset, table size, table checksum
+    HEADER: struct.Struct = struct.Struct("<4sHHQQI")
+    # kind, codec, name size, offset, size, raw size, checksum
+    ENTRY: struct.Struct = struct.Struct("<BBHQQQI")
+
+    @classmethod
+    def isContainer(cls, filepath: str) -> bool:
+        try:
+            with open(filepath, "rb") as f:
+                return f.read(len(cls.MAGIC)) == cls.MAGIC
+        except OSError:
+            return False
+
+    @classmethod
+    def compress(cls, data: bytes, codec: SectionCodec, level: int | None = None) -> bytes:
+        # level is a zlib level or lzma preset, it isn't needed to decompress, so it isn't stored
+        match codec:
+            case SectionCodec.Raw:
+                return data
+            case SectionCodec.Lzma:
+                return lzma.compress(data, preset=level)
+            case SectionCodec.Zlib:
+                return zlib.compress(data, -1 if level is None else level)
+
+    @classmethod
+    def decompress(cls, data: bytes, codec: SectionCodec) -> bytes:
+        match codec:
+            case SectionCodec.Raw:
+                return data
+            case SectionCodec.Lzma:
+                return lzma.decompress(data)
+            case SectionCodec.Zlib:
+                return zlib.decompress(data)
+
+
+class DocumentContainerWriter:
+    # streams sections to the file, the table of contents is written on close
+
+    def __init__(self, filepath: str) -> None:
+        self.__file: BinaryIO = open(filepath, "wb")
+        self.__sections: list[Section] = []
+
+        # header is written again on close, when the table is known
+        self.__file.write(DocumentContainer.HEADER.pack(DocumentContainer.MAGIC, DocumentContainer.VERSION, 0, 0, 0, 0))
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def addSection(
+        self, kind: SectionKind, name: str, data: bytes, codec: SectionCodec, level: int | None = None
+    ) -> Section:
+        stored_data: bytes = DocumentContainer.compress(data, codec, level)
+
+        section: Section = Section()
+        section.kind = kind
+        section.codec = codec
+        section.name = name
+        section.offset = self.__file.tell()
+        section.size = len(stored_data)
+        section.raw_size = len(data)
+        section.checksum = zlib.crc32(stored_data)
+
+        self.__file.write(stored_data)
+        self.__sections.append(section)
+
+        return section
+
+    def close(self) -> None:
+        if self.__file.closed:
+            return
+
+        table: bytearray = bytearray()
+        for section in self.__sections:
+            name: bytes = section.name.encode("utf-8")
+            table += DocumentContainer.ENTRY.pack(
+                section.kind,
+                section.codec,
+                len(name),
+                section.offset,
+                section.size,
+                section.raw_size,
+                section.checksum,
+            )
+            table += name
+
+        table_offset: int = self.__file.tell()
+        self.__file.write(table)
+
+        self.__file.seek(0)
+        self.__file.write(
+            DocumentContainer.HEADER.pack(
+                DocumentContainer.MAGIC,
+                DocumentContainer.VERSION,
+                0,
+                table_offset,
+                len(table),
+                zlib.crc32(table),
+            )
+        )
+
+        # file is on the disk before it replaces anything
+        self.__file.flush()
+        os.fsync(self.__file.fileno())
+        self.__file.close()
+
+
+class DocumentContainerReader:
+    # reads the table of contents on open and sections on demand
+
+    def __init__(self, filepath: str) -> None:
+        self.__file: BinaryIO = open(filepath, "rb")
+        self.__sections: list[Section] = []
+        self.__map: mmap.mmap | None = None
+
+        try:
+            self.readTable()
+        except Exception:
+            self.__file.close()
+            raise
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def readTable(self) -> None:
+        header: bytes = self.__file.read(DocumentContainer.HEADER.size)
+        if len(header) != DocumentContainer.HEADER.size:
+            raise DocumentContainerError("File is too short")
+
+        magic, version, _, table_offset, table_size, table_checksum = DocumentContainer.HEADER.unpack(header)
+
+        if magic != DocumentContainer.MAGIC:
+            raise DocumentContainerError("File is not a vort container")
+
+        if version > DocumentContainer.VERSION:
+            raise DocumentContainerError(f"Container version {version} isn't supported")
+
+        self.__file.seek(table_offset)
+        table: bytes = self.__file.read(table_size)
+
+        if len(table) != table_size or zlib.crc32(table) != table_checksum:
+            raise DocumentContainerError("Table of contents is damaged")
+
+        position: int = 0
+        while position < len(table):
+            kind, codec, name_size, offset, size, raw_size, checksum = DocumentContainer.ENTRY.unpack_from(
+                table, position
+            )
+            position += DocumentContainer.ENTRY.size
+
+            section: Section = Section()
+
+            # file may be written by a newer version
+            try:
+                section.kind = SectionKind(kind)
+                section.codec = SectionCodec(codec)
+            except ValueError as error:
+                raise DocumentContainerError(f"Section kind {kind} or codec {codec} isn't supported") from error
+
+            section.name = table[position : position + name_size].decode("utf-8")
+            section.offset = offset
+            section.size = size
+            section.raw_size = raw_size
+            section.checksum = checksum
+            position += name_size
+
+            self.__sections.append(section)
+
+    def sections(self, kind: SectionKind | None = None) -> list[Section]:
+        return [section for section in self.__sections if kind is None or section.kind == kind]
+
+    def section(self, kind: SectionKind, name: str) -> Section | None:
+        for section in self.__sections:
+            if section.kind == kind and section.name == name:
+                return section
+
+        return None
+
+    def readSection(self, section: Section) -> bytes:
+        # raises DocumentContainerError if the section is damaged, other sections stay readable
+        self.__file.seek(section.offset)
+        stored_data: bytes = self.__file.read(section.size)
+
+        if len(stored_data) != section.size or zlib.crc32(stored_data) != section.checksum:
+            raise DocumentContainerError(f"Section {section.name} is damaged")
+
+        try:
+            data: bytes = DocumentContainer.decompress(stored_data, section.codec)
+        except (lzma.LZMAError, zlib.error) as error:
+            raise DocumentContainerError(f"Section {section.name} is damaged") from error
+
+        if len(data) != section.raw_size:
+            raise DocumentContainerError(f"Section {section.name} is damaged")
+
+        return data
+
+    def mapSection(self, section: Section) -> memoryview:
+        # raw section is mapped from the file, so nothing is read until the data is used.
+        # checksum isn't verified to avoid reading, damaged data fails to decode later.
+        # views stay valid after close, so the file must not be rewritten in place while they are alive
+        if section.codec != SectionCodec.Raw:
+            return memoryview(self.readSection(section))
+
+        if self.__map is None:
+            self.__map = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if section.offset + section.size > len(self.__map):
+            raise DocumentContainerError(f"Section {section.name} is damaged")
+
+        return memoryview(self.__map)[section.offset : section.offset + section.size]
+
+    def close(self) -> None:
+        # map is closed when the last view is released
+        self.__map = None
+        self.__file.close()
@@ -1,7 +1,10 @@
 import lzma
+import os
 import pickle
+import time
+from typing import Iterator
 
-from PySide6.QtCore import Qt, QObject, Signal, QByteArray, QBuffer, QIODevice
+from PySide6.QtCore import Qt, QObject, Signal, Slot, QThread, QTimer, QCoreApplication, QEventLoop
 from PySide6.QtGui import (
     QGuiApplication,
     QImage,
@@ -14,6 +17,8 @@ from PySide6.QtGui import (
 )
 
 from core.editor.page_layout.page_layout import PageLayout
+from core.editor.text_editor.image_store import ImageStore
+from core.editor.text_editor.text_document import TextDocument
 from core.editor.text_editor.text_document_layout import TextDocumentLayout
 from core.editor.text_editor.text_document_context import TextDocumentContext
 from core.editor.text_editor.text_editor import TextEditor
@@ -27,33 +32,399 @@ from core.editor.footer_editor.footer_editor import FooterEditor
 from core.editor.document_editor.document_editor_context import DocumentEditorContext
 from core.editor.document_editor.document_canvas import DocumentCanvas
 from core.editor.document_file import DocumentFile
+from core.editor.document_model import DocumentModel, DocumentModelError
+from core.editor.document_reader import DocumentReader
+from core.editor.document_writer import DocumentWriter
+from core.editor.document_journal import DocumentJournal
+from core.editor.document_container import DocumentContainer, DocumentContainerError, SectionCodec, SectionKind
 
 
 class FileComponent(QObject):
     contextChanged: Signal = Signal(DocumentEditorContext)
     contextCleared: Signal = Signal()
 
+    documentSaveProgressChanged: Signal = Signal(int, int)  # written sections, all sections
+    documentSaved: Signal = Signal(str)
+    documentSaveFailed: Signal = Signal(str, str)
+    documentRecovered: Signal = Signal(str)
+    recoveryFailed: Signal = Signal(str, str)  # recovery filepath, error
+    documentLoadProgressChanged: Signal = Signal(int, int)  # loaded blocks, all blocks
+    documentLoaded: Signal = Signal()
+    documentLoadFailed: Signal = Signal(str, str)  # filepath, error
+    documentDamaged: Signal = Signal(str, list)  # filepath, errors of sections which were skipped
+    imageDamaged: Signal = Signal(str)  # name
+
+    writeRequested: Signal = Signal(str, object, object)  # filepath, file, compression
+
     def __init__(self) -> None:
         super().__init__()
         self.__context: DocumentEditorContext | None = None
 
+        # document is written on this thread, it is started on the first save
+        self.__writer: DocumentWriter = DocumentWriter()
+        self.__writer_thread: QThread | None = None
+
+        # codec and level of sections are sent with every save, the writer lives on another thread
+        self.__compression: dict[SectionKind, tuple[SectionCodec, int | None]] = {
+            kind: self.__writer.compression(kind) for kind in SectionKind
+        }
+
+        # changes since the last save are journaled, the journal is checkpointed into the recovery file
+        # next to the document from time to time, the document file is written only when it is saved.
+        # settings aren't journaled, so they are compared with the ones of the last checkpoint
+        self.__journal: DocumentJournal | None = None
+        self.__checkpoint_sequence: int = 0
+        self.__checkpoint_settings: dict = {}
+        self.__is_document_recovered: bool = False
+
+        # snapshot of a long document takes a while on this thread, so the journal is checkpointed
+        # only when the user pauses and the journal is long enough to make its replay slow.
+        # settings aren't journaled, so their change is checkpointed when the user pauses too
+        self.__checkpoint_journal_size: int = 4 * 1024 * 1024  # bytes
+        self.__checkpoint_idle_time: float = 2.0  # s
+
+        self.__checkpoint_timer: QTimer = QTimer(self)
+        self.__checkpoint_timer.setInterval(1000)
+        self.__checkpoint_timer.timeout.connect(self.onCheckpointTimeout)
+        self.__checkpoint_timer.start()
+
+        # filepath, document filepath, journal sequence, images and settings of pending saves,
+        # filepaths differ for the recovery file
+        self.__pending_saves: list[tuple[str, str, int, list[str], dict]] = []
+
+        # images of the document are mapped from this file until it is saved
+        self.__mapped_filepath: str = ""
+
+        # document is shown when its first pages are laid out, the rest is loaded in slices between events
+        self.__is_progressive_load_turned: bool = True
+        self.__load_blocks: Iterator[int] | None = None
+        self.__load_document: TextDocument | None = None
+        self.__load_block_count: int = 0
+        self.__loaded_block_count: int = 0
+        self.__load_slice_block_count: int = 100  # it is adjusted to the time of a slice
+        self.__load_slice_time: float = 0.02  # s
+        self.__load_filepath: str = ""  # journal of the file is replayed when the file is loaded
+        self.__load_sequence: int = 0
+
+        self.__load_timer: QTimer = QTimer(self)
+        self.__load_timer.setInterval(0)
+        self.__load_timer.timeout.connect(self.loadNextSlice)
+
+        self.writeRequested.connect(self.__writer.write)
+        self.__writer.progressChanged.connect(self.onWriterProgressChanged)
+        self.__writer.written.connect(self.onWriterWritten)
+        self.__writer.failed.connect(self.onWriterFailed)
+
     def saveDocumentFile(self, filepath) -> None:
+        self.writeDocumentSnapshot(filepath, filepath)
+
+    def writeDocumentSnapshot(self, filepath: str, document_filepath: str) -> None:
+        # only the snapshot is taken here, the file is written in background
+        if self.__writer_thread is None:
+            self.__writer_thread = QThread()
+            self.__writer.moveToThread(self.__writer_thread)
+            self.__writer_thread.start()
+
+            QCoreApplication.instance().aboutToQuit.connect(self.stopWriter)
+
+        # file which images are mapped from can't be replaced or removed while they are mapped on Windows,
+        # so they are copied before it is saved, snapshots of the previous saves may map them too.
+        # recovery file is removed when the document is saved
+        if self.__context is not None and self.__mapped_filepath in [
+            os.path.abspath(filepath),
+            os.path.abspath(self.recoveryFilepath(document_filepath)),
+        ]:
+            self.waitForSave()
+            self.__context.text_editor.context().document.imageStore().copyMappedImages()
+            self.__mapped_filepath = ""
+
+        file: DocumentFile = self.documentSnapshot()
+        settings: dict = file.settings()
+
+        # journal is next to the file the document is saved to
+        if self.__context is not None:
+            if self.__journal is None or self.__journal.filepath() != self.journalFilepath(document_filepath):
+                self.openJournal(document_filepath, 0 if self.__journal is None else self.__journal.sequence())
+
+            file.journal_sequence = self.__journal.sequence()
+
+        self.__pending_saves.append(
+            (filepath, document_filepath, file.journal_sequence, list(file.png_image), settings)
+        )
+        self.writeRequested.emit(filepath, file, dict(self.__compression))
+
+    def isSaving(self) -> bool:
+        return len(self.__pending_saves) > 0
+
+    def waitForSave(self) -> None:
+        # results of the writer come through the event loop
+        while self.isSaving():
+            QCoreApplication.processEvents(QEventLoop.ProcessEventsFlag.ExcludeUserInputEvents)
+            QThread.msleep(10)
+
+    @Slot()
+    def stopWriter(self) -> None:
+        self.waitForSave()
+
+        if self.__writer_thread is not None:
+            self.__writer_thread.quit()
+            self.__writer_thread.wait()
+
+    @Slot(str, int, int)
+    def onWriterProgressChanged(self, filepath: str, written_count: int, section_count: int) -> None:
+        self.documentSaveProgressChanged.emit(written_count, section_count)
+
+    @Slot(str)
+    def onWriterWritten(self, filepath: str) -> None:
+        # files are written in the order they were saved
+        _, document_filepath, sequence, image_names, settings = self.__pending_saves.pop(0)
+
+        # recovery file is removed before the journal is checkpointed,
+        # so the journal still has its changes if the app crashes in between
+        if filepath == document_filepath:
+            self.removeRecoveryFile(document_filepath)
+
+        if self.__journal is not None and self.__journal.filepath() == self.journalFilepath(document_filepath):
+            self.__journal.checkpoint(sequence, image_names)
+            self.__checkpoint_sequence = sequence
+            self.__checkpoint_settings = settings
+
+        # recovery file isn't saved by the user
+        if filepath == document_filepath:
+            self.documentSaved.emit(filepath)
+
+    @Slot(str, str)
+    def onWriterFailed(self, filepath: str, error: str) -> None:
+        _, document_filepath, *_ = self.__pending_saves.pop(0)
+
+        # recovery file is written again on the next checkpoint
+        if filepath == document_filepath:
+            self.documentSaveFailed.emit(filepath, error)
+        else:
+            self.recoveryFailed.emit(filepath, error)
+
+    # journal
+
+    def journalFilepath(self, filepath: str) -> str:
+        return f"{filepath}.journal"
+
+    def recoveryFilepath(self, filepath: str) -> str:
+        return f"{filepath}.recovery"
+
+    def removeRecoveryFile(self, filepath: str) -> None:
+        # removing fails on Windows while images are still mapped from the file, it is only reported then
         try:
-            with lzma.open(filepath, "wb") as f:
-                pickle.dump(self.documentFile(), f)
+            if os.path.exists(self.recoveryFilepath(filepath)):
+                os.remove(self.recoveryFilepath(filepath))
+        except OSError as error:
+            self.recoveryFailed.emit(self.recoveryFilepath(filepath), str(error))
+
+    def openJournal(self, filepath: str, sequence: int) -> None:
+        # journal of the other file isn't needed, changes are saved or discarded
+        self.closeJournal(True)
+
+        if self.__context is not None:
+            self.__journal = DocumentJournal(
+                self.journalFilepath(filepath), self.__context.text_editor.context().document, sequence
+            )
+
+    def closeJournal(self, is_removed: bool) -> None:
+        # recovery file is discarded with the journal
+        if self.__journal is not None:
+            self.__journal.close(is_removed)
+
+            if is_removed:
+                self.removeRecoveryFile(self.__journal.filepath().removesuffix(".journal"))
+
+            self.__journal = None
+
+    def checkpointJournalSize(self) -> int:
+        return self.__checkpoint_journal_size
+
+    def setCheckpointJournalSize(self, size: int) -> None:
+        self.__checkpoint_journal_size = size
+
+    def checkpointIdleTime(self) -> float:
+        return self.__checkpoint_idle_time
+
+    def setCheckpointIdleTime(self, idle_time: float) -> None:
+        self.__checkpoint_idle_time = idle_time
+
+    @Slot()
+    def onCheckpointTimeout(self) -> None:
+        if self.__journal is None or self.isSaving():
+            return
 
-        except FileNotFoundError:
-            print("File not found")
+        # user is typing
+        if time.monotonic() - self.__journal.appendTime() < self.__checkpoint_idle_time:
+            return
+
+        if (
+            self.__journal.size() < self.__checkpoint_journal_size
+            and self.documentSettingsSnapshot().settings() == self.__checkpoint_settings
+        ):
+            return
+
+        self.checkpointJournal()
+
+    @Slot()
+    def checkpointJournal(self) -> None:
+        # document is saved to its recovery file, so only changes after it are left in the journal
+        if self.__journal is None or self.isSaving():
+            return
+
+        if (
+            self.__journal.sequence() == self.__checkpoint_sequence
+            and self.documentSettingsSnapshot().settings() == self.__checkpoint_settings
+        ):
+            return
+
+        document_filepath: str = self.__journal.filepath().removesuffix(".journal")
+        self.writeDocumentSnapshot(self.recoveryFilepath(document_filepath), document_filepath)
+
+    def recoverDocumentFile(self, filepath: str, sequence: int) -> None:
+        # changes which weren't checkpointed before the app was closed are applied again
+        if self.__context is None:
+            return
+
+        document: TextDocument = self.__context.text_editor.context().document
+
+        recovered_sequence: int = DocumentJournal.replay(self.journalFilepath(filepath), document, sequence)
+        document.clearUndoRedoStacks()
+
+        self.__journal = DocumentJournal(self.journalFilepath(filepath), document, recovered_sequence)
+        self.__checkpoint_sequence = sequence
+        self.__checkpoint_settings = self.documentSettingsSnapshot().settings()
+
+        # document may be loaded from the recovery file
+        if recovered_sequence > sequence or self.__is_document_recovered:
+            self.__is_document_recovered = True
+            self.documentRecovered.emit(filepath)
+
+    def isDocumentRecovered(self) -> bool:
+        return self.__is_document_recovered
 
     def loadDocumentFile(self, filepath) -> None:
+        # file may be the one being written
+        self.waitForSave()
+
+        # damaged settings and images are reported after the document is opened,
+        # the user is warned that the next save doesn't have them
+        errors: list[str] = []
+
         try:
-            with lzma.open(filepath, "rb") as f:
-                self.setDocumentFile(pickle.load(f))
+            # document which wasn't saved or discarded has its recovery file, it is newer than the document file
+            recovery_file: DocumentFile | None = self.readRecoveryFile(filepath, errors)
+
+            if recovery_file is not None:
+                file: DocumentFile = recovery_file
+                self.__mapped_filepath = os.path.abspath(self.recoveryFilepath(filepath))
+
+            elif DocumentContainer.isContainer(filepath):
+                file: DocumentFile = self.readDocumentFile(filepath, errors)
+                self.__mapped_filepath = os.path.abspath(filepath)
+
+            # file saved before the container
+            else:
+                with lzma.open(filepath, "rb") as f:
+                    file: DocumentFile = pickle.load(f)
+
+            self.setDocumentFile(file)
+            self.__is_document_recovered = recovery_file is not None
+
+            # file saved before the journal has no sequence
+            if self.isLoading():
+                self.__load_filepath = filepath
+                self.__load_sequence = getattr(file, "journal_sequence", 0)
+            else:
+                self.recoverDocumentFile(filepath, getattr(file, "journal_sequence", 0))
+
+        except (OSError, DocumentContainerError, DocumentModelError, lzma.LZMAError, pickle.UnpicklingError) as error:
+            self.documentLoadFailed.emit(filepath, str(error))
+            return
 
-        except FileNotFoundError:
-            print("File not found")
+        if len(errors) > 0:
+            self.documentDamaged.emit(filepath, errors)
+
+    def readRecoveryFile(self, filepath: str, errors: list[str]) -> DocumentFile | None:
+        # document file is read if the recovery file is damaged
+        if not DocumentContainer.isContainer(self.recoveryFilepath(filepath)):
+            return None
+
+        recovery_errors: list[str] = []
+
+        try:
+            file: DocumentFile = self.readDocumentFile(self.recoveryFilepath(filepath), recovery_errors)
+        except (DocumentContainerError, DocumentModelError) as error:
+            errors.append(f"{os.path.basename(self.recoveryFilepath(filepath))}: {error}")
+            return None
+
+        errors.extend(recovery_errors)
+        return file
+
+    def writeDocumentFile(self, filepath, file: DocumentFile) -> None:
+        self.__writer.writeDocumentFile(filepath, file, self.__compression)
+
+    def compression(self, kind: SectionKind) -> tuple[SectionCodec, int | None]:
+        return self.__compression[kind]
+
+    def setCompression(self, kind: SectionKind, codec: SectionCodec, level: int | None = None) -> None:
+        # it is used by the next save
+        self.__compression[kind] = (codec, level)
+
+    def readDocumentFile(self, filepath, errors: list[str] | None = None) -> DocumentFile:
+        # damaged settings and images are skipped and their errors are added to the list,
+        # the rest of the document is kept
+        return DocumentReader.readDocumentFile(filepath, errors)
 
     def documentFile(self) -> DocumentFile:
+        file: DocumentFile = self.documentSnapshot()
+
+        for name, image in file.png_image.items():
+            if isinstance(image, QImage):
+                file.png_image[name] = DocumentWriter.encodeImage(image)
+
+        return file
+
+    def documentSnapshot(self) -> DocumentFile:
+        # images which aren't encoded yet are kept as QImage, they are shared, so nothing is copied
+        self.waitForLoad()
+
+        file: DocumentFile = self.documentSettingsSnapshot()
+
+        if self.__context is None:
+            return file
+
+        text_context: TextDocumentContext = self.__context.text_editor.context()
+
+        file.text_model = DocumentModel.fromDocument(text_context.document)
+        file.png_image = {}
+
+        image_store: ImageStore = text_context.document.imageStore()
+
+        for image_format in text_context.layout.imageLayout():
+            name: str = image_format.name
+
+            # image from the file is kept encoded
+            encoded_image: bytes | memoryview | None = image_store.encodedImage(name)
+            if encoded_image is not None:
+                file.png_image[name] = encoded_image
+                continue
+
+            image: QImage | None = text_context.document.resource(
+                QTextDocument.ResourceType.ImageResource, image_format.name
+            )
+
+            # image was damaged in the file
+            if image is None:
+                continue
+
+            file.png_image[name] = QImage(image)
+
+        return file
+
+    def documentSettingsSnapshot(self) -> DocumentFile:
+        # everything except text and images
         file = DocumentFile()
 
         if self.__context is None:
@@ -69,22 +440,6 @@ class FileComponent(QObject):
         header_context: HeaderDocumentContext = self.__context.header_editor.context()
         footer_context: FooterDocumentContext = self.__context.footer_editor.context()
 
-        file.html_text = text_context.document.toHtml()
-        file.png_image = {}
-
-        for image_format in text_context.layout.imageLayout():
-            name: str = image_format.name
-
-            image: QImage = text_context.document.resource(QTextDocument.ResourceType.ImageResource, image_format.name)
-
-            bytes_array: QByteArray = QByteArray()
-            buffer: QBuffer = QBuffer(bytes_array)
-            buffer.open(QIODevice.OpenModeFlag.WriteOnly)
-            image.save(buffer, "png")
-            image_bytes: bytes = bytes_array.data()
-
-            file.png_image[name] = image_bytes
-
         file.page_width = page_layout.pageWidth() * px_to_cm
         file.page_height = page_layout.pageHeight() * px_to_cm
         file.page_spacing = page_layout.pageSpacing() * px_to_cm
@@ -139,6 +494,11 @@ class FileComponent(QObject):
         return file
 
     def setDocumentFile(self, file: DocumentFile) -> None:
+        self.stopLoad()
+        self.closeJournal(True)
+        self.__checkpoint_sequence = 0
+        self.__is_document_recovered = False
+
         dpi = QGuiApplication.screens()[0].logicalDotsPerInch()
 
         cm_to_px = dpi / 2.54
@@ -167,7 +527,8 @@ class FileComponent(QObject):
 
         # text
 
-        text_document: QTextDocument = QTextDocument()
+        text_document: TextDocument = TextDocument()
+        text_document.imageStore().imageDamaged.connect(self.imageDamaged)
 
         text_layout: TextDocumentLayout = TextDocumentLayout(text_document, page_layout)
         text_document.setDocumentLayout(text_layout)
@@ -178,18 +539,24 @@ class FileComponent(QObject):
 
         text_editor: TextEditor = TextEditor(text_context)
 
-        text_cursor.insertHtml(file.html_text)
-        text_cursor.setPosition(0)
-
+        # images are added before the text, so the document doesn't look for them elsewhere
+        checksums: dict[str, int] = getattr(file, "png_image_checksum", {})
         for name, image_bytes in file.png_image.items():
-            bytes_array: QByteArray = QByteArray(image_bytes)
-            image: QImage = QImage()
-            image.loadFromData(bytes_array, "PNG")
+            text_document.imageStore().addImage(name, image_bytes, checksum=checksums.get(name))
+
+        # file saved before the document model has html text
+        text_model: DocumentModel | None = getattr(file, "text_model", None)
+        if text_model is None:
+            text_cursor.insertHtml(file.html_text)
+        elif self.__is_progressive_load_turned:
+            self.startLoad(text_document, text_model, page_layout)
+        else:
+            text_model.insert(text_cursor)
 
-            text_document.addResource(QTextDocument.ResourceType.ImageResource, name, image)
+        text_cursor.setPosition(0)
 
         # set default format if it is empty document
-        if text_document.characterCount() == 1:
+        if text_document.characterCount() == 1 and not self.isLoading():
             char_format: QTextCharFormat = QTextCharFormat()
             char_format.setFontFamilies(["Segoe UI"])
             char_format.setFontPointSize(16)
@@ -280,7 +647,7 @@ class FileComponent(QObject):
 
         # canvas
 
-        canvas: DocumentCanvas = DocumentCanvas(text_context, header_context, footer_context)
+        canvas: DocumentCanvas = DocumentCanvas(page_layout, text_context, header_context, footer_context)
 
         # editor
 
@@ -289,4 +656,94 @@ class FileComponent(QObject):
         self.contextChanged.emit(self.__context)
 
     def closeDocumentFile(self) -> None:
+        self.stopLoad()
+        self.closeJournal(True)
+        self.__mapped_filepath = ""
         self.contextCleared.emit()
+
+    # progressive load
+
+    def isProgressiveLoadTurned(self) -> bool:
+        return self.__is_progressive_load_turned
+
+    def setProgressiveLoadTurned(self, is_turned: bool) -> None:
+        # it is used by the next loaded file
+        self.__is_progressive_load_turned = is_turned
+
+    def isLoading(self) -> bool:
+        return self.__load_blocks is not None
+
+    def startLoad(self, document: TextDocument, model: DocumentModel, page_layout: PageLayout) -> None:
+        # loaded blocks aren't undone, the editor doesn't edit the document until it is loaded
+        document.setUndoRedoEnabled(False)
+
+        self.__load_document = document
+        self.__load_blocks = model.insertBlocks(QTextCursor(document))
+        self.__load_block_count = model.blockCount()
+        self.__loaded_block_count = 0
+        self.__load_filepath = ""
+        self.__load_sequence = 0
+
+        # pages of the first screen
+        while self.isLoading() and page_layout.pageCount() < 3:
+            self.loadSlice(self.__load_slice_block_count)
+
+        if self.isLoading():
+            self.__load_timer.start()
+
+    def loadSlice(self, block_count: int) -> None:
+        # slice is laid out at once, signals of the document are blocked,
+        # so loaded text isn't highlighted, journaled or taken for an edit
+        cursor: QTextCursor = QTextCursor(self.__load_document)
+        cursor.beginEditBlock()
+        self.__load_document.blockSignals(True)
+
+        for loaded_block_count in self.__load_blocks:
+            self.__loaded_block_count = loaded_block_count
+
+            block_count -= 1
+            if block_count == 0:
+                break
+        else:
+            self.__load_blocks = None
+
+        self.__load_document.blockSignals(False)
+        cursor.endEditBlock()
+
+        self.documentLoadProgressChanged.emit(self.__loaded_block_count, self.__load_block_count)
+
+        if self.__load_blocks is None:
+            self.finishLoad()
+
+    @Slot()
+    def loadNextSlice(self) -> None:
+        start: float = time.perf_counter()
+        self.loadSlice(self.__load_slice_block_count)
+        slice_time: float = max(time.perf_counter() - start, 0.001)
+
+        # events are handled between slices, so the editor stays responsive
+        block_count: int = int(self.__load_slice_block_count * self.__load_slice_time / slice_time)
+        self.__load_slice_block_count = max(1, min(2 * self.__load_slice_block_count, block_count))
+
+    def finishLoad(self) -> None:
+        self.__load_timer.stop()
+        self.__load_blocks = None
+
+        self.__load_document.setUndoRedoEnabled(True)
+        self.__load_document = None
+
+        self.documentLoaded.emit()
+
+        if self.__load_filepath != "":
+            self.recoverDocumentFile(self.__load_filepath, self.__load_sequence)
+
+    def waitForLoad(self) -> None:
+        # rest of the document is loaded at once
+        if self.isLoading():
+            self.loadSlice(self.__load_block_count)
+
+    def stopLoad(self) -> None:
+        # document is replaced or closed, so the rest of it isn't needed
+        self.__load_timer.stop()
+        self.__load_blocks = None
+        self.__load_document = None
@@ -1,55 +1,226 @@
-from PySide6.QtCore import Qt
-from PySide6.QtWidgets import QWidget
-from PySide6.QtGui import QPainter, QPaintEvent, QPainter, QPalette, QColor
+import math
 
+from PySide6.QtCore import Qt, QRect, QRectF, QPoint
+from PySide6.QtWidgets import QGraphicsItem, QGraphicsObject, QStyleOptionGraphicsItem, QWidget
+from PySide6.QtGui import QPainter, QPixmap
 
+
+from core.editor.page_layout.page_layout import PageLayout
 from core.editor.text_editor.text_document_context import TextDocumentContext
 from core.editor.header_editor.header_document_context import HeaderDocumentContext
 from core.editor.footer_editor.footer_document_context import FooterDocumentContext
 from core.editor.document_paint_context import DocumentPaintContext
+from core.editor.document_editor.tile_cache import TileCache, TileKey
+
+
+class PageItem(QGraphicsItem):
+    # one page of the canvas, it is created only while the page is near the viewport
+
+    def __init__(self, canvas: "DocumentCanvas", index: int) -> None:
+        super().__init__(canvas)
+
+        self.__canvas: DocumentCanvas = canvas
+        self.__index: int = index
+        self.__rect: QRect = canvas.pageRect(index)
+
+        self.setPos(self.__rect.topLeft())
+        self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemUsesExtendedStyleOption)
+
+    def index(self) -> int:
+        return self.__index
 
+    def boundingRect(self) -> QRectF:
+        return QRectF(0, 0, self.__rect.width(), self.__rect.height())
+
+    def paint(self, painter: QPainter, option: QStyleOptionGraphicsItem, widget: QWidget | None = None) -> None:
+        self.__canvas.paintPage(painter, self.__index, option.exposedRect.translated(self.pos()))  # type: ignore
+
+
+class DocumentCanvas(QGraphicsObject):
+    # whole document in the scene, but only pages near the viewport have items
+    # and only their tiles are rendered, so nothing of the document height is allocated
 
-class DocumentCanvas(QWidget):
     def __init__(
         self,
+        page_layout: PageLayout,
         text_context: TextDocumentContext,
         header_context: HeaderDocumentContext,
         footer_context: FooterDocumentContext,
-        parent: QWidget | None = None,
+        parent: QGraphicsItem | None = None,
     ) -> None:
         super().__init__(parent)
 
+        self.__page_layout = page_layout
         self.__text_context = text_context
         self.__header_context = header_context
         self.__footer_context = footer_context
 
-        palette = self.palette()
-        palette.setColor(QPalette.ColorGroup.Active, QPalette.ColorRole.Window, Qt.GlobalColor.transparent)
-        palette.setColor(QPalette.ColorGroup.Inactive, QPalette.ColorRole.Window, Qt.GlobalColor.transparent)
-        self.setPalette(palette)
+        # pages are painted by tiles of the page width and this height
+        self.__tile_height: int = 256
+        self.__tile_cache: TileCache = TileCache()
+        self.__tile_scale: float = 1.0  # zoom of the view which the last tiles were rendered at
 
-    def paintEvent(self, event: QPaintEvent):
-        painter: QPainter = QPainter(self)
+        self.__page_items: dict[int, PageItem] = {}
+        self.__page_geometry: tuple[float, float, float] = self.pageGeometry()
+        self.__visible_rect: QRectF = QRectF()
 
-        # text
+        self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemHasNoContents)
+
+        self.__page_layout.externalChanged.connect(self.onPageLayoutExternalChanged)
+
+    def tileCache(self) -> TileCache:
+        return self.__tile_cache
+
+    def pageItemCount(self) -> int:
+        return len(self.__page_items)
+
+    def boundingRect(self) -> QRectF:
+        return QRectF(0, 0, self.__page_layout.width(), self.__page_layout.height())
+
+    def paint(self, painter: QPainter, option: QStyleOptionGraphicsItem, widget: QWidget | None = None) -> None:
+        # pages paint themselves
+        pass
+
+    def pageRect(self, index: int) -> QRect:
+        return QRectF(
+            self.__page_layout.pageXPosition(index),
+            self.__page_layout.pageYPosition(index),
+            self.__page_layout.pageWidth(),
+            self.__page_layout.pageHeight(),
+        ).toAlignedRect()
+
+    def pageGeometry(self) -> tuple[float, float, float]:
+        return (self.__page_layout.pageWidth(), self.__page_layout.pageHeight(), self.__page_layout.pageSpacing())
+
+    def setVisibleRect(self, rect: QRectF) -> None:
+        # keep items of visible pages and their neighbours, drop the others
+        self.__visible_rect = rect
+
+        pages: range = self.__page_layout.findPages(
+            rect.top() - self.__page_layout.pageHeight(), rect.bottom() + self.__page_layout.pageHeight()
+        )
+
+        for i in [i for i in self.__page_items if i not in pages]:
+            self.removePageItem(i)
+
+        for i in pages:
+            if i not in self.__page_items:
+                self.__page_items[i] = PageItem(self, i)
+
+        self.__tile_cache.setVisibleMemory(self.visibleTileMemory())
+
+    def visibleTileMemory(self) -> int:
+        # bytes of the tiles which cover the visible rect at the zoom of the view
+        if self.__visible_rect.isEmpty():
+            return 0
+
+        rect: QRect = self.__visible_rect.toAlignedRect()
+        row_count: int = 0
+
+        for i in self.__page_layout.findPages(self.__visible_rect.top(), self.__visible_rect.bottom()):
+            page_rect: QRect = self.pageRect(i)
 
-        context: DocumentPaintContext = DocumentPaintContext(
-            painter, event.rect().toRectF(), self.__text_context.cursor
+            first_row: int = max(0, (rect.top() - page_rect.top()) // self.__tile_height)
+            last_row: int = min(
+                (page_rect.height() - 1) // self.__tile_height,
+                (rect.bottom() - page_rect.top()) // self.__tile_height,
+            )
+
+            row_count += max(0, last_row - first_row + 1)
+
+        tile_width: int = math.ceil(self.__page_layout.pageWidth() * self.__tile_scale)
+        tile_height: int = math.ceil(self.__tile_height * self.__tile_scale)
+
+        return row_count * tile_width * tile_height * QPixmap.defaultDepth() // 8
+
+    def removePageItem(self, index: int) -> None:
+        item: PageItem = self.__page_items.pop(index)
+        item.setParentItem(None)  # type: ignore
+
+        if item.scene() is not None:
+            item.scene().removeItem(item)
+
+    def invalidate(self, rect: QRect) -> None:
+        # tiles under the rect are rendered again on the next paint
+        self.__tile_cache.invalidate(rect.toRectF(), self.__page_layout.findPages(rect.top(), rect.bottom()))
+
+        if self.scene() is not None:
+            self.scene().update(self.mapRectToScene(rect.toRectF()))
+
+    def paintPage(self, painter: QPainter, index: int, rect: QRectF) -> None:
+        # painter is in coordinates of the page, rect is in coordinates of the canvas
+        exposed_rect: QRect = rect.toAlignedRect()
+        page_rect: QRect = self.pageRect(index)
+
+        # tiles are rendered at the zoom of the view, so they are blitted pixel to pixel
+        scale: float = painter.deviceTransform().m11()
+
+        # tiles of the viewport fit the cache at every zoom
+        if scale != self.__tile_scale:
+            self.__tile_scale = scale
+            self.__tile_cache.setVisibleMemory(self.visibleTileMemory())
+
+        first_row: int = max(0, (exposed_rect.top() - page_rect.top()) // self.__tile_height)
+        last_row: int = min(
+            (page_rect.height() - 1) // self.__tile_height,
+            (exposed_rect.bottom() - page_rect.top()) // self.__tile_height,
         )
+
+        for row in range(first_row, last_row + 1):
+            tile_rect: QRect = QRect(
+                page_rect.x(),
+                page_rect.y() + row * self.__tile_height,
+                page_rect.width(),
+                min(self.__tile_height, page_rect.height() - row * self.__tile_height),
+            )
+
+            key: TileKey = (index, row, scale)
+            tile: QPixmap | None = self.__tile_cache.tile(key)
+            if tile is None:
+                tile = self.renderTile(tile_rect, scale)
+                self.__tile_cache.setTile(key, tile_rect, tile)
+
+            painter.drawPixmap(QPoint(0, tile_rect.y() - page_rect.y()), tile)
+
+    def renderTile(self, rect: QRect, scale: float) -> QPixmap:
+        tile: QPixmap = QPixmap(math.ceil(rect.width() * scale), math.ceil(rect.height() * scale))
+        tile.setDevicePixelRatio(scale)
+        tile.fill(Qt.GlobalColor.transparent)
+
+        painter: QPainter = QPainter(tile)
+        painter.translate(-rect.topLeft())
+
+        # text
+
+        context: DocumentPaintContext = DocumentPaintContext(painter, rect.toRectF(), self.__text_context.cursor)
         self.__text_context.layout.paint(context)
 
         # header
 
-        context: DocumentPaintContext = DocumentPaintContext(
-            painter, event.rect().toRectF(), self.__header_context.cursor
-        )
+        context: DocumentPaintContext = DocumentPaintContext(painter, rect.toRectF(), self.__header_context.cursor)
         self.__header_context.layout.paint(context)
 
         # footer
 
-        context: DocumentPaintContext = DocumentPaintContext(
-            painter, event.rect().toRectF(), self.__footer_context.cursor
-        )
+        context: DocumentPaintContext = DocumentPaintContext(painter, rect.toRectF(), self.__footer_context.cursor)
         self.__footer_context.layout.paint(context)
 
         painter.end()
+
+        return tile
+
+    def onPageLayoutExternalChanged(self) -> None:
+        self.prepareGeometryChange()
+
+        # pages have moved, so their items are created again
+        if self.__page_geometry != self.pageGeometry():
+            self.__page_geometry = self.pageGeometry()
+            self.__tile_cache.clear()
+
+            for i in list(self.__page_items):
+                self.removePageItem(i)
+
+        for i in [i for i in self.__page_items if i >= self.__page_layout.pageCount()]:
+            self.removePageItem(i)
+
+        self.setVisibleRect(self.__visible_rect)
@@ -1,4 +1,4 @@
-from PySide6.QtCore import Qt, Signal, QObject, Slot, QRectF, QTimer, QEvent, QPointF
+from PySide6.QtCore import Qt, Signal, QObject, Slot, QRect, QRectF, QTimer, QEvent, QPointF
 from PySide6.QtWidgets import QWidget, QGraphicsScene, QToolTip
 from PySide6.QtGui import (
     QGuiApplication,
@@ -17,8 +17,10 @@ from core.editor.document_editor.component.file_component import FileComponent
 
 from core.editor.document_editor.document_editor_ui import DocumentEditorUI
 from core.editor.document_editor.document_editor_context import DocumentEditorContext
+from core.editor.document_editor.frame_scheduler import FrameScheduler
 
-from core.editor.text_editor.text_document_layout import HitResult, Hit
+from core.editor.text_editor.text_document_context import TextDocumentContext
+from core.editor.text_editor.text_document_layout import TextDocumentLayout, HitResult, Hit
 
 # text editor only supports one cursor at a time
 
@@ -68,6 +70,18 @@ class DocumentEditor(QObject):
         self.__cursor_timer.timeout.connect(self.updateCursorShape)
         self.__cursor_timer.start()
 
+        # repaint, dirty rects are collected and painted at most once per frame
+
+        self.__frame_scheduler: FrameScheduler = FrameScheduler(self)
+        self.__frame_scheduler.frameRequested.connect(self.onFrameRequested)
+
+        # text cursor which is painted now
+        self.__painted_cursor_position: int = 0
+        self.__painted_cursor_anchor: int = 0
+        self.__painted_cursor_rect: QRectF = QRectF()
+        self.__painted_selection_rect: QRectF = QRectF()
+        self.__painted_revision: int = 0
+
         # signal
 
         self.ui.keyPressed.connect(self.onKeyPressed)
@@ -78,10 +92,23 @@ class DocumentEditor(QObject):
         self.ui.mouseDoubleClicked.connect(self.onMouseDoubleClicked)
 
         self.ui.zoomFactorChanged.connect(self.zoomFactorSelected.emit)
+        self.ui.viewportChanged.connect(self.updateVisibleRect)
+        self.ui.viewportPainted.connect(self.__frame_scheduler.onFramePainted)
 
     def context(self) -> DocumentEditorContext | None:
         return self.__context
 
+    def editableContext(self) -> DocumentEditorContext | None:
+        # document is read-only while it is loading, edits would interleave with the loaded text,
+        # they wouldn't be undone and its journal is opened when the load is finished
+        if self.file_component.isLoading():
+            return None
+
+        return self.__context
+
+    def frameScheduler(self) -> FrameScheduler:
+        return self.__frame_scheduler
+
     @Slot()
     def updateCursorShape(self) -> None:
         if self.__last_hit_result.hit == Hit.Text:
@@ -98,7 +125,66 @@ class DocumentEditor(QObject):
 
     @Slot()
     def repaintViewport(self):
-        self.ui.viewport().repaint()
+        if self.__context is None:
+            self.ui.viewport().update()
+            return
+
+        self.invalidate(QRectF(0, 0, self.__context.page_layout.width(), self.__context.page_layout.height()))
+
+    @Slot(QRectF)
+    def invalidate(self, rect: QRectF) -> None:
+        self.__frame_scheduler.invalidate(rect)
+
+    @Slot()
+    def invalidateCursor(self) -> None:
+        # old and new cursor lines and selection difference
+        if self.__context is None:
+            return
+
+        text_context: TextDocumentContext = self.__context.text_editor.context()
+        cursor: QTextCursor = text_context.cursor
+        layout: TextDocumentLayout = text_context.layout
+
+        old_start: int = min(self.__painted_cursor_position, self.__painted_cursor_anchor)
+        old_end: int = max(self.__painted_cursor_position, self.__painted_cursor_anchor)
+        new_start: int = cursor.selectionStart()
+        new_end: int = cursor.selectionEnd()
+
+        if (
+            cursor.position() == self.__painted_cursor_position
+            and cursor.anchor() == self.__painted_cursor_anchor
+            and text_context.document.revision() == self.__painted_revision
+        ):
+            # request isn't about the cursor, e.g. colors of highlighting, selection or hyperlinks are changed,
+            # so the visible part of the document is repainted
+            self.invalidate(self.visibleRect())
+            return
+
+        cursor_rect: QRectF = layout.cursorRect(cursor.position())
+        selection_rect: QRectF = layout.rangeRect(new_start, new_end) if cursor.hasSelection() else QRectF()
+
+        rect: QRectF = self.__painted_cursor_rect.united(cursor_rect)
+
+        if text_context.document.revision() != self.__painted_revision:
+            # positions of the old selection may be wrong now
+            rect = rect.united(self.__painted_selection_rect).united(selection_rect)
+
+        elif old_start != old_end or new_start != new_end:
+            rect = rect.united(layout.rangeRect(min(old_start, new_start), max(old_start, new_start)))
+            rect = rect.united(layout.rangeRect(min(old_end, new_end), max(old_end, new_end)))
+
+        self.__painted_cursor_position = cursor.position()
+        self.__painted_cursor_anchor = cursor.anchor()
+        self.__painted_cursor_rect = cursor_rect
+        self.__painted_selection_rect = selection_rect
+        self.__painted_revision = text_context.document.revision()
+
+        self.invalidate(rect)
+
+    @Slot(QRect)
+    def onFrameRequested(self, rect: QRect) -> None:
+        if self.__context is not None:
+            self.__context.canvas.invalidate(rect)
 
     @Slot()
     def updateUI(self) -> None:
@@ -149,6 +235,8 @@ class DocumentEditor(QObject):
         if self.__context is None:
             return
 
+        self.__frame_scheduler.beginAction()
+
         point = self.ui.mapToScene(event.position().toPoint())
         hit_result = self.__context.text_editor.context().layout.pointTest(point)
         self.__last_hit_result = hit_result
@@ -156,7 +244,7 @@ class DocumentEditor(QObject):
         if event.button() == Qt.MouseButton.LeftButton:
             if self.__last_hit_result.hit == Hit.NoHit:
                 self.__context.text_editor.context().cursor.clearSelection()
-                self.repaintViewport()
+                self.invalidateCursor()
             self.__context.text_editor.context().movement_component.moveToPoint(
                 hit_result.point, QTextCursor.MoveMode.MoveAnchor
             )
@@ -181,6 +269,8 @@ class DocumentEditor(QObject):
         if self.__context is None:
             return
 
+        self.__frame_scheduler.beginAction()
+
         point: QPointF = self.ui.mapToScene(event.position().toPoint())
         hit_result: HitResult = self.__context.text_editor.context().layout.pointTest(point)
         self.__last_hit_result = hit_result
@@ -222,9 +312,11 @@ class DocumentEditor(QObject):
         if self.__context is None:
             return
 
+        self.__frame_scheduler.beginAction()
+
         self.__context.text_editor.context().movement_component.moveByKey(event.key(), event.modifiers())
 
-        if event.text():
+        if event.text() and self.editableContext() is not None:
             match event.key():
                 case Qt.Key.Key_Enter:
                     pass
@@ -243,8 +335,9 @@ class DocumentEditor(QObject):
         if self.__context is None:
             return
 
-        self.__context.text_editor.repaintRequest.connect(self.repaintViewport)
+        self.__context.text_editor.repaintRequest.connect(self.invalidateCursor)
         self.__context.text_editor.updateUIRequest.connect(self.updateUI)
+        self.__context.text_editor.context().layout.update[QRectF].connect(self.invalidate)
         self.__context.header_editor.repaintRequest.connect(self.repaintViewport)
         self.__context.footer_editor.repaintRequest.connect(self.repaintViewport)
 
@@ -261,17 +354,18 @@ class DocumentEditor(QObject):
 
         self.__context.text_editor.charCountChanged.connect(self.charCountChanged.emit)
 
-        self.__scene.addWidget(self.__context.canvas)
+        self.__scene.addItem(self.__context.canvas)
         self.ui.setScene(self.__scene)
         self.onPageLayoutExternalChanged()
 
-        # try move this code up :)
-        self.__context.canvas.setFixedSize(
-            int(self.__context.page_layout.width()), int(self.__context.page_layout.height())
-        )
-
         self.__context.text_editor.context().document.contentsChanged.connect(self.contentChanged.emit)
 
+        self.__painted_cursor_position = self.__context.text_editor.context().cursor.position()
+        self.__painted_cursor_anchor = self.__context.text_editor.context().cursor.anchor()
+        self.__painted_cursor_rect = QRectF()
+        self.__painted_selection_rect = QRectF()
+        self.__painted_revision = self.__context.text_editor.context().document.revision()
+
         self.updateUI()
         self.repaintViewport()
 
@@ -279,6 +373,7 @@ class DocumentEditor(QObject):
         self.__scene: QGraphicsScene = QGraphicsScene(self.parent())
         self.ui.setScene(self.__scene)
         self.__last_hit_result = HitResult()
+        self.__frame_scheduler.clear()
         self.repaintViewport()
 
     @Slot()
@@ -286,16 +381,28 @@ class DocumentEditor(QObject):
         if self.__context is None:
             return
 
-        if (
-            self.__context.canvas.width() != self.__context.page_layout.width()
-            or self.__context.canvas.height() != self.__context.page_layout.height()
-        ):
-            self.__context.canvas.setFixedSize(
-                int(self.__context.page_layout.width()), int(self.__context.page_layout.height())
-            )
-            self.__scene.setSceneRect(
-                QRectF(0, 0, self.__context.page_layout.width(), self.__context.page_layout.height())
-            )
+        # scene has the whole document height, but only pages in the viewport are allocated
+        if self.__scene.sceneRect() != self.__context.canvas.boundingRect():
+            self.__scene.setSceneRect(self.__context.canvas.boundingRect())
 
         self.ui.horizontalScrollBar().setPageStep(int(self.__context.page_layout.pageWidth()))
         self.ui.verticalScrollBar().setPageStep(int(self.__context.page_layout.pageHeight()))
+
+        self.updateVisibleRect()
+
+    @Slot()
+    def updateVisibleRect(self) -> None:
+        if self.__context is None:
+            return
+
+        rect: QRectF = self.visibleRect()
+        self.__context.canvas.setVisibleRect(rect)
+        self.__context.text_editor.context().finder_component.setVisibleRect(rect)
+
+    def visibleRect(self) -> QRectF:
+        # viewport in coordinates of the canvas
+        if self.__context is None:
+            return QRectF()
+
+        rect: QRectF = self.ui.mapToScene(self.ui.viewport().rect()).boundingRect()
+        return self.__context.canvas.mapRectFromScene(rect)
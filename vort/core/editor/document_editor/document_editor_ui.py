@@ -1,6 +1,6 @@
-from PySide6.QtCore import Qt, QEvent, Signal, QPointF
+from PySide6.QtCore import Qt, QEvent, Signal, QPointF, QRect
 from PySide6.QtWidgets import QWidget, QGraphicsView
-from PySide6.QtGui import QKeyEvent, QMouseEvent, QKeyEvent, QWheelEvent, QGuiApplication
+from PySide6.QtGui import QKeyEvent, QMouseEvent, QKeyEvent, QWheelEvent, QGuiApplication, QPaintEvent, QResizeEvent
 
 
 class DocumentEditorUI(QGraphicsView):
@@ -13,6 +13,10 @@ class DocumentEditorUI(QGraphicsView):
 
     zoomFactorChanged: Signal = Signal(float)
 
+    # visible part of the scene has changed
+    viewportChanged: Signal = Signal()
+    viewportPainted: Signal = Signal(QRect)
+
     def __init__(self, parent: QWidget | None = None) -> None:
         super().__init__(parent)
 
@@ -40,6 +44,7 @@ class DocumentEditorUI(QGraphicsView):
         self.resetTransform()
         self.scale(zoom_factor, zoom_factor)
         self.zoom_factor = zoom_factor
+        self.viewportChanged.emit()
 
     def zoom(self, zoom_factor: float) -> None:
         if abs(zoom_factor - self.zoom_factor_min) < self.epsilon:
@@ -60,8 +65,21 @@ class DocumentEditorUI(QGraphicsView):
         new_mouse_scene_position: QPointF = self.mapFromScene(self.mouse_scene_position).toPointF()
         new_viewport_center: QPointF = new_mouse_scene_position - mouse_center_position
         self.centerOn(self.mapToScene(new_viewport_center.toPoint()))
+        self.viewportChanged.emit()
         self.zoomFactorChanged.emit(self.zoom_factor)
 
+    def scrollContentsBy(self, dx: int, dy: int) -> None:
+        super().scrollContentsBy(dx, dy)
+        self.viewportChanged.emit()
+
+    def resizeEvent(self, event: QResizeEvent) -> None:
+        super().resizeEvent(event)
+        self.viewportChanged.emit()
+
+    def paintEvent(self, event: QPaintEvent) -> None:
+        super().paintEvent(event)
+        self.viewportPainted.emit(event.rect())
+
     def mouseMoveEvent(self, event: QMouseEvent) -> None:
         self.mouse_viewport_position = QPointF(event.position().toPoint())
         self.mouse_scene_position = self.mapToScene(event.position().toPoint())
@@ -0,0 +1,107 @@
+from PySide6.QtCore import QObject, Signal, Slot, QRect, QRectF, QTimer, QElapsedTimer
+
+
+class FrameScheduler(QObject):
+    # collects dirty rects of the canvas and requests at most one frame per frame interval.
+    # nothing is requested if nothing has changed
+    #
+    # paints are counted, so amplification of paints per user action can be checked
+
+    frameRequested: Signal = Signal(QRect)
+
+    def __init__(self, parent: QObject | None = None) -> None:
+        super().__init__(parent)
+
+        self.__frame_interval: int = 16  # ms, about 60 frames per second
+
+        self.__dirty_rect: QRectF = QRectF()
+
+        self.__frame_timer: QTimer = QTimer(self)
+        self.__frame_timer.setSingleShot(True)
+        self.__frame_timer.timeout.connect(self.flush)
+
+        self.__last_frame_timer: QElapsedTimer = QElapsedTimer()
+
+        # counters
+
+        self.__frame_count: int = 0
+        self.__paint_count: int = 0
+        self.__action_count: int = 0
+        self.__action_paint_count: int = 0
+
+    def frameInterval(self) -> int:
+        return self.__frame_interval
+
+    def setFrameInterval(self, interval: int) -> None:
+        self.__frame_interval = interval
+
+    def isFramePending(self) -> bool:
+        return self.__frame_timer.isActive()
+
+    def dirtyRect(self) -> QRectF:
+        return self.__dirty_rect
+
+    @Slot(QRectF)
+    def invalidate(self, rect: QRectF) -> None:
+        if rect.isEmpty() or self.__dirty_rect.contains(rect):
+            return
+
+        self.__dirty_rect = self.__dirty_rect.united(rect)
+
+        if self.__frame_timer.isActive():
+            return
+
+        # wait for the rest of the frame if the last one was recently
+        delay: int = 0
+        if self.__last_frame_timer.isValid():
+            delay = max(0, self.__frame_interval - self.__last_frame_timer.elapsed())
+
+        self.__frame_timer.start(delay)
+
+    @Slot()
+    def flush(self) -> None:
+        self.__frame_timer.stop()
+
+        if self.__dirty_rect.isEmpty():
+            return
+
+        rect: QRect = self.__dirty_rect.toAlignedRect()
+        self.__dirty_rect = QRectF()
+
+        self.__frame_count += 1
+        self.__last_frame_timer.start()
+        self.frameRequested.emit(rect)
+
+    def clear(self) -> None:
+        self.__frame_timer.stop()
+        self.__dirty_rect = QRectF()
+
+    # counters
+
+    def beginAction(self) -> None:
+        self.__action_count += 1
+        self.__action_paint_count = 0
+
+    @Slot(QRect)
+    def onFramePainted(self, rect: QRect) -> None:
+        self.__paint_count += 1
+        self.__action_paint_count += 1
+
+    def frameCount(self) -> int:
+        return self.__frame_count
+
+    def paintCount(self) -> int:
+        return self.__paint_count
+
+    def actionCount(self) -> int:
+        return self.__action_count
+
+    def actionPaintCount(self) -> int:
+        # paints since the last action began
+        return self.__action_paint_count
+
+    def resetCounters(self) -> None:
+        self.__frame_count = 0
+        self.__paint_count = 0
+        self.__action_count = 0
+        self.__action_paint_count = 0
@@ -0,0 +1,91 @@
+from collections import OrderedDict
+
+from PySide6.QtCore import QRect, QRectF
+from PySide6.QtGui import QPixmap
+
+
+# page index, row of the tile in the page and scale which the tile was rendered at
+TileKey = tuple[int, int, float]
+
+
+class TileCache:
+    # rendered tiles of pages, the least recently used tiles are dropped
+    # when their pixmaps don't fit the memory budget.
+    # the budget grows with the zoom, tiles of the viewport and as many for scrolling always fit
+
+    def __init__(self) -> None:
+        self.__memory_budget: int = 64 * 1024 * 1024  # bytes
+        self.__visible_memory: int = 0  # bytes of tiles which cover the viewport
+        self.__memory_usage: int = 0
+
+        self.__tiles: OrderedDict[TileKey, tuple[QRect, QPixmap]] = OrderedDict()
+
+        # keys of tiles by page, so invalidation looks only at the pages under the rect
+        self.__page_keys: dict[int, set[TileKey]] = {}
+
+    def memoryBudget(self) -> int:
+        return max(self.__memory_budget, 2 * self.__visible_memory)
+
+    def setMemoryBudget(self, budget: int) -> None:
+        self.__memory_budget = budget
+        self.evict()
+
+    def visibleMemory(self) -> int:
+        return self.__visible_memory
+
+    def setVisibleMemory(self, memory: int) -> None:
+        self.__visible_memory = memory
+        self.evict()
+
+    def memoryUsage(self) -> int:
+        return self.__memory_usage
+
+    def tileCount(self) -> int:
+        return len(self.__tiles)
+
+    def tile(self, key: TileKey) -> QPixmap | None:
+        if key not in self.__tiles:
+            return None
+
+        self.__tiles.move_to_end(key)
+        return self.__tiles[key][1]
+
+    def setTile(self, key: TileKey, rect: QRect, pixmap: QPixmap) -> None:
+        self.removeTile(key)
+
+        self.__tiles[key] = (rect, pixmap)
+        self.__page_keys.setdefault(key[0], set()).add(key)
+        self.__memory_usage += self.pixmapSize(pixmap)
+
+        self.evict()
+
+    def removeTile(self, key: TileKey) -> None:
+        if key in self.__tiles:
+            _, pixmap = self.__tiles.pop(key)
+            self.__memory_usage -= self.pixmapSize(pixmap)
+
+            page_keys: set[TileKey] = self.__page_keys[key[0]]
+            page_keys.discard(key)
+            if len(page_keys) == 0:
+                del self.__page_keys[key[0]]
+
+    def invalidate(self, rect: QRectF, pages: range) -> None:
+        # drop tiles of every scale which intersect the rect, pages are the ones under the rect
+        for page in pages:
+            page_keys: set[TileKey] = self.__page_keys.get(page, set())
+
+            for key in [key for key in page_keys if rect.intersects(self.__tiles[key][0].toRectF())]:
+                self.removeTile(key)
+
+    def clear(self) -> None:
+        self.__tiles.clear()
+        self.__page_keys.clear()
+        self.__memory_usage = 0
+
+    def evict(self) -> None:
+        # keep the most recently used tile even if it doesn't fit
+        while self.__memory_usage > self.memoryBudget() and len(self.__tiles) > 1:
+            self.removeTile(next(iter(self.__tiles)))
+
+    def pixmapSize(self, pixmap: QPixmap) -> int:
+        return pixmap.width() * pixmap.height() * pixmap.depth() // 8
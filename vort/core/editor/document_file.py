@@ -1,13 +1,20 @@
-from typing import Self
+from typing import Any, Self
 
 from PySide6.QtCore import Qt
-from PySide6.QtGui import QColor
+from PySide6.QtGui import QColor, QImage
+
+from core.editor.document_model import DocumentModel
 
 
 class DocumentFile:
     def __init__(self) -> None:
-        self.html_text: str = ""
-        self.png_image: dict[str, bytes] = {}
+        self.html_text: str = ""  # text of files saved before the document model
+        self.text_model: DocumentModel | None = None
+        self.png_image: dict[str, bytes | memoryview | QImage] = {}  # QImage until it is encoded
+        self.png_image_checksum: dict[str, int] = {}  # crc32 of mapped images, they are verified on first use
+
+        # number of the last change of the autosave journal which is in the file
+        self.journal_sequence: int = 0
 
         # page
 
@@ -89,12 +96,48 @@ class DocumentFile:
         self.is_hyperlink_foreground_color_turned: bool = False
         self.hyperlink_foreground_color: QColor = QColor("black")
 
+    def settings(self) -> dict[str, Any]:
+        # everything except text and images in json compatible values
+        settings: dict[str, Any] = {}
+
+        for name, value in vars(self).items():
+            if name in ["html_text", "text_model", "png_image", "png_image_checksum"]:
+                continue
+
+            if isinstance(value, QColor):
+                settings[name] = [value.red(), value.green(), value.blue(), value.alpha()]
+            elif isinstance(value, Qt.AlignmentFlag):
+                settings[name] = value.value
+            else:
+                settings[name] = value
+
+        return settings
+
+    def setSettings(self, settings: dict[str, Any]) -> None:
+        # unknown settings are skipped, missing settings keep their values.
+        # types are taken from a new file, values of the default file may be whole numbers of float settings
+        types: dict[str, type] = {name: type(value) for name, value in vars(DocumentFile()).items()}
+
+        for name, value in vars(self).items():
+            if name in ["html_text", "text_model", "png_image", "png_image_checksum"] or name not in settings:
+                continue
+
+            if isinstance(value, QColor):
+                setattr(self, name, QColor(*settings[name]))
+            elif isinstance(value, Qt.AlignmentFlag):
+                setattr(self, name, Qt.AlignmentFlag(settings[name]))
+            else:
+                setattr(self, name, types[name](settings[name]))
+
     @classmethod
     def default_file(cls) -> Self:
         file: Self = cls()
 
         file.html_text = ""
+        file.text_model = None
         file.png_image = {}
+        file.png_image_checksum = {}
+        file.journal_sequence = 0
         file.page_width = 21
         file.page_height = 29.7
         file.page_spacing = 1
@@ -0,0 +1,255 @@
+import os
+from array import array
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Iterator
+
+from PySide6.QtCore import QRegularExpression, QRegularExpressionMatch, QRegularExpressionMatchIterator
+from PySide6.QtGui import QTextDocument, QTextFormat, QTextCharFormat
+
+from core.editor.document_file import DocumentFile
+from core.editor.document_model import DocumentModel, DocumentModelError
+from core.editor.document_writer import DocumentWriter
+from core.editor.document_container import DocumentContainerError
+from core.editor.document_reader import DocumentReader
+from core.editor.text_editor.match_table import MatchTable
+from core.editor.text_editor.component.finder_component import FinderComponent
+
+
+class DocumentFinderResult:
+    def __init__(self) -> None:
+        self.filepath: str = ""
+        self.starts: array = array("q")  # positions of matches in the document like in the finder
+        self.ends: array = array("q")
+        self.replaced_count: int = 0
+        self.error: str = ""  # file is skipped and isn't changed
+
+    def matchCount(self) -> int:
+        return len(self.starts)
+
+
+class DocumentFinder:
+    # finds and replaces text in .vrt files without opening them in the editor.
+    # text is searched in the document model block by block with the same options as in the finder,
+    # files are processed in parallel processes, so it holds only plain values which are sent to them
+
+    def __init__(
+        self, find_data: str, is_regex_turned: bool = False, is_case_turned: bool = False, is_whole_turned: bool = False
+    ) -> None:
+        self.__find_data: str = find_data
+
+        self.__is_regex_turned: bool = is_regex_turned
+        self.__is_case_turned: bool = is_case_turned
+        self.__is_whole_turned: bool = is_whole_turned
+
+    def expr(self) -> QRegularExpression:
+        return QRegularExpression(
+            *FinderComponent.findPattern(
+                self.__find_data, self.__is_regex_turned, self.__is_case_turned, self.__is_whole_turned
+            )
+        )
+
+    def findFiles(
+        self, filepaths: list[str], replace_data: str | None = None, process_count: int | None = None
+    ) -> Iterator[DocumentFinderResult]:
+        # results are in the order of the files, every file is searched and replaced in one process
+        if process_count == 1 or len(filepaths) <= 1:
+            yield from map(self.findFile, filepaths, repeat(replace_data))
+            return
+
+        with ProcessPoolExecutor(process_count) as executor:
+            yield from executor.map(self.findFile, filepaths, repeat(replace_data))
+
+    def findFile(self, filepath: str, replace_data: str | None = None) -> DocumentFinderResult:
+        # matches are replaced when replace data is given, file is written only if something is replaced
+        result: DocumentFinderResult = DocumentFinderResult()
+        result.filepath = filepath
+
+        try:
+            file: DocumentFile = self.readDocumentFile(filepath)
+
+            result.starts, result.ends = self.findModel(file.text_model)
+
+            if replace_data is not None and result.matchCount() > 0:
+                # unsaved changes of the editor are replayed on top of the file by positions
+                if os.path.exists(f"{filepath}.journal") or os.path.exists(f"{filepath}.recovery"):
+                    raise DocumentContainerError("File has unsaved changes of the editor")
+
+                result.replaced_count = self.replaceModel(file.text_model, replace_data)
+                DocumentWriter().writeDocumentFile(filepath, file)
+
+        except (OSError, DocumentContainerError, DocumentModelError, ValueError) as error:
+            result.error = str(error)
+
+        return result
+
+    @classmethod
+    def readDocumentFile(cls, filepath: str) -> DocumentFile:
+        # damaged sections aren't skipped like in the editor, the file would lose them when it is written.
+        # images are read, not mapped, so the file isn't open when it is replaced
+        file: DocumentFile = DocumentReader.readDocumentFile(filepath, is_strict=True, is_mapped=False)
+
+        # text is html in files saved before the document model, it is saved as the model like in the editor
+        if file.text_model is None:
+            document: QTextDocument = QTextDocument()
+            document.setHtml(file.html_text)
+            file.text_model = DocumentModel.fromDocument(document)
+
+        return file
+
+    def findModel(self, model: DocumentModel) -> tuple[array, array]:
+        # matches don't cross blocks, blocks are separated by one character in positions of the document.
+        # positions of the document and offsets of matches are in utf-16 units, runs are in characters
+        expr: QRegularExpression = self.expr()
+        if self.__find_data == "" or not expr.isValid():
+            raise ValueError(f"Pattern {self.__find_data!r} isn't valid")
+
+        starts: array = array("q")
+        ends: array = array("q")
+
+        # QTextDocument.find searches non-breaking spaces as spaces
+        text: str = model.text.replace("\u00a0", " ")
+        runs: array = model.runs
+
+        position: int = 0
+        document_position: int = 0
+        run: int = 0
+
+        for run_count in model.blocks[2::3]:
+            length: int = sum(runs[2 * run + 1 : 2 * (run + run_count) : 2])
+
+            block_text: str = text[position : position + length]
+            MatchTable.searchText(block_text, document_position, expr, starts, ends)
+
+            position += length
+            document_position += MatchTable.utf16Length(block_text) + 1
+            run += run_count
+
+        return starts, ends
+
+    def replaceModel(self, model: DocumentModel, replace_data: str) -> int:
+        # replacement gets the format of the last replaced character like QTextCursor.insertText,
+        # so the model is the same as after replace all in the editor
+        if any(separator in replace_data for separator in "\n\r\u2029"):
+            raise ValueError("Replacement can't contain line breaks")
+
+        expr: QRegularExpression = self.expr()
+        is_expanded: bool = self.__is_regex_turned and FinderComponent.REFERENCE.search(replace_data) is not None
+
+        text: str = model.text
+        search_text: str = text.replace("\u00a0", " ")
+        blocks: array = model.blocks
+        runs: array = model.runs
+
+        texts: list[str] = []
+        new_runs: array = array("I")
+
+        # formats of replacements by formats of replaced characters, images lose their object type
+        replacement_formats: dict[int, int] = {}
+
+        def replacementFormat(index: int) -> int:
+            replacement_index: int | None = replacement_formats.get(index)
+            if replacement_index is None:
+                if model.formats[index].hasProperty(QTextFormat.Property.ObjectType):
+                    format: QTextCharFormat = QTextCharFormat(model.formats[index].toCharFormat())
+                    format.clearProperty(QTextFormat.Property.ObjectType)
+
+                    replacement_index = len(model.formats)
+                    model.formats.append(format)
+                else:
+                    replacement_index = index
+
+                replacement_formats[index] = replacement_index
+
+            return replacement_index
+
+        count: int = 0
+        position: int = 0
+        run: int = 0
+
+        for i in range(0, len(blocks), 3):
+            run_count: int = blocks[i + 2]
+            block_runs: array = runs[2 * run : 2 * (run + run_count)]
+            length: int = sum(block_runs[1::2])
+
+            block_text: str = search_text[position : position + length]
+
+            # offsets of matches are in utf-16 units, every character out of the bmp before them takes two
+            pairs: list[int] = []
+            if not block_text.isascii():
+                pairs = [
+                    index + count
+                    for count, index in enumerate(index for index, char in enumerate(block_text) if char > "\uffff")
+                ]
+
+            matches: list[tuple[int, int, QRegularExpressionMatch]] = []  # start, end in characters, match
+            it: QRegularExpressionMatchIterator = expr.globalMatch(block_text)
+            while it.hasNext():
+                match: QRegularExpressionMatch = it.next()
+                if match.capturedLength() > 0:
+                    match_start: int = match.capturedStart() - bisect_left(pairs, match.capturedStart())
+                    match_end: int = match.capturedEnd() - bisect_left(pairs, match.capturedEnd())
+                    matches.append((match_start, match_end, match))
+
+            if len(matches) == 0:
+                texts.append(text[position : position + length])
+                new_runs.extend(block_runs)
+
+            else:
+                # starts of runs in the block
+                run_starts: list[int] = [0]
+                for run_length in block_runs[1::2]:
+                    run_starts.append(run_starts[-1] + run_length)
+
+                pieces: list[tuple[int, str]] = []  # format, text
+
+                def addText(start: int, end: int) -> None:
+                    j: int = bisect_right(run_starts, start) - 1
+                    while start < end:
+                        run_end: int = min(run_starts[j + 1], end)
+                        pieces.append((block_runs[2 * j], text[position + start : position + run_end]))
+                        start = run_end
+                        j += 1
+
+                end: int = 0
+                for match_start, match_end, match in matches:
+                    addText(end, match_start)
+
+                    last_run: int = bisect_right(run_starts, match_end - 1) - 1
+                    pieces.append(
+                        (
+                            replacementFormat(block_runs[2 * last_run]),
+                            FinderComponent.expandReplacement(match, replace_data) if is_expanded else replace_data,
+                        )
+                    )
+
+                    end = match_end
+
+                addText(end, length)
+
+                # empty runs are dropped and runs of the same format are joined
+                block_run_count: int = 0
+                for format_index, piece in pieces:
+                    if piece == "":
+                        continue
+
+                    if block_run_count > 0 and new_runs[-2] == format_index:
+                        new_runs[-1] += len(piece)
+                    else:
+                        new_runs.append(format_index)
+                        new_runs.append(len(piece))
+                        block_run_count += 1
+
+                    texts.append(piece)
+
+                blocks[i + 2] = block_run_count
+                count += len(matches)
+
+            position += length
+            run += run_count
+
+        model.runs = new_runs
+        model.text = "".join(texts)
+
+        return count
@@ -0,0 +1,319 @@
+import os
+import struct
+import time
+import zlib
+from enum import IntEnum
+from typing import BinaryIO, Iterator
+
+from PySide6.QtCore import QObject, Slot, QTimer
+from PySide6.QtGui import QTextBlock, QTextCursor, QTextFragment
+
+from core.editor.document_model import DocumentModel, DocumentModelError
+from core.editor.text_editor.text_document import TextDocument
+
+
+# .vrt.journal
+#
+# header | record | record | ...
+#
+# every change of the text is appended as a record which replaces whole blocks,
+# images are appended before the first change which refers to them.
+# new blocks of a change are stored as the document model.
+# records are numbered, the .vrt or its recovery file stores the number of the last change it contains,
+# so replay skips records which are checkpointed already
+
+
+class RecordKind(IntEnum):
+    Change = 1
+    Image = 2
+
+
+class Record:
+    def __init__(self) -> None:
+        self.kind: RecordKind = RecordKind.Change
+        self.sequence: int = 0
+        self.offset: int = 0
+        self.payload: bytes = b""
+
+
+class DocumentJournal(QObject):
+    MAGIC: bytes = b"VRTJ"
+    VERSION: int = 2
+
+    # magic, version
+    HEADER: struct.Struct = struct.Struct("<4sH")
+    # payload size, payload checksum, kind, sequence
+    RECORD: struct.Struct = struct.Struct("<IIBQ")
+    # start of the first block, length of replaced blocks, model of new blocks is compressed after it
+    CHANGE: struct.Struct = struct.Struct("<QQ")
+    # name size, name and png bytes are after it
+    IMAGE: struct.Struct = struct.Struct("<H")
+
+    def __init__(self, filepath: str, document: TextDocument, sequence: int) -> None:
+        super().__init__()
+
+        self.__filepath: str = filepath
+        self.__document: TextDocument = document
+
+        # number of the last change
+        self.__sequence: int = sequence
+
+        # images which are in the .vrt or in the journal already
+        self.__image_names: set[str] = set(document.imageStore().names())
+
+        # sequences and offsets of records, so checkpointed records can be dropped.
+        # journal may be left by the last session, its damaged end is cut off on the first append
+        self.__records: list[tuple[int, int]] = []
+        self.__size: int = 0
+        self.__append_time: float = 0.0  # s, monotonic
+
+        for record in self.readRecords(filepath):
+            self.__records.append((record.sequence, record.offset))
+            self.__size = record.offset + self.RECORD.size + len(record.payload)
+
+        self.__file: BinaryIO | None = None
+        self.__block_count: int = document.blockCount()
+
+        # data is on the disk at most after this interval
+        self.__flush_timer: QTimer = QTimer(self)
+        self.__flush_timer.setSingleShot(True)
+        self.__flush_timer.setInterval(1000)
+        self.__flush_timer.timeout.connect(self.flush)
+
+        self.__document.contentsChange.connect(self.onContentsChange)
+
+    def filepath(self) -> str:
+        return self.__filepath
+
+    def sequence(self) -> int:
+        return self.__sequence
+
+    def size(self) -> int:
+        return self.__size
+
+    def appendTime(self) -> float:
+        return self.__append_time
+
+    @Slot(int, int, int)
+    def onContentsChange(self, position: int, chars_removed: int, chars_added: int) -> None:
+        # block count before the change is known, so replaced blocks are known too
+        block_count: int = self.__document.blockCount()
+        old_block_count: int = self.__block_count
+        self.__block_count = block_count
+
+        first_block: QTextBlock = self.__document.findBlock(position)
+        last_block: QTextBlock = self.__document.findBlock(
+            min(position + chars_added, self.__document.characterCount() - 1)
+        )
+
+        # whole document is replaced if the change doesn't look consistent
+        if (
+            not first_block.isValid()
+            or not last_block.isValid()
+            or block_count - old_block_count > last_block.blockNumber() - first_block.blockNumber()
+        ):
+            first_block = self.__document.begin()
+            last_block = self.__document.lastBlock()
+
+        start: int = first_block.position()
+        end: int = last_block.position() + last_block.length() - 1
+
+        # new blocks without added and with removed characters
+        old_length: int = max(0, end - start - chars_added + chars_removed)
+
+        model: DocumentModel = DocumentModel.fromBlocks(first_block, last_block)
+
+        self.appendImages(first_block, last_block)
+
+        self.__sequence += 1
+        blocks: bytes = zlib.compress(model.toBytes(), 1)
+        self.appendRecord(RecordKind.Change, self.__sequence, self.CHANGE.pack(start, old_length) + blocks)
+
+    def appendImages(self, first_block: QTextBlock, last_block: QTextBlock) -> None:
+        block: QTextBlock = first_block
+        while block.isValid():
+            it: QTextBlock.iterator = block.begin()
+            while not it.atEnd():
+                fragment: QTextFragment = it.fragment()
+
+                if fragment.charFormat().isImageFormat():
+                    name: str = fragment.charFormat().toImageFormat().name()
+                    data: bytes | memoryview | None = self.__document.imageStore().encodedImage(name)
+
+                    # image belongs to the next change, so it is kept with it on checkpoint
+                    if name not in self.__image_names and data is not None:
+                        self.__image_names.add(name)
+
+                        encoded_name: bytes = name.encode("utf-8")
+                        self.appendRecord(
+                            RecordKind.Image,
+                            self.__sequence + 1,
+                            self.IMAGE.pack(len(encoded_name)) + encoded_name + bytes(data),
+                        )
+
+                it += 1
+
+            if block == last_block:
+                break
+
+            block = block.next()
+
+    def appendRecord(self, kind: RecordKind, sequence: int, payload: bytes) -> None:
+        if self.__file is None:
+            self.__file = open(self.__filepath, "r+b" if self.__size > 0 else "wb")
+
+            if self.__size == 0:
+                self.__file.write(self.HEADER.pack(self.MAGIC, self.VERSION))
+                self.__size = self.HEADER.size
+
+            self.__file.seek(self.__size)
+            self.__file.truncate()
+
+        self.__records.append((sequence, self.__size))
+        self.__file.write(self.RECORD.pack(len(payload), zlib.crc32(payload), kind, sequence))
+        self.__file.write(payload)
+        self.__size += self.RECORD.size + len(payload)
+        self.__append_time = time.monotonic()
+
+        if not self.__flush_timer.isActive():
+            self.__flush_timer.start()
+
+    @Slot()
+    def flush(self) -> None:
+        self.__flush_timer.stop()
+
+        if self.__file is not None:
+            self.__file.flush()
+            os.fsync(self.__file.fileno())
+
+    def checkpoint(self, sequence: int, image_names: list[str]) -> None:
+        # changes up to the sequence are in the .vrt, so only the later records are kept.
+        # images which aren't in the .vrt are appended again when a change refers to them
+        self.__image_names = set(image_names)
+
+        records: list[tuple[int, int]] = [record for record in self.__records if record[0] > sequence]
+        if len(records) == len(self.__records):
+            return
+
+        self.flush()
+
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
+
+        if not records:
+            self.__records = []
+            self.__size = 0
+
+            if os.path.exists(self.__filepath):
+                os.remove(self.__filepath)
+
+            return
+
+        # records after the sequence were appended while the .vrt was written, there are few of them
+        offset: int = records[0][1]
+
+        with open(self.__filepath, "rb") as f:
+            f.seek(offset)
+            tail: bytes = f.read(self.__size - offset)
+
+        temp_filepath: str = f"{self.__filepath}.tmp"
+        with open(temp_filepath, "wb") as f:
+            f.write(self.HEADER.pack(self.MAGIC, self.VERSION))
+            f.write(tail)
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(temp_filepath, self.__filepath)
+
+        self.__records = [(record[0], record[1] - offset + self.HEADER.size) for record in records]
+        self.__size = self.HEADER.size + len(tail)
+
+    def close(self, is_removed: bool) -> None:
+        # journal is kept if it is needed to recover the document
+        self.__flush_timer.stop()
+        self.__document.contentsChange.disconnect(self.onContentsChange)
+
+        if self.__file is not None:
+            self.flush()
+            self.__file.close()
+            self.__file = None
+
+        if is_removed and os.path.exists(self.__filepath):
+            os.remove(self.__filepath)
+
+    @classmethod
+    def readRecords(cls, filepath: str) -> Iterator[Record]:
+        # damaged or incomplete record ends the journal, e.g. if it was being written when the app crashed
+        try:
+            with open(filepath, "rb") as f:
+                data: bytes = f.read()
+        except FileNotFoundError:
+            return
+
+        if len(data) < cls.HEADER.size:
+            return
+
+        magic, version = cls.HEADER.unpack_from(data)
+        # changes of older versions are html, their journal is left by an older app and isn't replayed
+        if magic != cls.MAGIC or version != cls.VERSION:
+            return
+
+        position: int = cls.HEADER.size
+        while position + cls.RECORD.size <= len(data):
+            size, checksum, kind, sequence = cls.RECORD.unpack_from(data, position)
+
+            payload: bytes = data[position + cls.RECORD.size : position + cls.RECORD.size + size]
+            if len(payload) != size or zlib.crc32(payload) != checksum:
+                return
+
+            if kind not in [record_kind.value for record_kind in RecordKind]:
+                return
+
+            record: Record = Record()
+            record.kind = RecordKind(kind)
+            record.sequence = sequence
+            record.offset = position
+            record.payload = payload
+
+            yield record
+
+            position += cls.RECORD.size + size
+
+    @classmethod
+    def replay(cls, filepath: str, document: TextDocument, sequence: int) -> int:
+        # applies changes after the sequence, returns the number of the last applied change
+        for record in cls.readRecords(filepath):
+            if record.sequence <= sequence:
+                continue
+
+            match record.kind:
+                case RecordKind.Image:
+                    (name_size,) = cls.IMAGE.unpack_from(record.payload)
+                    name: str = record.payload[cls.IMAGE.size : cls.IMAGE.size + name_size].decode("utf-8")
+                    document.imageStore().addImage(name, record.payload[cls.IMAGE.size + name_size :])
+
+                case RecordKind.Change:
+                    start, old_length = cls.CHANGE.unpack_from(record.payload)
+                    try:
+                        model: DocumentModel = DocumentModel.fromBytes(
+                            zlib.decompress(record.payload[cls.CHANGE.size :])
+                        )
+                    except (zlib.error, DocumentModelError):
+                        break
+
+                    cls.replayChange(document, start, old_length, model)
+
+                    sequence = record.sequence
+
+        return sequence
+
+    @classmethod
+    def replayChange(cls, document: TextDocument, start: int, old_length: int, model: DocumentModel) -> None:
+        cursor: QTextCursor = QTextCursor(document)
+        cursor.setPosition(start)
+        cursor.setPosition(min(start + old_length, document.characterCount() - 1), QTextCursor.MoveMode.KeepAnchor)
+
+        # first new block takes the place of the first replaced one
+        cursor.removeSelectedText()
+        model.insert(cursor)
@@ -0,0 +1,243 @@
+import struct
+import sys
+from array import array
+from typing import Iterator, Self
+
+from PySide6.QtCore import QByteArray, QDataStream, QIODevice
+from PySide6.QtGui import (
+    QTextBlock,
+    QTextBlockFormat,
+    QTextCharFormat,
+    QTextCursor,
+    QTextDocument,
+    QTextFormat,
+    QTextFragment,
+)
+
+
+# text section of .vrt
+#
+# header | formats | blocks | runs | text
+#
+# blocks and runs refer to the shared table of formats by index,
+# every block has its formats and the number of its runs, every run has its format and length.
+# text of all runs is stored after them in one string
+
+
+class DocumentModelError(Exception):
+    pass
+
+
+class DocumentModel:
+    MAGIC: bytes = b"VRTM"
+    VERSION: int = 1
+
+    # magic, version, formats size, format count, block count, run count
+    HEADER: struct.Struct = struct.Struct("<4sHQIQQ")
+
+    def __init__(self) -> None:
+        self.formats: list[QTextFormat] = []
+        self.blocks: array = array("I")  # block format, block char format, run count
+        self.runs: array = array("I")  # char format, length in characters
+        self.text: str = ""
+
+    @classmethod
+    def fromDocument(cls, document: QTextDocument) -> Self:
+        return cls.fromBlocks(document.begin(), document.lastBlock())
+
+    @classmethod
+    def fromBlocks(cls, first_block: QTextBlock, last_block: QTextBlock) -> Self:
+        # formats of the document are indexed already, only the used ones are kept
+        model: Self = cls()
+
+        indexes: dict[int, int] = {}
+
+        def addFormat(document_index: int, format: QTextFormat) -> int:
+            index: int = len(model.formats)
+            indexes[document_index] = index
+            model.formats.append(QTextFormat(format))
+
+            return index
+
+        texts: list[str] = []
+        runs: array = model.runs
+
+        block: QTextBlock = first_block
+        while block.isValid():
+            run_count: int = 0
+
+            # iterating the block is faster than moving its iterator
+            for it in block:
+                fragment: QTextFragment = it.fragment()
+                text: str = fragment.text()
+
+                format_index: int = fragment.charFormatIndex()
+
+                index: int | None = indexes.get(format_index)
+                if index is None:
+                    index = addFormat(format_index, fragment.charFormat())
+
+                runs.append(index)
+                runs.append(len(text))
+                texts.append(text)
+                run_count += 1
+
+            block_index: int | None = indexes.get(block.blockFormatIndex())
+            if block_index is None:
+                block_index = addFormat(block.blockFormatIndex(), block.blockFormat())
+
+            char_index: int | None = indexes.get(block.charFormatIndex())
+            if char_index is None:
+                char_index = addFormat(block.charFormatIndex(), block.charFormat())
+
+            model.blocks.append(block_index)
+            model.blocks.append(char_index)
+            model.blocks.append(run_count)
+
+            if block == last_block:
+                break
+
+            block = block.next()
+
+        model.text = "".join(texts)
+
+        return model
+
+    @classmethod
+    def fromBytes(cls, data: bytes | memoryview) -> Self:
+        # raises DocumentModelError if the data is damaged, so nothing is inserted
+        model: Self = cls()
+
+        if len(data) < cls.HEADER.size:
+            raise DocumentModelError("Text is too short")
+
+        magic, version, formats_size, format_count, block_count, run_count = cls.HEADER.unpack_from(data)
+
+        if magic != cls.MAGIC:
+            raise DocumentModelError("Text is not a document model")
+
+        if version > cls.VERSION:
+            raise DocumentModelError(f"Document model version {version} isn't supported")
+
+        position: int = cls.HEADER.size
+        blocks_size: int = block_count * 3 * model.blocks.itemsize
+        runs_size: int = run_count * 2 * model.runs.itemsize
+
+        if position + formats_size + blocks_size + runs_size > len(data):
+            raise DocumentModelError("Text is damaged")
+
+        # formats
+
+        stream: QDataStream = QDataStream(QByteArray(bytes(data[position : position + formats_size])))
+        stream.setVersion(QDataStream.Version.Qt_6_0)
+
+        for _ in range(format_count):
+            format: QTextFormat = stream.readQVariant()
+
+            if stream.status() != QDataStream.Status.Ok or not isinstance(format, QTextFormat):
+                raise DocumentModelError("Text formats are damaged")
+
+            model.formats.append(format)
+
+        position += formats_size
+
+        # blocks and runs
+
+        model.blocks.frombytes(data[position : position + blocks_size])
+        position += blocks_size
+
+        model.runs.frombytes(data[position : position + runs_size])
+        position += runs_size
+
+        # indexes are stored in little endian like the rest of the file
+        if sys.byteorder == "big":
+            model.blocks.byteswap()
+            model.runs.byteswap()
+
+        try:
+            model.text = str(data[position:], "utf-8")
+        except UnicodeDecodeError as error:
+            raise DocumentModelError("Text is damaged") from error
+
+        # checked before the document is changed
+        if (
+            block_count == 0
+            or max(model.blocks[0::3]) >= format_count
+            or max(model.blocks[1::3]) >= format_count
+            or sum(model.blocks[2::3]) != run_count
+            or (run_count > 0 and max(model.runs[0::2]) >= format_count)
+            or sum(model.runs[1::2]) != len(model.text)
+        ):
+            raise DocumentModelError("Text is damaged")
+
+        return model
+
+    def toBytes(self) -> bytes:
+        formats_data: QByteArray = QByteArray()
+
+        stream: QDataStream = QDataStream(formats_data, QIODevice.OpenModeFlag.WriteOnly)
+        stream.setVersion(QDataStream.Version.Qt_6_0)
+
+        for format in self.formats:
+            stream.writeQVariant(format)
+
+        header: bytes = self.HEADER.pack(
+            self.MAGIC,
+            self.VERSION,
+            formats_data.size(),
+            len(self.formats),
+            len(self.blocks) // 3,
+            len(self.runs) // 2,
+        )
+
+        blocks: array = self.blocks
+        runs: array = self.runs
+
+        if sys.byteorder == "big":
+            blocks = array("I", blocks)
+            runs = array("I", runs)
+            blocks.byteswap()
+            runs.byteswap()
+
+        return b"".join([header, formats_data.data(), blocks.tobytes(), runs.tobytes(), self.text.encode("utf-8")])
+
+    def blockCount(self) -> int:
+        return len(self.blocks) // 3
+
+    def insert(self, cursor: QTextCursor) -> None:
+        # first block takes formats of the block at the cursor, changes are reported to the layout once
+        cursor.beginEditBlock()
+
+        for _ in self.insertBlocks(cursor):
+            pass
+
+        cursor.endEditBlock()
+
+    def insertBlocks(self, cursor: QTextCursor) -> Iterator[int]:
+        # inserts blocks one by one at the cursor and yields the number of inserted blocks,
+        # so the document can be loaded in parts
+        block_formats: list[QTextBlockFormat] = [format.toBlockFormat() for format in self.formats]
+        char_formats: list[QTextCharFormat] = [format.toCharFormat() for format in self.formats]
+
+        blocks: array = self.blocks
+        runs: array = self.runs
+        text: str = self.text
+
+        position: int = 0
+        run: int = 0
+
+        for i in range(0, len(blocks), 3):
+            if i == 0:
+                cursor.setBlockFormat(block_formats[blocks[0]])
+                cursor.setBlockCharFormat(char_formats[blocks[1]])
+            else:
+                cursor.insertBlock(block_formats[blocks[i]], char_formats[blocks[i + 1]])
+
+            # images are object replacement characters with image format, they are inserted as text too
+            for j in range(run, run + 2 * blocks[i + 2], 2):
+                cursor.insertText(text[position : position + runs[j + 1]], char_formats[runs[j]])
+                position += runs[j + 1]
+
+            run += 2 * blocks[i + 2]
+
+            yield i // 3 + 1
@@ -0,0 +1,71 @@
+import json
+
+from core.editor.document_file import DocumentFile
+from core.editor.document_model import DocumentModel
+from core.editor.document_container import (
+    DocumentContainerError,
+    DocumentContainerReader,
+    Section,
+    SectionCodec,
+    SectionKind,
+)
+
+
+class DocumentReader:
+    # reads .vrt containers for the editor and for tools which change files without it.
+    # the editor skips damaged settings and images and keeps the rest of the document,
+    # strict reading raises on them, the file would lose them when it is written again
+
+    @classmethod
+    def readDocumentFile(
+        cls, filepath: str, errors: list[str] | None = None, is_strict: bool = False, is_mapped: bool = True
+    ) -> DocumentFile:
+        # errors of skipped sections are added to the list.
+        # mapped images keep the file open, so it can't be replaced on Windows while they are alive
+        file: DocumentFile = DocumentFile.default_file()
+
+        if errors is None:
+            errors = []
+
+        with DocumentContainerReader(filepath) as reader:
+            settings_section: Section | None = reader.section(SectionKind.Settings, "settings")
+            if settings_section is not None:
+                try:
+                    file.setSettings(json.loads(reader.readSection(settings_section)))
+                except DocumentContainerError as error:
+                    if is_strict:
+                        raise
+                    errors.append(str(error))
+                except ValueError as error:
+                    if is_strict:
+                        raise
+                    errors.append(f"Section {settings_section.name} is damaged: {error}")
+
+            # text is html in files saved before the document model
+            model_section: Section | None = reader.section(SectionKind.Text, "model")
+            text_section: Section | None = reader.section(SectionKind.Text, "text")
+
+            if model_section is not None:
+                file.text_model = DocumentModel.fromBytes(reader.readSection(model_section))
+            elif text_section is not None:
+                file.html_text = reader.readSection(text_section).decode("utf-8")
+            else:
+                raise DocumentContainerError("Text section is missing")
+
+            # images are decoded when they are painted first time
+            for image_section in reader.sections(SectionKind.Image):
+                try:
+                    if is_mapped:
+                        file.png_image[image_section.name] = reader.mapSection(image_section)
+
+                        # mapped bytes aren't read to verify them until the image is used
+                        if image_section.codec == SectionCodec.Raw:
+                            file.png_image_checksum[image_section.name] = image_section.checksum
+                    else:
+                        file.png_image[image_section.name] = reader.readSection(image_section)
+                except DocumentContainerError as error:
+                    if is_strict:
+                        raise
+                    errors.append(str(error))
+
+        return file
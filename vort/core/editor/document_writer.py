@@ -0,0 +1,104 @@
+import json
+import os
+
+from PySide6.QtCore import QObject, Signal, Slot, QByteArray, QBuffer, QIODevice
+from PySide6.QtGui import QImage
+
+from core.editor.document_file import DocumentFile
+from core.editor.document_container import DocumentContainerWriter, SectionCodec, SectionKind
+
+
+class DocumentWriter(QObject):
+    # writes snapshots of documents, it lives on its own thread, so encoding and compression don't block the editor.
+    # file is written next to the target and replaces it only when it is complete
+
+    progressChanged: Signal = Signal(str, int, int)  # filepath, written sections, all sections
+    written: Signal = Signal(str)  # filepath
+    failed: Signal = Signal(str, str)  # filepath, error
+
+    def __init__(self, parent: QObject | None = None) -> None:
+        super().__init__(parent)
+
+        # codec and level of sections of each kind, png is compressed already.
+        # lzma makes text a third smaller than zlib, but it is saved many times slower
+        self.__compression: dict[SectionKind, tuple[SectionCodec, int | None]] = {
+            SectionKind.Settings: (SectionCodec.Zlib, 6),
+            SectionKind.Text: (SectionCodec.Zlib, 6),
+            SectionKind.Image: (SectionCodec.Raw, None),
+        }
+
+    def compression(self, kind: SectionKind) -> tuple[SectionCodec, int | None]:
+        return self.__compression[kind]
+
+    def setCompression(self, kind: SectionKind, codec: SectionCodec, level: int | None = None) -> None:
+        # it is used by the next file written by writeDocumentFile on the same thread
+        self.__compression[kind] = (codec, level)
+
+    @Slot(str, object, object)
+    def write(
+        self, filepath: str, file: DocumentFile, compression: dict[SectionKind, tuple[SectionCodec, int | None]]
+    ) -> None:
+        # compression comes with the request, so the editor doesn't share it with this thread.
+        # every failure is reported, the editor waits for a result of every save
+        try:
+            self.writeDocumentFile(filepath, file, compression)
+            self.written.emit(filepath)
+
+        except Exception as error:
+            self.failed.emit(filepath, str(error))
+
+    def writeDocumentFile(
+        self,
+        filepath: str,
+        file: DocumentFile,
+        compression: dict[SectionKind, tuple[SectionCodec, int | None]] | None = None,
+    ) -> None:
+        # images of the open document are mapped from the file, so it is replaced, not rewritten
+        temp_filepath: str = f"{filepath}.tmp"
+
+        if compression is None:
+            compression = self.__compression
+
+        section_count: int = 2 + len(file.png_image)
+
+        try:
+            with DocumentContainerWriter(temp_filepath) as writer:
+                writer.addSection(
+                    SectionKind.Settings,
+                    "settings",
+                    json.dumps(file.settings()).encode("utf-8"),
+                    *compression[SectionKind.Settings],
+                )
+                self.progressChanged.emit(filepath, 1, section_count)
+
+                # model is converted here, so the editor only walks the document
+                if file.text_model is not None:
+                    writer.addSection(
+                        SectionKind.Text, "model", file.text_model.toBytes(), *compression[SectionKind.Text]
+                    )
+                else:
+                    writer.addSection(
+                        SectionKind.Text, "text", file.html_text.encode("utf-8"), *compression[SectionKind.Text]
+                    )
+                self.progressChanged.emit(filepath, 2, section_count)
+
+                for i, (name, image) in enumerate(file.png_image.items(), 3):
+                    image_bytes: bytes | memoryview = self.encodeImage(image) if isinstance(image, QImage) else image
+                    writer.addSection(SectionKind.Image, name, image_bytes, *compression[SectionKind.Image])
+                    self.progressChanged.emit(filepath, i, section_count)
+
+            os.replace(temp_filepath, filepath)
+
+        except Exception:
+            if os.path.exists(temp_filepath):
+                os.remove(temp_filepath)
+            raise
+
+    @classmethod
+    def encodeImage(cls, image: QImage) -> bytes:
+        bytes_array: QByteArray = QByteArray()
+        buffer: QBuffer = QBuffer(bytes_array)
+        buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+        image.save(buffer, "png")
+
+        return bytes_array.data()
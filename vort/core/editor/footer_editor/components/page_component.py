@@ -1,15 +1,13 @@
 from PySide6.QtCore import QObject, Signal
-from PySide6.QtGui import QTextCursor
 
 
 class PageComponent(QObject):
     applied: Signal = Signal()
+    pagesChanged: Signal = Signal()
 
-    def __init__(self, cursor: QTextCursor) -> None:
+    def __init__(self) -> None:
         super().__init__()
 
-        self.__cursor: QTextCursor = cursor
-
         self.__is_first_page_included: bool = False
         self.__page_count: int = 0
 
@@ -17,23 +15,15 @@ class PageComponent(QObject):
         return self.__page_count
 
     def addPage(self, count: int = 1) -> None:
+        # pages have no blocks, their text is laid out from the template of the document
         if count != 0:
-            for i in range(count):
-                self.__cursor.movePosition(QTextCursor.MoveOperation.End, QTextCursor.MoveMode.MoveAnchor)
-                self.__cursor.insertBlock()
-
             self.__page_count += count
-            self.applied.emit()
+            self.pagesChanged.emit()
 
     def removePage(self, count: int = 1) -> None:
         if count != 0:
-            for i in range(count):
-                self.__cursor.movePosition(QTextCursor.MoveOperation.End, QTextCursor.MoveMode.MoveAnchor)
-                self.__cursor.movePosition(QTextCursor.MoveOperation.PreviousBlock, QTextCursor.MoveMode.KeepAnchor)  # type: ignore
-                self.__cursor.deleteChar()
-
             self.__page_count -= count
-            self.applied.emit()
+            self.pagesChanged.emit()
 
     def isFirstPageIncluded(self) -> bool:
         return self.__is_first_page_included
@@ -21,6 +21,7 @@ class FooterEditor(QObject):
 
         self.__context.page_component.applied.connect(self.updateContent)
         self.__context.page_component.applied.connect(self.repaintRequest.emit)
+        self.__context.page_component.pagesChanged.connect(self.repaintRequest.emit)
 
         self.__context.pagination_component.paginationTurned.connect(self.onPaginationTurned)
         self.__context.pagination_component.applied.connect(self.updateContent)
@@ -35,26 +36,24 @@ class FooterEditor(QObject):
 
     @Slot()
     def updateContent(self) -> None:
-        for i in range(self.__context.page_component.pageCount()):
-            block = self.__context.document.findBlockByNumber(i)
+        # document is the template of all pages, page numbers are added by the layout
+        self.__context.cursor.beginEditBlock()
 
-            self.__context.cursor.setPosition(block.position())
-            self.__context.cursor.movePosition(QTextCursor.MoveOperation.EndOfBlock, QTextCursor.MoveMode.KeepAnchor)
+        self.__context.layout.setFirstPageIncluded(self.__context.page_component.isFirstPageIncluded())
+        self.__context.layout.setPaginationTurned(self.__context.pagination_component.isPaginationTurned())
+        self.__context.layout.setPaginationStartingNumber(self.__context.pagination_component.paginationStartingNumber())
 
-            if i == 0 and not self.__context.page_component.isFirstPageIncluded():
-                self.__context.cursor.insertText("")
+        self.__context.cursor.select(QTextCursor.SelectionType.Document)
 
-            elif self.__context.pagination_component.isPaginationTurned():
-                self.__context.cursor.insertText(str(self.__context.pagination_component.paginationStartingNumber() + i))  # type: ignore
-
-            elif self.__context.text_component.isTextTurned():
-                self.__context.cursor.insertText(self.__context.text_component.text())
-
-            else:
-                self.__context.cursor.insertText("")
+        if self.__context.text_component.isTextTurned() and not self.__context.pagination_component.isPaginationTurned():
+            self.__context.cursor.insertText(self.__context.text_component.text())
+        else:
+            self.__context.cursor.insertText("")
 
         self.__context.formatting_component.formatDocument()
 
+        self.__context.cursor.endEditBlock()
+
     @Slot(int)
     def onPageCountChanged(self, count: int) -> None:
         difference = count - self.__context.page_component.pageCount()
@@ -19,6 +19,6 @@ class HeaderDocumentContext:
         self.cursor: QTextCursor = cursor
 
         self.formatting_component: FormattingComponent = FormattingComponent(self.cursor)
-        self.page_component: PageComponent = PageComponent(self.cursor)
+        self.page_component: PageComponent = PageComponent()
         self.pagination_component: PaginationComponent = PaginationComponent()
         self.text_component: TextComponent = TextComponent()
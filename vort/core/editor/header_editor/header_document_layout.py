@@ -7,6 +7,7 @@ from PySide6.QtGui import (
     QTextLine,
     QPainter,
     QTextBlockFormat,
+    QTextCharFormat,
 )
 
 from core.editor.page_layout.page_layout import PageLayout
@@ -14,77 +15,152 @@ from core.editor.document_paint_context import DocumentPaintContext
 
 
 class HeaderDocumentLayout(QAbstractTextDocumentLayout):
+    # header is the same on every page except for the page number,
+    # so the document keeps one template block with the text and formats of the header,
+    # and the text of every page is laid out once for all pages with the same text
+
     pageCountChanged: Signal = Signal(int)
 
+    # laid out page texts, page numbers of visible pages are only a few
+    MAX_CACHED_LAYOUT_COUNT: int = 256
+
     def __init__(self, document: QTextDocument, page_layout: PageLayout) -> None:
         super().__init__(document)
 
         self.__page_layout: PageLayout = page_layout
 
+        self.__is_first_page_included: bool = False
+        self.__is_pagination_turned: bool = False
+        self.__pagination_starting_number: int = 0
+
+        self.__layouts: dict[str, QTextLayout] = {}
+
         self.__page_layout.pageCountChanged.connect(self.pageCountChanged.emit)
         self.__page_layout.internalChanged.connect(self.onPageLayoutInternalChanged)
 
     def pageCount(self) -> int:
         return self.__page_layout.pageCount()
 
+    def isFirstPageIncluded(self) -> bool:
+        return self.__is_first_page_included
+
+    def setFirstPageIncluded(self, is_included: bool) -> None:
+        self.__is_first_page_included = is_included
+
+    def isPaginationTurned(self) -> bool:
+        return self.__is_pagination_turned
+
+    def setPaginationTurned(self, is_turned: bool) -> None:
+        self.__is_pagination_turned = is_turned
+
+    def paginationStartingNumber(self) -> int:
+        return self.__pagination_starting_number
+
+    def setPaginationStartingNumber(self, number: int) -> None:
+        self.__pagination_starting_number = number
+
+    def pageText(self, index: int) -> str:
+        if index == 0 and not self.__is_first_page_included:
+            return ""
+
+        elif self.__is_pagination_turned:
+            return str(self.__pagination_starting_number + index)
+
+        return self.document().firstBlock().text()
+
     def documentChanged(self, from_: int, charsRemoved: int, charsAdded: int) -> None:
-        for i in range(self.document().blockCount() - 1):
-            block: QTextBlock = self.document().findBlockByNumber(i)
-            block_format: QTextBlockFormat = block.blockFormat()
-            block_layout: QTextLayout = block.layout()
+        # text or formats of the template are changed
+        self.relayout()
+
+    def relayout(self) -> None:
+        # page texts are laid out again when they are painted
+        self.__layouts.clear()
+        self.update.emit()
 
-            block_layout.beginLayout()
-            line: QTextLine = block_layout.createLine()
+    def pageTextLayout(self, text: str) -> QTextLayout:
+        text_layout: QTextLayout | None = self.__layouts.get(text)
+        if text_layout is not None:
+            return text_layout
 
-            while line.isValid():
-                line.setLineWidth(self.__page_layout.textWidth())
-                line_rect: QRectF = line.naturalTextRect()
+        if len(self.__layouts) >= self.MAX_CACHED_LAYOUT_COUNT:
+            self.__layouts.clear()
 
-                line_x: float = self.__page_layout.headerXPosition(i)
-                line_y: float = self.__page_layout.headerYPosition(i)
+        block: QTextBlock = self.document().firstBlock()
+        block_format: QTextBlockFormat = block.blockFormat()
+        char_format: QTextCharFormat = block.charFormat()
 
-                # change x position
-                if Qt.AlignmentFlag.AlignLeft in block_format.alignment():
-                    line_x += 0
+        format_range: QTextLayout.FormatRange = QTextLayout.FormatRange()
+        format_range.start = 0
+        format_range.length = len(text)
+        format_range.format = char_format
 
-                elif Qt.AlignmentFlag.AlignHCenter in block_format.alignment():
-                    line_x += (self.__page_layout.textWidth() - line_rect.width()) / 2
+        text_layout = QTextLayout(text, self.document().defaultFont())
+        text_layout.setTextOption(self.document().defaultTextOption())
+        text_layout.setFormats([format_range])
+        text_layout.setCacheEnabled(True)
 
-                elif Qt.AlignmentFlag.AlignRight in block_format.alignment():
-                    line_x += self.__page_layout.textWidth() - line_rect.width()
+        # lines are positioned relative to the top left corner of the header
+        text_layout.beginLayout()
+        line: QTextLine = text_layout.createLine()
 
-                # change y position
-                if Qt.AlignmentFlag.AlignTop in block_format.alignment():
-                    line_y += 0
+        while line.isValid():
+            line.setLineWidth(self.__page_layout.textWidth())
+            line_rect: QRectF = line.naturalTextRect()
 
-                elif Qt.AlignmentFlag.AlignVCenter in block_format.alignment():
-                    line_y += (self.__page_layout.headerHeight() - line_rect.height()) / 2
+            line_x: float = 0
+            line_y: float = 0
 
-                elif Qt.AlignmentFlag.AlignBottom in block_format.alignment():
-                    line_y += self.__page_layout.headerHeight() - line_rect.height()
+            # change x position
+            if Qt.AlignmentFlag.AlignLeft in block_format.alignment():
+                line_x += 0
 
-                line.setLineWidth(line_rect.width())
-                line.setPosition(QPointF(line_x, line_y))
+            elif Qt.AlignmentFlag.AlignHCenter in block_format.alignment():
+                line_x += (self.__page_layout.textWidth() - line_rect.width()) / 2
 
-                line = block_layout.createLine()
+            elif Qt.AlignmentFlag.AlignRight in block_format.alignment():
+                line_x += self.__page_layout.textWidth() - line_rect.width()
 
-            block_layout.endLayout()
+            # change y position
+            if Qt.AlignmentFlag.AlignTop in block_format.alignment():
+                line_y += 0
 
-        self.update.emit()
+            elif Qt.AlignmentFlag.AlignVCenter in block_format.alignment():
+                line_y += (self.__page_layout.headerHeight() - line_rect.height()) / 2
+
+            elif Qt.AlignmentFlag.AlignBottom in block_format.alignment():
+                line_y += self.__page_layout.headerHeight() - line_rect.height()
+
+            line.setLineWidth(line_rect.width())
+            line.setPosition(QPointF(line_x, line_y))
+
+            line = text_layout.createLine()
+
+        text_layout.endLayout()
+
+        self.__layouts[text] = text_layout
+
+        return text_layout
 
     def blockBoundingRect(self, block: QTextBlock) -> QRectF:
-        return block.layout().boundingRect()
+        return QRectF()
 
     def paint(self, context: DocumentPaintContext):
         painter: QPainter = context.painter
         rect: QRectF = context.rect
 
-        for i in range(self.document().blockCount() - 1):
-            block: QTextBlock = self.document().findBlockByNumber(i)
-            block_layout: QTextLayout = block.layout()
+        # paint only pages which intersect the rect
+        for i in self.__page_layout.findPages(rect.top(), rect.bottom()):
+            text: str = self.pageText(i)
+            if text == "":
+                continue
 
-            block_layout.draw(painter, QPointF(0, 0), [], rect)
+            self.pageTextLayout(text).draw(
+                painter,
+                QPointF(self.__page_layout.headerXPosition(i), self.__page_layout.headerYPosition(i)),
+                [],
+                rect,
+            )
 
     @Slot()
     def onPageLayoutInternalChanged(self) -> None:
-        self.documentChanged(0, 0, 0)
+        self.relayout()
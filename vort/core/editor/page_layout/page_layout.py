@@ -86,6 +86,18 @@ class PageLayout(QObject):
     def pageYPosition(self, index: int) -> float:
         return (self.__page_height + self.__page_spacing) * index
 
+    def findPages(self, top: float, bottom: float) -> range:
+        # pages which intersect the range from top to bottom,
+        # override it with pageXPosition and pageYPosition methods
+        step: float = self.__page_height + self.__page_spacing
+        if step <= 0:
+            return range(self.__page_count)
+
+        first: int = max(0, int(top // step))
+        last: int = min(self.__page_count - 1, int(bottom // step))
+
+        return range(first, last + 1)
+
     def pageColor(self) -> QColor:
         return self.__page_color
 
@@ -0,0 +1,141 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Self
+
+
+class LayoutState:
+    # layout position between blocks
+
+    def __init__(self) -> None:
+        self.root_x: float = 0.0
+        self.root_y: float = 0.0
+        self.remaining_text_height: float = 0.0
+        self.page_count: int = 1
+
+    def copy(self) -> Self:
+        state: Self = type(self)()
+        state.root_x = self.root_x
+        state.root_y = self.root_y
+        state.remaining_text_height = self.remaining_text_height
+        state.page_count = self.page_count
+        return state
+
+    def isEqual(self, other: Self) -> bool:
+        # exact comparison, lines are positioned in fixed point,
+        # so even a tiny difference may move them
+        return (
+            self.page_count == other.page_count
+            and self.root_x == other.root_x
+            and self.root_y == other.root_y
+            and self.remaining_text_height == other.remaining_text_height
+        )
+
+
+class BlockLayoutCache:
+    # compact layout records of blocks, item i of every array belongs to block i
+    #
+    # blocks go one after another from page to page,
+    # so tops and bottoms are sorted and can be searched by bisect
+
+    def __init__(self) -> None:
+        self.page_indexes: array = array("i")
+        self.tops: array = array("d")
+        self.bottoms: array = array("d")
+        self.line_counts: array = array("i")
+        self.character_counts: array = array("i")
+        self.image_flags: array = array("b")
+
+        # lines of the block, bottoms go down and ends are cumulative text positions in the block
+        self.line_bottoms: list[array] = []
+        self.line_ends: list[array] = []
+
+        # layout state after the block
+        self.root_xs: array = array("d")
+        self.root_ys: array = array("d")
+        self.remaining_text_heights: array = array("d")
+        self.page_counts: array = array("i")
+
+    def blockCount(self) -> int:
+        return len(self.tops)
+
+    def clear(self) -> None:
+        self.replace(0, self.blockCount() - 1, 0)
+
+    def replace(self, first: int, last: int, count: int) -> None:
+        # replace records of blocks from first to last with count empty records
+
+        self.page_indexes[first : last + 1] = array("i", [0]) * count
+        self.tops[first : last + 1] = array("d", [0.0]) * count
+        self.bottoms[first : last + 1] = array("d", [0.0]) * count
+        self.line_counts[first : last + 1] = array("i", [0]) * count
+        self.character_counts[first : last + 1] = array("i", [0]) * count
+        self.image_flags[first : last + 1] = array("b", [0]) * count
+
+        self.line_bottoms[first : last + 1] = [array("d") for _ in range(count)]
+        self.line_ends[first : last + 1] = [array("i") for _ in range(count)]
+
+        self.root_xs[first : last + 1] = array("d", [0.0]) * count
+        self.root_ys[first : last + 1] = array("d", [0.0]) * count
+        self.remaining_text_heights[first : last + 1] = array("d", [0.0]) * count
+        self.page_counts[first : last + 1] = array("i", [0]) * count
+
+    def setBlock(
+        self,
+        index: int,
+        page_index: int,
+        top: float,
+        bottom: float,
+        line_count: int,
+        character_count: int,
+        is_image: bool,
+    ) -> None:
+        self.page_indexes[index] = page_index
+        self.tops[index] = top
+        self.bottoms[index] = bottom
+        self.line_counts[index] = line_count
+        self.character_counts[index] = character_count
+        self.image_flags[index] = is_image
+
+    def setLines(self, index: int, line_bottoms: array, line_ends: array) -> None:
+        self.line_bottoms[index] = line_bottoms
+        self.line_ends[index] = line_ends
+
+    def state(self, index: int) -> LayoutState:
+        state: LayoutState = LayoutState()
+        state.root_x = self.root_xs[index]
+        state.root_y = self.root_ys[index]
+        state.remaining_text_height = self.remaining_text_heights[index]
+        state.page_count = self.page_counts[index]
+        return state
+
+    def setState(self, index: int, state: LayoutState) -> None:
+        self.root_xs[index] = state.root_x
+        self.root_ys[index] = state.root_y
+        self.remaining_text_heights[index] = state.remaining_text_height
+        self.page_counts[index] = state.page_count
+
+    def isImage(self, index: int) -> bool:
+        return bool(self.image_flags[index])
+
+    def characterCount(self, first: int = 0, last: int = -1) -> int:
+        if last == -1:
+            last = self.blockCount() - 1
+
+        return sum(self.character_counts[first : last + 1])
+
+    def findBlock(self, y: float) -> int:
+        # first block which bottom isn't above y
+        return bisect_left(self.bottoms, y)
+
+    def findBlocks(self, top: float, bottom: float) -> range:
+        # blocks which intersect the range from top to bottom
+        return range(bisect_left(self.bottoms, top), bisect_right(self.tops, bottom))
+
+    def findLine(self, index: int, y: float) -> int:
+        # first line of the block which bottom isn't above y
+        return bisect_left(self.line_bottoms[index], y)
+
+    def findLineByPosition(self, index: int, position: int) -> int:
+        # first line of the block which ends after the position in the block,
+        # the end of the last line belongs to the last line
+        return min(bisect_right(self.line_ends[index], position), self.line_counts[index] - 1)
@@ -1,6 +1,4 @@
-import hashlib
-
-from PySide6.QtCore import Signal, QObject, QMimeData, QByteArray, QBuffer, QIODevice
+from PySide6.QtCore import Signal, QObject, Slot, QMimeData
 from PySide6.QtGui import (
     QTextDocument,
     QTextCursor,
@@ -24,10 +22,18 @@ class ClipboardComponent(QObject):
         super().__init__()
         self.__cursor: QTextCursor = cursor
 
+        # range changed since the last fixup, e.g. by undo or loading, it is fixed up with the next edit
+        self.__change_start: int = -1
+        self.__change_end: int = -1
+
+        self.__cursor.document().contentsChange.connect(self.onContentsChange)
+
     def cut(self) -> None:
         if self.__cursor.hasSelection():
             self.__cursor.beginEditBlock()
 
+            selection_start = self.__cursor.selectionStart()
+
             selection: QTextDocumentFragment = self.__cursor.selection()
             mime_data: QMimeData = QMimeData()
             mime_data.setHtml(selection.toHtml())
@@ -39,7 +45,7 @@ class ClipboardComponent(QObject):
             if self.__cursor.atBlockStart() and not self.__cursor.charFormat().isImageFormat():
                 self.__cursor.setBlockCharFormat(self.__cursor.charFormat())
 
-            self.fixupImage()
+            self.fixupImage(selection_start)
             self.__cursor.endEditBlock()
 
             self.repaintRequest.emit()
@@ -86,7 +92,7 @@ class ClipboardComponent(QObject):
             block_char_format.setAnchor(False)
             self.__cursor.mergeBlockCharFormat(block_char_format)
 
-        self.fixupImage()
+        self.fixupImage(selection_start)
         self.__cursor.endEditBlock()
 
         self.repaintRequest.emit()
@@ -119,7 +125,7 @@ class ClipboardComponent(QObject):
             block_char_format.setAnchor(False)
             self.__cursor.mergeBlockCharFormat(block_char_format)
 
-        self.fixupImage()
+        self.fixupImage(selection_start)
         self.__cursor.endEditBlock()
 
         self.repaintRequest.emit()
@@ -147,15 +153,8 @@ class ClipboardComponent(QObject):
 
         image: QImage = QImage(mime_data.imageData())
 
-        bytes_array: QByteArray = QByteArray()
-        buffer: QBuffer = QBuffer(bytes_array)
-        buffer.open(QIODevice.OpenModeFlag.WriteOnly)
-        image.save(buffer, "png")
-        image_bytes: bytes = bytes_array.data()
-
-        name: str = f"pasted_image_{hashlib.sha256(image_bytes).hexdigest()}"
-
-        self.__cursor.document().addResource(QTextDocument.ResourceType.ImageResource, name, image)
+        # encoded bytes are kept, so the image isn't encoded again on save
+        name: str = self.__cursor.document().imageStore().insertImage(image)
 
         image_format: QTextImageFormat = QTextImageFormat()
         image_format.setWidth(image.width())
@@ -166,7 +165,7 @@ class ClipboardComponent(QObject):
 
         self.__cursor.insertImage(image_format)
 
-        self.fixupImage()
+        self.fixupImage(selection_start)
 
         helper: QTextCursor = QTextCursor(self.__cursor.document())
         if self.__cursor.position() > 1:
@@ -200,15 +199,10 @@ class ClipboardComponent(QObject):
 
         self.__cursor.beginEditBlock()
 
-        bytes_array: QByteArray = QByteArray()
-        buffer: QBuffer = QBuffer(bytes_array)
-        buffer.open(QIODevice.OpenModeFlag.WriteOnly)
-        image.save(buffer, "png")
-        image_bytes: bytes = bytes_array.data()
-
-        name: str = f"pasted_image_{hashlib.sha256(image_bytes).hexdigest()}"
+        selection_start = self.__cursor.selectionStart()
 
-        self.__cursor.document().addResource(QTextDocument.ResourceType.ImageResource, name, image)
+        # encoded bytes are kept, so the image isn't encoded again on save
+        name: str = self.__cursor.document().imageStore().insertImage(image)
 
         image_format: QTextImageFormat = QTextImageFormat()
         image_format.setWidth(image.width())
@@ -219,7 +213,7 @@ class ClipboardComponent(QObject):
 
         self.__cursor.insertImage(image_format)
 
-        self.fixupImage()
+        self.fixupImage(selection_start)
         self.__cursor.endEditBlock()
 
         self.repaintRequest.emit()
@@ -230,13 +224,15 @@ class ClipboardComponent(QObject):
 
         self.__cursor.beginEditBlock()
 
+        selection_start = self.__cursor.selectionStart()
+
         format = self.__cursor.charFormat()
         format.setAnchorHref(hyperlink)
         format.setAnchor(True)
 
         self.__cursor.insertText(text, format)
 
-        self.fixupImage()
+        self.fixupImage(selection_start)
         self.__cursor.endEditBlock()
 
         self.repaintRequest.emit()
@@ -354,13 +350,27 @@ class ClipboardComponent(QObject):
 
         return document.toPlainText()
 
-    def fixupImage(self) -> None:
+    def fixupImage(self, position: int) -> None:
+        # position is where the edit started, blocks between it and the cursor are fixed up
+        # together with blocks changed since the last fixup,
+        # contentsChange of the current edit comes only after its edit block
+
         # position, is_pref_empty, is_pref_alpha, is_pref_img, is_suff_alpha
         images: list[tuple[int, bool, bool, bool, bool]] = []
 
-        for i in range(self.__cursor.document().blockCount()):
-            block: QTextBlock = self.__cursor.document().findBlockByNumber(i)
+        first_position: int = min(position, self.__cursor.position())
+        last_position: int = max(position, self.__cursor.position())
+
+        if self.__change_start != -1:
+            first_position = min(first_position, self.__change_start)
+            last_position = max(last_position, self.__change_end)
+
+        end_position: int = self.__cursor.document().characterCount() - 1
 
+        block: QTextBlock = self.__cursor.document().findBlock(max(0, min(first_position, end_position)))
+        last_block: QTextBlock = self.__cursor.document().findBlock(max(0, min(last_position, end_position)))
+
+        while block.isValid() and block.blockNumber() <= last_block.blockNumber():
             it: QTextBlock.iterator = block.begin()
             while it != block.end():
                 frag: QTextFragment = it.fragment()
@@ -400,6 +410,8 @@ class ClipboardComponent(QObject):
 
                 it += 1
 
+            block = block.next()
+
         helper: QTextCursor = QTextCursor(self.__cursor.document())
 
         is_case_4 = False
@@ -443,5 +455,22 @@ class ClipboardComponent(QObject):
 
             helper.endEditBlock()
 
+        self.__change_start = -1
+        self.__change_end = -1
+
         if is_case_4:
             self.__cursor.setPosition(self.__cursor.position() - 1)
+
+    @Slot(int, int, int)
+    def onContentsChange(self, from_: int, charsRemoved: int, charsAdded: int) -> None:
+        # unite the change with the previous ones, moving their end by the change
+        if self.__change_start == -1:
+            self.__change_start = from_
+            self.__change_end = from_ + charsAdded
+            return
+
+        if self.__change_end >= from_ + charsRemoved:
+            self.__change_end += charsAdded - charsRemoved
+
+        self.__change_start = min(self.__change_start, from_)
+        self.__change_end = max(self.__change_end, from_ + charsAdded)
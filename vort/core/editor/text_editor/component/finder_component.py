@@ -1,20 +1,38 @@
+import re
+import time
+from array import array
+from bisect import bisect_left
+
 from PySide6.QtCore import (
     Signal,
+    Slot,
     QRegularExpression,
     QRegularExpressionMatch,
-    QRegularExpressionMatchIterator,
+    QTimer,
+    QRectF,
+    QThread,
+    QCoreApplication,
+    QEventLoop,
 )
-from PySide6.QtGui import QTextDocument, QTextCursor, QSyntaxHighlighter, QTextCharFormat, QColor
+from PySide6.QtGui import QTextCursor, QSyntaxHighlighter, QTextCharFormat, QColor, QTextBlock, QTextDocument
+
+from core.editor.text_editor.match_table import MatchTable
+from core.editor.text_editor.text_document_layout import TextDocumentLayout
+from core.editor.text_editor.text_searcher import TextSearcher
 
 
 class FinderComponent(QSyntaxHighlighter):
     repaintRequest: Signal = Signal()
     updateUIRequest: Signal = Signal()
 
-    def __init__(self, cursor: QTextCursor) -> None:
-        super().__init__(cursor.document())
+    # captured group or escaped backslash in the replacement of the regex
+    REFERENCE: re.Pattern = re.compile(r"\\(\d{1,2}|\\)")
+
+    def __init__(self, cursor: QTextCursor, document_layout: TextDocumentLayout) -> None:
+        super().__init__(None)
 
         self.__cursor: QTextCursor = cursor
+        self.__document_layout: TextDocumentLayout = document_layout
 
         self.__find_data: str = ""
 
@@ -27,6 +45,47 @@ class FinderComponent(QSyntaxHighlighter):
         self.__expr: QRegularExpression = QRegularExpression()
         self.__exact_expr: QRegularExpression = QRegularExpression()
 
+        # matches of the expression, highlighting and navigation read them instead of searching the text
+        self.__match_table: MatchTable = MatchTable()
+
+        # the table is filled by a search of a snapshot of the text on another thread,
+        # changes of the document after the snapshot move its matches
+        self.__searcher: TextSearcher = TextSearcher()
+        self.__search: int = 0
+        self.__is_searching: bool = False
+        self.__search_changes: list[tuple[int, int, int]] = []
+
+        self.__searcher.matchesFound.connect(self.onMatchesFound)
+        self.__searcher.searchFinished.connect(self.onSearchFinished)
+        QCoreApplication.instance().aboutToQuit.connect(self.__searcher.stop)
+
+        # the text is searched when the pattern stops changing
+        self.__expr_timer: QTimer = QTimer(self)
+        self.__expr_timer.setSingleShot(True)
+        self.__expr_timer.setInterval(150)
+        self.__expr_timer.timeout.connect(self.applyExpr)
+
+        self.__is_find_pending: bool = False
+        self.__is_find_previous_pending: bool = False
+
+        # blocks of matches which highlighting is out of date, by positions of the matches.
+        # visible blocks are highlighted at once, the others in idle time
+        self.__highlight_positions: array = array("q")
+        self.__highlight_slice_time: float = 0.01
+        self.__visible_rect: QRectF = QRectF()
+
+        self.__highlight_timer: QTimer = QTimer(self)
+        self.__highlight_timer.setInterval(0)
+        self.__highlight_timer.timeout.connect(self.highlightNextSlice)
+
+        # the table is patched before the highlighter formats changed blocks,
+        # so it is connected before the document is set.
+        # the document owns the highlighter like when it is passed to the constructor,
+        # otherwise the garbage collector deletes it and it rehighlights a document which is being deleted
+        self.__cursor.document().contentsChange.connect(self.onContentsChange)
+        self.setParent(self.__cursor.document())
+        self.setDocument(self.__cursor.document())
+
     def isRegexTurned(self) -> bool:
         return self.__is_regex_turned
 
@@ -48,24 +107,44 @@ class FinderComponent(QSyntaxHighlighter):
         self.__is_whole_turned = is_turned
         self.updateExpr()
 
+    def matchCount(self) -> int:
+        return self.__match_table.matchCount()
+
     def find(self, find_data: str) -> None:
         self.__find_data = find_data
         self.updateExpr()
 
-        options: QTextDocument.FindFlag = QTextDocument.FindFlag(0)
-        if self.__is_case_turned:
-            options |= QTextDocument.FindFlag.FindCaseSensitively
+        # next match is selected when the new pattern is applied and its matches are found
+        if self.__expr_timer.isActive() or self.__is_searching:
+            self.__is_find_pending = True
+            self.__is_find_previous_pending = False
+            return
+
+        index: int = self.__match_table.findNext(self.__cursor.selectionEnd())
+        if index == -1:
+            index = self.__match_table.findNext(0)
+
+        self.selectMatch(index)
+
+    def findPrevious(self, find_data: str) -> None:
+        self.__find_data = find_data
+        self.updateExpr()
+
+        if self.__expr_timer.isActive() or self.__is_searching:
+            self.__is_find_pending = True
+            self.__is_find_previous_pending = True
+            return
 
-        if self.__is_whole_turned:
-            options |= QTextDocument.FindFlag.FindWholeWords
+        index: int = self.__match_table.findPrevious(self.__cursor.selectionStart())
+        if index == -1:
+            index = self.__match_table.matchCount() - 1
 
-        helper: QTextCursor = self.__cursor.document().find(self.__expr, self.__cursor, options)
-        if helper.position() == -1:
-            helper = self.__cursor.document().find(self.__expr, 0, options)
+        self.selectMatch(index)
 
-        if helper.position() != -1:
-            self.__cursor.setPosition(helper.selectionStart())
-            self.__cursor.setPosition(helper.selectionEnd(), QTextCursor.MoveMode.KeepAnchor)
+    def selectMatch(self, index: int) -> None:
+        if index != -1:
+            self.__cursor.setPosition(self.__match_table.starts[index])
+            self.__cursor.setPosition(self.__match_table.ends[index], QTextCursor.MoveMode.KeepAnchor)
         else:
             self.__cursor.clearSelection()
 
@@ -73,71 +152,280 @@ class FinderComponent(QSyntaxHighlighter):
         self.updateUIRequest.emit()
 
     def replace(self, replace_data: str) -> None:
+        self.applyExpr()
+
         helper: QTextCursor = QTextCursor(self.__cursor.document())
 
-        if self.__exact_expr.match(self.__cursor.selectedText()).hasMatch():
+        match: QRegularExpressionMatch = self.__exact_expr.match(self.__cursor.selectedText())
+        if match.hasMatch():
             helper.setPosition(self.__cursor.selectionStart())
             helper.setPosition(self.__cursor.selectionEnd(), QTextCursor.MoveMode.KeepAnchor)
-            helper.insertText(replace_data)
+            helper.insertText(self.expandReplacement(match, replace_data) if self.__is_regex_turned else replace_data)
 
         else:
             self.find(self.__find_data)
 
         self.repaintRequest.emit()
 
-    def replaceAll(self, replace_data: str) -> None:
-        self.__cursor.beginEditBlock()
+    def replaceAll(self, replace_data: str) -> int:
+        # matches of the table are replaced from the last one, so positions of the others don't move.
+        # the document reports the edit block as one change, so the table is patched once
+        self.waitForSearch()
 
-        options: QTextDocument.FindFlag = QTextDocument.FindFlag(0)
-        if self.__is_case_turned:
-            options |= QTextDocument.FindFlag.FindCaseSensitively
+        replacements: list[str] = self.replacements(replace_data)
 
-        if self.__is_whole_turned:
-            options |= QTextDocument.FindFlag.FindWholeWords
-
-        helper: QTextCursor = self.__cursor.document().find(self.__expr, self.__cursor, options)
-        if helper.position() == -1:
-            helper = self.__cursor.document().find(self.__expr, 0, options)
+        helper: QTextCursor = QTextCursor(self.__cursor.document())
 
-        while helper.position() != -1:
-            helper.insertText(replace_data)
+        self.__cursor.beginEditBlock()
 
-            helper = self.__cursor.document().find(self.__expr, self.__cursor, options)
-            if helper.position() == -1:
-                helper = self.__cursor.document().find(self.__expr, 0, options)
+        for i in range(len(replacements) - 1, -1, -1):
+            helper.setPosition(self.__match_table.starts[i])
+            helper.setPosition(self.__match_table.ends[i], QTextCursor.MoveMode.KeepAnchor)
+            helper.insertText(replacements[i])
 
         self.__cursor.endEditBlock()
 
         self.repaintRequest.emit()
 
+        return len(replacements)
+
+    def replacements(self, replace_data: str) -> list[str]:
+        # replacement of every match of the table
+        if not self.__is_regex_turned or FinderComponent.REFERENCE.search(replace_data) is None:
+            return [replace_data] * self.__match_table.matchCount()
+
+        # captured groups are taken by matching the expression again at every match
+        replacements: list[str] = []
+
+        block: QTextBlock = QTextBlock()
+        text: str = ""
+
+        for start in self.__match_table.starts:
+            if not block.isValid() or start >= block.position() + block.length():
+                block = self.__cursor.document().findBlock(start)
+                text = block.text().replace("\u00a0", " ")
+
+            match: QRegularExpressionMatch = self.__expr.match(text, start - block.position())
+            replacements.append(self.expandReplacement(match, replace_data))
+
+        return replacements
+
+    @staticmethod
+    def expandReplacement(match: QRegularExpressionMatch, replace_data: str) -> str:
+        # \1 ... \99 are captured groups and \\ is a backslash, like in QString::replace
+        def group(reference: re.Match) -> str:
+            if reference.group(1) == "\\":
+                return "\\"
+
+            return match.captured(int(reference.group(1)))
+
+        return FinderComponent.REFERENCE.sub(group, replace_data)
+
     def highlightBlock(self, text: str) -> None:
         char_format: QTextCharFormat = QTextCharFormat()
         char_format.setBackground(self.__background_color)
 
-        if self.__expr.isValid():
-            it: QRegularExpressionMatchIterator = self.__expr.globalMatch(text)
-            while it.hasNext():
-                match: QRegularExpressionMatch = it.next()
-                self.setFormat(match.capturedStart(), match.capturedLength(), char_format)
+        # positions are in utf-16 units like the length of the block, the text may have fewer characters
+        position: int = self.currentBlock().position()
 
-    def updateExpr(self) -> None:
-        pattern: str = self.__find_data
+        for i in self.__match_table.findMatches(position, position + self.currentBlock().length() - 1):
+            start: int = self.__match_table.starts[i]
+            self.setFormat(start - position, self.__match_table.ends[i] - start, char_format)
+
+    def exprPattern(self) -> tuple[str, QRegularExpression.PatternOption]:
+        return self.findPattern(self.__find_data, self.__is_regex_turned, self.__is_case_turned, self.__is_whole_turned)
 
-        if not self.__is_regex_turned:
+    @staticmethod
+    def findPattern(
+        find_data: str, is_regex_turned: bool, is_case_turned: bool, is_whole_turned: bool
+    ) -> tuple[str, QRegularExpression.PatternOption]:
+        # pattern and options of the finder, files are searched without the editor with the same ones
+        pattern: str = find_data
+
+        if not is_regex_turned:
             pattern = QRegularExpression.escape(pattern)
 
-        if self.__is_whole_turned:
+        if is_whole_turned:
             pattern = "\\b" + pattern + "\\b"
 
-        self.__expr.setPattern(pattern)
-        self.__exact_expr.setPattern(QRegularExpression.anchoredPattern(pattern))
-
         options: QRegularExpression.PatternOption = QRegularExpression.PatternOption.NoPatternOption
-        if not self.__is_case_turned:
+        if not is_case_turned:
             options |= QRegularExpression.PatternOption.CaseInsensitiveOption
 
-        self.__expr.setPatternOptions(options)
-        self.__exact_expr.setPatternOptions(self.__exact_expr.patternOptions() | options)
+        return pattern, options
 
-        self.rehighlight()
-        self.repaintRequest.emit()
+    def updateExpr(self) -> None:
+        # every change of the pattern restarts the delay, so typing doesn't search the text on each key
+        pattern, options = self.exprPattern()
+
+        if pattern == self.__expr.pattern() and options == self.__expr.patternOptions():
+            self.__expr_timer.stop()
+            self.__is_find_pending = False
+        else:
+            self.__expr_timer.start()
+
+    @Slot()
+    def applyExpr(self) -> None:
+        self.__expr_timer.stop()
+
+        pattern, options = self.exprPattern()
+
+        if pattern != self.__expr.pattern() or options != self.__expr.patternOptions():
+            self.__expr.setPattern(pattern)
+            self.__exact_expr.setPattern(QRegularExpression.anchoredPattern(pattern))
+
+            self.__expr.setPatternOptions(options)
+            self.__exact_expr.setPatternOptions(self.__exact_expr.patternOptions() | options)
+
+            # blocks of the old matches lose highlighting and blocks of the new ones get it,
+            # blocks which are still waiting for the previous pattern are kept
+            positions: list[int] = [*self.__highlight_positions, *self.__match_table.starts]
+            self.__highlight_positions = array("q", sorted(positions))
+
+            self.__match_table.clear()
+            self.startSearch()
+
+            self.highlightVisibleBlocks()
+            if len(self.__highlight_positions) > 0:
+                self.__highlight_timer.start()
+
+            self.repaintRequest.emit()
+
+        if self.__is_find_pending and not self.__is_searching:
+            self.__is_find_pending = False
+
+            if self.__is_find_previous_pending:
+                self.findPrevious(self.__find_data)
+            else:
+                self.find(self.__find_data)
+
+    def startSearch(self) -> None:
+        # the previous search is cancelled by the new one
+        if self.__expr.pattern() == "" or not self.__expr.isValid():
+            self.__searcher.cancel()
+            self.__is_searching = False
+            return
+
+        self.__search_changes = []
+        self.__search = self.__searcher.search(self.__cursor.document().toRawText(), self.__expr)
+        self.__is_searching = True
+
+    def isSearching(self) -> bool:
+        return self.__is_searching
+
+    def waitForSearch(self) -> None:
+        # matches come through the event loop
+        self.applyExpr()
+
+        while self.__is_searching:
+            QCoreApplication.processEvents(QEventLoop.ProcessEventsFlag.ExcludeUserInputEvents)
+            QThread.msleep(1)
+
+    @Slot(int, object, object)
+    def onMatchesFound(self, search: int, starts: array, ends: array) -> None:
+        if search != self.__search:
+            return
+
+        starts, ends = MatchTable.mapMatches(starts, ends, self.__search_changes)
+        if len(starts) == 0:
+            return
+
+        self.__match_table.insert(starts, ends)
+
+        positions: array = self.__highlight_positions
+        first: int = bisect_left(positions, starts[0])
+        last: int = bisect_left(positions, starts[-1] + 1)
+        positions[first:last] = array("q", sorted([*positions[first:last], *starts]))
+
+        self.highlightVisibleBlocks()
+        self.__highlight_timer.start()
+
+        # next match may be found before the search is finished
+        if self.__is_find_pending and not self.__is_find_previous_pending and not self.__expr_timer.isActive():
+            index: int = self.__match_table.findNext(self.__cursor.selectionEnd())
+            if index != -1:
+                self.__is_find_pending = False
+                self.selectMatch(index)
+
+    @Slot(int)
+    def onSearchFinished(self, search: int) -> None:
+        if search != self.__search:
+            return
+
+        self.__is_searching = False
+        self.__search_changes = []
+
+        if self.__is_find_pending and not self.__expr_timer.isActive():
+            self.__is_find_pending = False
+
+            if self.__is_find_previous_pending:
+                self.findPrevious(self.__find_data)
+            else:
+                self.find(self.__find_data)
+
+        self.updateUIRequest.emit()
+
+    def setVisibleRect(self, rect: QRectF) -> None:
+        self.__visible_rect = rect
+        self.highlightVisibleBlocks()
+
+    def highlightVisibleBlocks(self) -> None:
+        if len(self.__highlight_positions) == 0 or self.__visible_rect.isEmpty():
+            return
+
+        document: QTextDocument = self.__cursor.document()
+
+        blocks: range = self.__document_layout.findBlocks(self.__visible_rect.top(), self.__visible_rect.bottom())
+        first_block: QTextBlock = document.findBlockByNumber(blocks.start)
+        last_block: QTextBlock = document.findBlockByNumber(min(blocks.stop, document.blockCount()) - 1)
+
+        if not first_block.isValid() or not last_block.isValid():
+            return
+
+        first: int = bisect_left(self.__highlight_positions, first_block.position())
+        last: int = bisect_left(self.__highlight_positions, last_block.position() + last_block.length())
+
+        self.highlightBlocks(first, last, float("inf"))
+
+    @Slot()
+    def highlightNextSlice(self) -> None:
+        self.highlightBlocks(0, len(self.__highlight_positions), time.perf_counter() + self.__highlight_slice_time)
+
+        if len(self.__highlight_positions) == 0:
+            self.__highlight_timer.stop()
+
+    def highlightBlocks(self, first: int, last: int, deadline: float) -> None:
+        # highlight blocks of the waiting positions from first to last until the deadline
+        document: QTextDocument = self.__cursor.document()
+        positions: array = self.__highlight_positions
+
+        i: int = first
+        while i < last and time.perf_counter() < deadline:
+            block: QTextBlock = document.findBlock(positions[i])
+            self.rehighlightBlock(block)
+
+            # other matches of the block are highlighted too
+            i = bisect_left(positions, block.position() + block.length(), i + 1, last)
+
+        del positions[first:i]
+
+    @Slot(int, int, int)
+    def onContentsChange(self, position: int, chars_removed: int, chars_added: int) -> None:
+        change: tuple[int, int, int] = self.__match_table.update(
+            self.__cursor.document(), self.__expr, position, chars_removed, chars_added
+        )
+
+        if self.__is_searching:
+            self.__search_changes.append(change)
+
+        # changed blocks are highlighted by the highlighter, waiting positions after them are moved
+        positions: array = self.__highlight_positions
+        if len(positions) > 0:
+            first: int = bisect_left(positions, position)
+            last: int = bisect_left(positions, position + chars_removed)
+            difference: int = chars_added - chars_removed
+
+            if difference != 0:
+                positions[first:] = array("q", (item + difference for item in positions[last:]))
+            else:
+                del positions[first:last]
@@ -1,4 +1,4 @@
-from PySide6.QtCore import Qt, Signal, QObject
+from PySide6.QtCore import Qt, Signal, QObject, Slot
 from PySide6.QtGui import QTextCursor, QTextBlock, QTextFragment
 
 
@@ -9,6 +9,12 @@ class InputComponent(QObject):
         super().__init__()
         self.__cursor: QTextCursor = cursor
 
+        # range changed since the last fixup, e.g. by undo or loading, it is fixed up with the next edit
+        self.__change_start: int = -1
+        self.__change_end: int = -1
+
+        self.__cursor.document().contentsChange.connect(self.onContentsChange)
+
     def insertText(self, text: str) -> None:
         self.__cursor.beginEditBlock()
 
@@ -33,7 +39,7 @@ class InputComponent(QObject):
 
         self.__cursor.insertText(text)
 
-        self.fixupImage()
+        self.fixupImage(selection_start)
         self.__cursor.endEditBlock()
 
         self.repaintRequest.emit()
@@ -91,7 +97,7 @@ class InputComponent(QObject):
                 block_char_format.setAnchor(False)
                 self.__cursor.mergeBlockCharFormat(block_char_format)
 
-            self.fixupImage()
+            self.fixupImage(selection_start)
             self.__cursor.endEditBlock()
 
         if modifiers in [Qt.KeyboardModifier.NoModifier, Qt.KeyboardModifier.ShiftModifier]:
@@ -153,7 +159,7 @@ class InputComponent(QObject):
                 block_char_format.setAnchor(False)
                 self.__cursor.mergeBlockCharFormat(block_char_format)
 
-            self.fixupImage()
+            self.fixupImage(selection_start)
             self.__cursor.endEditBlock()
 
         self.repaintRequest.emit()
@@ -214,7 +220,7 @@ class InputComponent(QObject):
                 block_char_format.setAnchor(False)
                 self.__cursor.mergeBlockCharFormat(block_char_format)
 
-            self.fixupImage()
+            self.fixupImage(selection_start)
             self.__cursor.endEditBlock()
 
         if modifiers in [Qt.KeyboardModifier.NoModifier, Qt.KeyboardModifier.ShiftModifier]:
@@ -278,18 +284,32 @@ class InputComponent(QObject):
                 block_char_format.setAnchor(False)
                 self.__cursor.mergeBlockCharFormat(block_char_format)
 
-            self.fixupImage()
+            self.fixupImage(selection_start)
             self.__cursor.endEditBlock()
 
         self.repaintRequest.emit()
 
-    def fixupImage(self) -> None:
+    def fixupImage(self, position: int) -> None:
+        # position is where the edit started, blocks between it and the cursor are fixed up
+        # together with blocks changed since the last fixup,
+        # contentsChange of the current edit comes only after its edit block
+
         # position, is_pref_empty, is_pref_alpha, is_pref_img, is_suff_alpha
         images: list[tuple[int, bool, bool, bool, bool]] = []
 
-        for i in range(self.__cursor.document().blockCount()):
-            block: QTextBlock = self.__cursor.document().findBlockByNumber(i)
+        first_position: int = min(position, self.__cursor.position())
+        last_position: int = max(position, self.__cursor.position())
+
+        if self.__change_start != -1:
+            first_position = min(first_position, self.__change_start)
+            last_position = max(last_position, self.__change_end)
+
+        end_position: int = self.__cursor.document().characterCount() - 1
+
+        block: QTextBlock = self.__cursor.document().findBlock(max(0, min(first_position, end_position)))
+        last_block: QTextBlock = self.__cursor.document().findBlock(max(0, min(last_position, end_position)))
 
+        while block.isValid() and block.blockNumber() <= last_block.blockNumber():
             it: QTextBlock.iterator = block.begin()
             while it != block.end():
                 frag: QTextFragment = it.fragment()
@@ -329,6 +349,8 @@ class InputComponent(QObject):
 
                 it += 1
 
+            block = block.next()
+
         # case 1
         # [alpha] \img/ || [alpha]
 
@@ -395,5 +417,22 @@ class InputComponent(QObject):
 
             helper.endEditBlock()
 
+        self.__change_start = -1
+        self.__change_end = -1
+
         if is_case_4:
             self.__cursor.setPosition(self.__cursor.position() - 1)
+
+    @Slot(int, int, int)
+    def onContentsChange(self, from_: int, charsRemoved: int, charsAdded: int) -> None:
+        # unite the change with the previous ones, moving their end by the change
+        if self.__change_start == -1:
+            self.__change_start = from_
+            self.__change_end = from_ + charsAdded
+            return
+
+        if self.__change_end >= from_ + charsRemoved:
+            self.__change_end += charsAdded - charsRemoved
+
+        self.__change_start = min(self.__change_start, from_)
+        self.__change_end = max(self.__change_end, from_ + charsAdded)
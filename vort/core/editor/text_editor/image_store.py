@@ -0,0 +1,150 @@
+import hashlib
+import zlib
+from collections import OrderedDict
+
+from PySide6.QtCore import QObject, Signal, QByteArray, QBuffer, QIODevice
+from PySide6.QtGui import QImage
+
+
+class ImageStore(QObject):
+    # encoded images of the document, e.g. mapped from the file or encoded on paste.
+    # images are addressed by the hash of their encoded bytes, so the same image is stored once.
+    # image is decoded only when it is needed first time, decoded images
+    # are dropped when they don't fit the memory budget and decoded again later.
+    # images mapped from the file are verified by their checksum when they are used first time
+
+    imageDamaged: Signal = Signal(str)  # name
+
+    def __init__(self) -> None:
+        super().__init__()
+
+        self.__memory_budget: int = 256 * 1024 * 1024  # bytes
+        self.__memory_usage: int = 0
+
+        self.__encoded_images: dict[str, bytes | memoryview] = {}
+        self.__decoded_images: OrderedDict[str, QImage] = OrderedDict()
+        self.__damaged_images: set[str] = set()
+        self.__checksums: dict[str, int] = {}  # images which aren't verified yet
+
+        self.__decode_count: int = 0
+
+    @classmethod
+    def imageName(cls, data: bytes | memoryview) -> str:
+        return f"pasted_image_{hashlib.sha256(data).hexdigest()}"
+
+    def memoryBudget(self) -> int:
+        return self.__memory_budget
+
+    def setMemoryBudget(self, budget: int) -> None:
+        self.__memory_budget = budget
+        self.evict()
+
+    def memoryUsage(self) -> int:
+        return self.__memory_usage
+
+    def decodeCount(self) -> int:
+        return self.__decode_count
+
+    def names(self) -> list[str]:
+        return list(self.__encoded_images)
+
+    def contains(self, name: str) -> bool:
+        return name in self.__encoded_images
+
+    def addImage(
+        self, name: str, data: bytes | memoryview, image: QImage | None = None, checksum: int | None = None
+    ) -> None:
+        # image with the same name has the same bytes
+        if name in self.__encoded_images:
+            return
+
+        self.__encoded_images[name] = data
+
+        if checksum is not None:
+            self.__checksums[name] = checksum
+
+        if image is not None:
+            self.__decoded_images[name] = image
+            self.__memory_usage += image.sizeInBytes()
+            self.evict()
+
+    def insertImage(self, image: QImage) -> str:
+        # encodes the image and returns its name
+        bytes_array: QByteArray = QByteArray()
+        buffer: QBuffer = QBuffer(bytes_array)
+        buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+        image.save(buffer, "png")
+        image_bytes: bytes = bytes_array.data()
+
+        name: str = self.imageName(image_bytes)
+        self.addImage(name, image_bytes, image)
+
+        return name
+
+    def removeImage(self, name: str) -> None:
+        self.__encoded_images.pop(name, None)
+        self.__damaged_images.discard(name)
+        self.__checksums.pop(name, None)
+
+        image: QImage | None = self.__decoded_images.pop(name, None)
+        if image is not None:
+            self.__memory_usage -= image.sizeInBytes()
+
+    def encodedImage(self, name: str) -> bytes | memoryview | None:
+        # damaged image isn't saved with the document
+        if not self.verifyImage(name):
+            return None
+
+        return self.__encoded_images.get(name)
+
+    def verifyImage(self, name: str) -> bool:
+        checksum: int | None = self.__checksums.pop(name, None)
+
+        if checksum is not None and zlib.crc32(self.__encoded_images[name]) != checksum:
+            self.__damaged_images.add(name)
+            self.imageDamaged.emit(name)
+
+        return name not in self.__damaged_images
+
+    def copyMappedImages(self) -> None:
+        # mapped images keep the file open, so it can't be replaced on Windows.
+        # images are verified before they are copied, damaged ones aren't kept
+        for name, data in self.__encoded_images.items():
+            if isinstance(data, memoryview):
+                self.__encoded_images[name] = bytes(data) if self.verifyImage(name) else b""
+
+    def image(self, name: str) -> QImage | None:
+        if name in self.__decoded_images:
+            self.__decoded_images.move_to_end(name)
+            return self.__decoded_images[name]
+
+        data: bytes | memoryview | None = self.__encoded_images.get(name)
+        if data is None or not self.verifyImage(name):
+            return None
+
+        image: QImage = QImage()
+        self.__decode_count += 1
+
+        if not image.loadFromData(bytes(data), "PNG"):
+            self.__damaged_images.add(name)
+            self.imageDamaged.emit(name)
+            return None
+
+        self.__decoded_images[name] = image
+        self.__memory_usage += image.sizeInBytes()
+        self.evict()
+
+        return image
+
+    def clear(self) -> None:
+        self.__encoded_images.clear()
+        self.__decoded_images.clear()
+        self.__damaged_images.clear()
+        self.__checksums.clear()
+        self.__memory_usage = 0
+
+    def evict(self) -> None:
+        # keep the most recently used image even if it doesn't fit
+        while self.__memory_usage > self.__memory_budget and len(self.__decoded_images) > 1:
+            _, image = self.__decoded_images.popitem(last=False)
+            self.__memory_usage -= image.sizeInBytes()
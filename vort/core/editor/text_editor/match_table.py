@@ -0,0 +1,162 @@
+from array import array
+from bisect import bisect_left
+from itertools import chain
+from typing import Callable
+
+from PySide6.QtCore import QRegularExpression, QRegularExpressionMatch, QRegularExpressionMatchIterator
+from PySide6.QtGui import QTextBlock, QTextDocument
+
+
+class MatchTable:
+    # sorted ranges of all matches of the pattern in the document, item i of every array belongs to match i
+    #
+    # matches don't cross blocks like in QTextDocument.find,
+    # so only changed blocks are searched again and matches after them are moved
+
+    def __init__(self) -> None:
+        self.starts: array = array("q")
+        self.ends: array = array("q")
+
+    def matchCount(self) -> int:
+        return len(self.starts)
+
+    def clear(self) -> None:
+        self.starts = array("q")
+        self.ends = array("q")
+
+    def build(self, document: QTextDocument, expr: QRegularExpression) -> None:
+        self.clear()
+
+        if expr.pattern() == "" or not expr.isValid():
+            return
+
+        self.starts, self.ends = self.search(document.firstBlock(), document.lastBlock(), expr)
+
+    def update(
+        self, document: QTextDocument, expr: QRegularExpression, position: int, chars_removed: int, chars_added: int
+    ) -> tuple[int, int, int]:
+        # patch the table after contentsChange of the document,
+        # returns the changed text before the change, from start to end, and the difference of its length
+        if expr.pattern() == "" or not expr.isValid():
+            return position, position + chars_removed, chars_added - chars_removed
+
+        last_position: int = document.characterCount() - 1
+
+        first_block: QTextBlock = document.findBlock(min(position, last_position))
+        last_block: QTextBlock = document.findBlock(min(position + chars_added, last_position))
+
+        # changed blocks in the new text and the same text before the change
+        start: int = first_block.position()
+        end: int = last_block.position() + last_block.length()
+        difference: int = chars_added - chars_removed
+
+        first: int = bisect_left(self.starts, start)
+        last: int = bisect_left(self.starts, end - difference)
+
+        starts, ends = self.search(first_block, last_block, expr)
+
+        if difference != 0:
+            starts.extend(item + difference for item in self.starts[last:])
+            ends.extend(item + difference for item in self.ends[last:])
+
+            self.starts[first:] = starts
+            self.ends[first:] = ends
+
+        else:
+            self.starts[first:last] = starts
+            self.ends[first:last] = ends
+
+        return start, end - difference, difference
+
+    def insert(self, starts: array, ends: array) -> None:
+        # insert sorted matches, matches of the table between them are from searched changed blocks,
+        # so they don't intersect
+        if len(starts) == 0:
+            return
+
+        first: int = bisect_left(self.starts, starts[0])
+        last: int = bisect_left(self.starts, ends[-1])
+
+        matches: list[tuple[int, int]] = sorted(chain(zip(self.starts[first:last], self.ends[first:last]), zip(starts, ends)))
+
+        self.starts[first:last] = array("q", (start for start, _ in matches))
+        self.ends[first:last] = array("q", (end for _, end in matches))
+
+    @staticmethod
+    def mapMatches(starts: array, ends: array, changes: list[tuple[int, int, int]]) -> tuple[array, array]:
+        # move matches of an old text by the changes which were made after it, as update returned them.
+        # matches in changed text are dropped, changed blocks were searched when they were changed
+        for change_start, change_end, difference in changes:
+            mapped_starts: array = array("q")
+            mapped_ends: array = array("q")
+
+            for start, end in zip(starts, ends):
+                if start < change_start:
+                    mapped_starts.append(start)
+                    mapped_ends.append(end)
+                elif start >= change_end:
+                    mapped_starts.append(start + difference)
+                    mapped_ends.append(end + difference)
+
+            starts, ends = mapped_starts, mapped_ends
+
+        return starts, ends
+
+    def search(self, first_block: QTextBlock, last_block: QTextBlock, expr: QRegularExpression) -> tuple[array, array]:
+        # matches in blocks from first to last, empty matches can't be selected, so they are skipped
+        starts: array = array("q")
+        ends: array = array("q")
+
+        last_block_number: int = last_block.blockNumber()
+
+        block: QTextBlock = first_block
+        while block.isValid() and block.blockNumber() <= last_block_number:
+            # QTextDocument.find searches non-breaking spaces as spaces
+            MatchTable.searchText(block.text().replace("\u00a0", " "), block.position(), expr, starts, ends)
+            block = block.next()
+
+        return starts, ends
+
+    @staticmethod
+    def utf16Length(text: str) -> int:
+        # length of the text in positions of the document, characters out of the bmp take two of them
+        return len(text) if text.isascii() else len(text.encode("utf-16-le")) // 2
+
+    @staticmethod
+    def searchText(
+        text: str,
+        position: int,
+        expr: QRegularExpression,
+        starts: array,
+        ends: array,
+        is_cancelled: Callable[[], bool] | None = None,
+    ) -> bool:
+        # add matches in the text of a block at the position, returns False if the search is cancelled.
+        # a block may be the whole text, so cancellation is checked every few matches too
+        it: QRegularExpressionMatchIterator = expr.globalMatch(text)
+        match_count: int = 0
+
+        while it.hasNext():
+            match: QRegularExpressionMatch = it.next()
+            if match.capturedLength() > 0:
+                starts.append(position + match.capturedStart())
+                ends.append(position + match.capturedEnd())
+
+            match_count += 1
+            if is_cancelled is not None and match_count % 1024 == 0 and is_cancelled():
+                return False
+
+        return True
+
+    def findMatches(self, start: int, end: int) -> range:
+        # matches which start in the range from start to end
+        return range(bisect_left(self.starts, start), bisect_left(self.starts, end))
+
+    def findNext(self, position: int) -> int:
+        # first match which starts at or after the position, -1 if there is none
+        index: int = bisect_left(self.starts, position)
+        return index if index < len(self.starts) else -1
+
+    def findPrevious(self, position: int) -> int:
+        # last match which starts before the position, -1 if there is none
+        return bisect_left(self.starts, position) - 1
@@ -0,0 +1,25 @@
+from typing import Any
+
+from PySide6.QtCore import QUrl
+from PySide6.QtGui import QTextDocument
+
+from core.editor.text_editor.image_store import ImageStore
+
+
+class TextDocument(QTextDocument):
+    # images which weren't added as resources are taken from the image store,
+    # so they are decoded only when they are painted
+
+    def __init__(self) -> None:
+        super().__init__()
+
+        self.__image_store: ImageStore = ImageStore()
+
+    def imageStore(self) -> ImageStore:
+        return self.__image_store
+
+    def loadResource(self, type: int, name: QUrl) -> Any:
+        if type == QTextDocument.ResourceType.ImageResource and self.__image_store.contains(name.toString()):
+            return self.__image_store.image(name.toString())
+
+        return super().loadResource(type, name)
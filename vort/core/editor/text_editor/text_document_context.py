@@ -1,5 +1,6 @@
-from PySide6.QtGui import QTextDocument, QTextCursor
+from PySide6.QtGui import QTextCursor
 
+from core.editor.text_editor.text_document import TextDocument
 from core.editor.text_editor.text_document_layout import TextDocumentLayout
 from core.editor.text_editor.component.history_component import HistoryComponent
 from core.editor.text_editor.component.clipboard_component import ClipboardComponent
@@ -15,11 +16,11 @@ from core.editor.text_editor.component.finder_component import FinderComponent
 class TextDocumentContext:
     def __init__(
         self,
-        document: QTextDocument,
+        document: TextDocument,
         layout: TextDocumentLayout,
         cursor: QTextCursor,
     ) -> None:
-        self.document: QTextDocument = document
+        self.document: TextDocument = document
         self.layout: TextDocumentLayout = layout
         self.cursor: QTextCursor = cursor
 
@@ -31,4 +32,4 @@ class TextDocumentContext:
         self.paragraph_component: ParagraphComponent = ParagraphComponent(self.cursor)
         self.char_component: CharComponent = CharComponent(self.cursor)
         self.text_style_component: TextStyleComponent = TextStyleComponent(self.cursor)
-        self.finder_component: FinderComponent = FinderComponent(self.cursor)
+        self.finder_component: FinderComponent = FinderComponent(self.cursor, self.layout)
@@ -1,3 +1,5 @@
+from array import array
+from bisect import bisect_left, bisect_right
 from enum import Enum, auto
 
 from PySide6.QtCore import QPointF, Signal, QRectF, Qt, Slot
@@ -17,10 +19,12 @@ from PySide6.QtGui import (
     QFont,
     QPen,
     QImage,
+    QPicture,
 )
 
 from core.editor.page_layout.page_layout import PageLayout
 from core.editor.document_paint_context import DocumentPaintContext
+from core.editor.text_editor.block_layout_cache import BlockLayoutCache, LayoutState
 
 
 class Hit(Enum):
@@ -62,6 +66,13 @@ class TextDocumentLayout(QAbstractTextDocumentLayout):
 
         self.__image_layout: list[ImageFormat] = []
 
+        self.__block_cache: BlockLayoutCache = BlockLayoutCache()
+        self.__document_character_count: int = 0
+        self.__is_page_count_changing: bool = False
+
+        # page background and border, the same for every page
+        self.__page_picture: QPicture | None = None
+
         self.__character_count: int = 0
 
         self.__indent_step: float = 0.0
@@ -93,7 +104,9 @@ class TextDocumentLayout(QAbstractTextDocumentLayout):
         return self.__indent_step
 
     def setIndentStep(self, step: float) -> None:
-        self.__indent_step = step
+        if self.__indent_step != step:
+            self.__indent_step = step
+            self.relayout()
 
     def isHyperlinkBoldTurned(self) -> bool:
         return self.__is_hyperlink_bold_turned
@@ -171,30 +184,33 @@ class TextDocumentLayout(QAbstractTextDocumentLayout):
         result: HitResult = HitResult()
         result.point = point
 
-        current_cursor_position = 0
+        # check in text, start from the first block which isn't above the point
+        i: int = self.__block_cache.findBlock(point.y())
+        block: QTextBlock = self.document().findBlockByNumber(i)
 
-        # check in text
-        for i in range(self.document().blockCount()):
-            block: QTextBlock = self.document().findBlockByNumber(i)
+        while block.isValid() and i < self.__block_cache.blockCount() and self.__block_cache.tops[i] <= point.y():
             block_layout: QTextLayout = block.layout()
             block_rect: QRectF = block_layout.boundingRect()
 
             if block_rect.contains(point):
-                helper: QTextCursor = QTextCursor(block)
-
-                if helper.charFormat().isImageFormat():
+                if self.__block_cache.isImage(i):
                     # handle below
                     break
 
-                for j in range(block_layout.lineCount()):
+                # start from the first line which isn't above the point
+                for j in range(self.__block_cache.findLine(i, point.y()), block_layout.lineCount()):
                     line: QTextLine = block_layout.lineAt(j)
                     line_rect: QRectF = line.rect()
 
+                    if line_rect.top() > point.y():
+                        break
+
                     if line_rect.contains(point):
                         x_position = point.x()
                         line_cursor_position = line.xToCursor(x_position, QTextLine.CursorPosition.CursorBetweenCharacters)  # type: ignore
-                        current_cursor_position += line_cursor_position
+                        current_cursor_position = block.position() + line_cursor_position
 
+                        helper: QTextCursor = QTextCursor(block)
                         helper.setPosition(current_cursor_position)
                         result.hyperlink = helper.charFormat().anchorHref()
 
@@ -207,10 +223,16 @@ class TextDocumentLayout(QAbstractTextDocumentLayout):
 
                         return result
 
-            current_cursor_position += block.length()
+            block = block.next()
+            i += 1
+
+        # check in images, start from the first image which isn't above the point
+        image_index: int = bisect_left(self.__image_layout, point.y(), key=lambda image: image.rect.bottom())
+
+        for image_format in self.__image_layout[image_index:]:
+            if image_format.rect.top() > point.y():
+                break
 
-        # check in images
-        for image_format in self.__image_layout:
             if image_format.rect.contains(point):
                 result.hit = Hit.Image
 
@@ -225,294 +247,493 @@ class TextDocumentLayout(QAbstractTextDocumentLayout):
         return result
 
     def positionTest(self, position: int) -> QPointF:
-        current_cursor_position = 0
+        block: QTextBlock = self.document().findBlock(position)
+        i: int = block.blockNumber()
 
-        for i in range(self.document().blockCount()):
-            block: QTextBlock = self.document().findBlockByNumber(i)
-            block_layout: QTextLayout = block.layout()
+        if block.isValid() and i < self.__block_cache.blockCount():
+            block_position: int = position - block.position()
 
-            if block.contains(position):
-                for j in range(block_layout.lineCount()):
-                    line: QTextLine = block_layout.lineAt(j)
-
-                    if current_cursor_position + line.textLength() >= position:
-                        a, _ = line.cursorToX(position, QTextLine.Edge.Leading)  # type: ignore
+            line: QTextLine = block.layout().lineAt(self.__block_cache.findLineByPosition(i, block_position))
 
-                        return QPointF(a, line.y())
+            if line.isValid():
+                a, _ = line.cursorToX(block_position, QTextLine.Edge.Leading)  # type: ignore
 
-                    current_cursor_position += line.textLength()
-
-            current_cursor_position += block.length()
+                return QPointF(a, line.y())
 
         return QPointF(-1, -1)
 
+    def findBlocks(self, top: float, bottom: float) -> range:
+        # blocks which intersect the range from top to bottom
+        return self.__block_cache.findBlocks(top, bottom)
+
     def documentChanged(self, from_: int, charsRemoved: int, charsAdded: int) -> None:
         # it isn't as complicated as you may think
+        #
+        # only blocks touched by the change are laid out again,
+        # the following blocks are moved without line breaking
+        # until their page breaks settle back to the cached ones
 
-        self.__image_layout.clear()
+        document: QTextDocument = self.document()
 
-        character_count: int = 0
-        page_count: int = 1
+        block_count: int = document.blockCount()
+        cached_block_count: int = self.__block_cache.blockCount()
 
-        root_x: float = self.__page_layout.textXPosition(0)
-        root_y: float = self.__page_layout.textYPosition(0)
+        character_difference: int = document.characterCount() - self.__document_character_count
 
-        remaining_text_height: float = self.__page_layout.textHeight()
+        first_block_number: int = 0
+        last_block_number: int = block_count - 1
+        cached_last_block_number: int = cached_block_count - 1
 
-        for i in range(self.document().blockCount()):
-            block: QTextBlock = self.document().findBlockByNumber(i)
-            block_layout: QTextLayout = block.layout()
-            block_format: QTextBlockFormat = block.blockFormat()
+        if cached_block_count != 0:
+            first_position: int = max(0, min(from_, document.characterCount() - 1))
+            last_position: int = max(first_position, min(from_ + charsAdded, document.characterCount() - 1))
+
+            first_block_number = document.findBlock(first_position).blockNumber()
+            last_block_number = document.findBlock(last_position).blockNumber()
+            cached_last_block_number = last_block_number - (block_count - cached_block_count)
 
-            block_x: float = block_format.indent() * self.__indent_step + block_format.leftMargin()
-            block_y: float = 0
+            if cached_last_block_number < first_block_number or cached_last_block_number >= cached_block_count:
+                # change doesn't match the cache
+                first_block_number = 0
+                last_block_number = block_count - 1
+                cached_last_block_number = cached_block_count - 1
 
-            block_width_reduce: float = (
-                block_format.indent() * self.__indent_step + block_format.leftMargin() + block_format.rightMargin()
+        # cached state before the first block that wasn't touched by the change
+        settled_state: LayoutState | None = None
+        if cached_last_block_number + 1 < cached_block_count:
+            settled_state = self.__block_cache.state(cached_last_block_number)
+
+        # replace cached blocks touched by the change
+
+        character_count: int = 0
+        if cached_block_count != 0:
+            character_count = self.__character_count - self.__block_cache.characterCount(
+                first_block_number, cached_last_block_number
             )
 
-            # block parsing structure:
-            #
-            # if image
-            #   calc
-            #   calc if new page
-            #   continue
-            #
-            # while line:
-            #   if first line:
-            #       calc
-            #       calc if new page
-            #   else:
-            #       calc
-            #       calc new page
-            #   calc
-            # calc
-            # calc if new page:
-
-            # fixup in input component guarantees that if image exists then image has its own block
-            # we don't support inline images
-
-            is_image: bool = False
-            image_width: float = 0.0
-            image_height: float = 0.0
-            image_name: str = ""
-            image_position: int = 0
+        self.__block_cache.replace(
+            first_block_number, cached_last_block_number, last_block_number - first_block_number + 1
+        )
 
-            it: QTextBlock.iterator = block.begin()
-            if it != block.end():
-                fragment: QTextFragment = it.fragment()
+        block: QTextBlock = document.findBlockByNumber(first_block_number)
+        first_position = block.position()
 
-                if fragment.charFormat().isImageFormat():
-                    fragment_format: QTextImageFormat = fragment.charFormat().toImageFormat()
-                    is_image = True
-                    image_width = fragment_format.width()
-                    image_height = fragment_format.height()
-                    image_name = fragment_format.name()
-                    image_position = fragment.position()
+        # images before the change stay, images after the settled block are only moved
+        image_index: int = bisect_left(self.__image_layout, first_position, key=lambda image: image.position)
 
-                    it += 1
+        cached_image_layout: list[ImageFormat] = self.__image_layout[image_index:]
+        del self.__image_layout[image_index:]
 
-                    if it != block.end():
-                        # fixup hasn't complited yet
-                        return
+        if first_block_number > 0:
+            state: LayoutState = self.__block_cache.state(first_block_number - 1)
+        else:
+            state: LayoutState = LayoutState()
+            state.root_x = self.__page_layout.textXPosition(0)
+            state.root_y = self.__page_layout.textYPosition(0)
+            state.remaining_text_height = self.__page_layout.textHeight()
+            state.page_count = 1
 
-            if is_image:
-                if (remaining_text_height != self.__page_layout.textHeight()) and (
-                    remaining_text_height - block_format.topMargin() - image_height - block_format.bottomMargin() < 0
-                ):
-                    root_x = self.__page_layout.textXPosition(page_count)
-                    root_y = self.__page_layout.textYPosition(page_count)
+        i: int = first_block_number
+        is_settled: bool = False
 
-                    remaining_text_height = self.__page_layout.textHeight()
-                    page_count += 1
+        while block.isValid():
+            if i > last_block_number and settled_state is not None and state.isEqual(settled_state):
+                is_settled = True
+                break
 
-                block_y += block_format.topMargin()
+            is_relayout: bool = i <= last_block_number or block.layout().lineCount() == 0
+
+            if i > last_block_number:
+                settled_state = self.__block_cache.state(i)
 
-                image_x: float = root_x + block_x
-                image_y: float = root_y + block_y
+            character_count -= self.__block_cache.character_counts[i]
 
-                match block_format.alignment():
-                    case Qt.AlignmentFlag.AlignLeft:
-                        image_x += 0
+            if not self.layoutBlock(block, i, state, is_relayout):
+                # fixup hasn't completed yet, layout everything next time
+                self.__block_cache.clear()
+                self.__image_layout.clear()
+                self.__document_character_count = 0
+                return
 
-                    case Qt.AlignmentFlag.AlignHCenter:
-                        image_x += (self.__page_layout.textWidth() - block_width_reduce - image_width) / 2
+            self.__block_cache.setState(i, state)
 
-                    case Qt.AlignmentFlag.AlignRight:
-                        image_x += self.__page_layout.textWidth() - block_width_reduce - image_width
+            character_count += self.__block_cache.character_counts[i]
 
-                image_format: ImageFormat = ImageFormat()
-                image_format.rect = QRectF(image_x, image_y, image_width, image_height)
-                image_format.name = image_name
-                image_format.position = image_position
+            block = block.next()
+            i += 1
 
-                self.__image_layout.append(image_format)
+        if is_settled:
+            settled_position: int = block.position() - character_difference
 
+            for image_format in cached_image_layout:
+                if image_format.position >= settled_position:
+                    image_format.position += character_difference
+                    self.__image_layout.append(image_format)
+
+        self.__document_character_count = document.characterCount()
+
+        page_count: int = self.__block_cache.page_counts[-1]
+
+        # page count change doesn't move anything, so don't relayout on it
+        self.__is_page_count_changing = True
+
+        difference = page_count - self.__page_layout.pageCount()
+        if difference > 0:
+            self.__page_layout.addPage(difference)
+        elif difference < 0:
+            self.__page_layout.removePage(-difference)
+
+        self.__is_page_count_changing = False
+
+        if self.__character_count != character_count:
+            self.__character_count = character_count
+            self.characterCountChanged.emit(self.__character_count)
+
+        # blocks from the first changed one to the settled one have been moved
+        dirty_top: float = self.__block_cache.bottoms[first_block_number - 1] if first_block_number > 0 else 0.0
+        dirty_bottom: float = self.__block_cache.tops[i] if is_settled else self.__page_layout.height()
+
+        if dirty_bottom > dirty_top:
+            self.update[QRectF].emit(QRectF(0, dirty_top, self.__page_layout.width(), dirty_bottom - dirty_top))
+
+    def layoutBlock(self, block: QTextBlock, index: int, state: LayoutState, is_relayout: bool) -> bool:
+        # lays out the block from the state, moves the state to the next block and caches the block
+        # if it isn't relayout, lines are only moved, their widths stay the same
+        # returns False if block can't be laid out yet
+
+        block_layout: QTextLayout = block.layout()
+        block_format: QTextBlockFormat = block.blockFormat()
+
+        block_x: float = block_format.indent() * self.__indent_step + block_format.leftMargin()
+        block_y: float = 0
+
+        block_width_reduce: float = (
+            block_format.indent() * self.__indent_step + block_format.leftMargin() + block_format.rightMargin()
+        )
+
+        page_index: int = 0
+        block_top: float = 0.0
+        block_bottom: float = 0.0
+        line_count: int = 0
+        line_bottoms: array = array("d")
+        line_ends: array = array("i")
+        character_count: int = 0
+
+        # block parsing structure:
+        #
+        # if image
+        #   calc
+        #   calc if new page
+        #   return
+        #
+        # while line:
+        #   if first line:
+        #       calc
+        #       calc if new page
+        #   else:
+        #       calc
+        #       calc new page
+        #   calc
+        # calc
+        # calc if new page:
+
+        # fixup in input component guarantees that if image exists then image has its own block
+        # we don't support inline images
+
+        is_image: bool = False
+        image_width: float = 0.0
+        image_height: float = 0.0
+        image_name: str = ""
+        image_position: int = 0
+
+        it: QTextBlock.iterator = block.begin()
+        if it != block.end():
+            fragment: QTextFragment = it.fragment()
+
+            if fragment.charFormat().isImageFormat():
+                fragment_format: QTextImageFormat = fragment.charFormat().toImageFormat()
+                is_image = True
+                image_width = fragment_format.width()
+                image_height = fragment_format.height()
+                image_name = fragment_format.name()
+                image_position = fragment.position()
+
+                it += 1
+
+                if it != block.end():
+                    # fixup hasn't complited yet
+                    return False
+
+        if is_image:
+            if (state.remaining_text_height != self.__page_layout.textHeight()) and (
+                state.remaining_text_height - block_format.topMargin() - image_height - block_format.bottomMargin() < 0
+            ):
+                state.root_x = self.__page_layout.textXPosition(state.page_count)
+                state.root_y = self.__page_layout.textYPosition(state.page_count)
+
+                state.remaining_text_height = self.__page_layout.textHeight()
+                state.page_count += 1
+
+            block_y += block_format.topMargin()
+
+            image_x: float = state.root_x + block_x
+            image_y: float = state.root_y + block_y
+
+            match block_format.alignment():
+                case Qt.AlignmentFlag.AlignLeft:
+                    image_x += 0
+
+                case Qt.AlignmentFlag.AlignHCenter:
+                    image_x += (self.__page_layout.textWidth() - block_width_reduce - image_width) / 2
+
+                case Qt.AlignmentFlag.AlignRight:
+                    image_x += self.__page_layout.textWidth() - block_width_reduce - image_width
+
+            image_format: ImageFormat = ImageFormat()
+            image_format.rect = QRectF(image_x, image_y, image_width, image_height)
+            image_format.name = image_name
+            image_format.position = image_position
+
+            self.__image_layout.append(image_format)
+
+            if is_relayout:
                 block_layout.beginLayout()
                 line: QTextLine = block_layout.createLine()
                 line.setLineWidth(image_width)
                 line.setPosition(QPointF(image_x, image_y))
                 block_layout.endLayout()
+            else:
+                block_layout.lineAt(0).setPosition(QPointF(image_x, image_y))
 
-                root_y += block_format.topMargin() + image_height + block_format.bottomMargin()
-                remaining_text_height -= block_format.topMargin() + image_height + block_format.bottomMargin()
+            state.root_y += block_format.topMargin() + image_height + block_format.bottomMargin()
+            state.remaining_text_height -= block_format.topMargin() + image_height + block_format.bottomMargin()
 
-                # there is no more text or images in this block
-                continue
+            self.__block_cache.setBlock(
+                index, state.page_count - 1, image_y, image_y + image_height, 1, character_count, True
+            )
+            self.__block_cache.setLines(index, array("d", [image_y + image_height]), array("i", [1]))
 
+            # there is no more text or images in this block
+            return True
+
+        line_number: int = 0
+
+        if is_relayout:
             block_layout.beginLayout()
             line: QTextLine = block_layout.createLine()
-            is_first_line = True
+        else:
+            line: QTextLine = block_layout.lineAt(line_number)
 
-            while line.isValid():
-                line_x: float = 0.0
-                line_y: float = 0.0
+        is_first_line = True
 
-                if is_first_line:
+        while line.isValid():
+            line_x: float = 0.0
+            line_y: float = 0.0
+
+            if is_first_line:
+                if is_relayout:
                     line.setLineWidth(self.__page_layout.textWidth() - block_width_reduce - block_format.textIndent())
 
-                    if (remaining_text_height != self.__page_layout.textHeight()) and (
-                        remaining_text_height - line.height() - block_format.topMargin() <= 0
-                    ):
-                        root_x = self.__page_layout.textXPosition(page_count)
-                        root_y = self.__page_layout.textYPosition(page_count)
+                if (state.remaining_text_height != self.__page_layout.textHeight()) and (
+                    state.remaining_text_height - line.height() - block_format.topMargin() <= 0
+                ):
+                    state.root_x = self.__page_layout.textXPosition(state.page_count)
+                    state.root_y = self.__page_layout.textYPosition(state.page_count)
+
+                    state.remaining_text_height = self.__page_layout.textHeight()
+                    state.page_count += 1
 
-                        remaining_text_height = self.__page_layout.textHeight()
-                        page_count += 1
+                block_y += block_format.topMargin()
+                line_x += block_format.textIndent()
+                state.remaining_text_height -= block_format.topMargin()
 
-                    block_y += block_format.topMargin()
-                    line_x += block_format.textIndent()
-                    remaining_text_height -= block_format.topMargin()
+                page_index = state.page_count - 1
+                block_top = state.root_y + block_y
 
-                    is_first_line = False
+                is_first_line = False
 
-                else:
+            else:
+                if is_relayout:
                     line.setLineWidth(self.__page_layout.textWidth() - block_width_reduce)
 
-                    if (remaining_text_height != self.__page_layout.textHeight()) and (
-                        remaining_text_height - line.height() <= 0
-                    ):
-                        block_y += (
-                            remaining_text_height
-                            + self.__page_layout.footerHeight()
-                            + self.__page_layout.pageBottomPadding()
-                            + self.__page_layout.borderWidth()
-                            + self.__page_layout.pageBottomMargin()
-                            + self.__page_layout.pageSpacing()
-                            + self.__page_layout.pageTopMargin()
-                            + self.__page_layout.borderWidth()
-                            + self.__page_layout.pageTopPadding()
-                            + self.__page_layout.headerHeight()
-                        )
+                if (state.remaining_text_height != self.__page_layout.textHeight()) and (
+                    state.remaining_text_height - line.height() <= 0
+                ):
+                    block_y += (
+                        state.remaining_text_height
+                        + self.__page_layout.footerHeight()
+                        + self.__page_layout.pageBottomPadding()
+                        + self.__page_layout.borderWidth()
+                        + self.__page_layout.pageBottomMargin()
+                        + self.__page_layout.pageSpacing()
+                        + self.__page_layout.pageTopMargin()
+                        + self.__page_layout.borderWidth()
+                        + self.__page_layout.pageTopPadding()
+                        + self.__page_layout.headerHeight()
+                    )
+
+                    state.remaining_text_height = self.__page_layout.textHeight()
+                    state.page_count += 1
+
+            line_x += state.root_x + block_x
+            line_y += state.root_y + block_y
+
+            line_rect: QRectF = line.naturalTextRect()
+
+            match block_format.alignment():
+                case Qt.AlignmentFlag.AlignLeft:
+                    line_x += 0
+
+                case Qt.AlignmentFlag.AlignHCenter:
+                    line_x += (self.__page_layout.textWidth() - block_width_reduce - line_rect.width()) / 2
+
+                case Qt.AlignmentFlag.AlignRight:
+                    line_x += self.__page_layout.textWidth() - block_width_reduce - line_rect.width()
+
+            if is_relayout:
+                line.setLineWidth(max(line_rect.width(), line_rect.height() / 2))
+            line.setPosition(QPointF(line_x, line_y))
 
-                        remaining_text_height = self.__page_layout.textHeight()
-                        page_count += 1
+            block_bottom = line_y + line.height()
 
-                line_x += root_x + block_x
-                line_y += root_y + block_y
+            block_y += line.height() * block_format.lineHeight()
+            state.remaining_text_height -= line.height() * block_format.lineHeight()
 
-                line_rect: QRectF = line.naturalTextRect()
+            line_count += 1
+            character_count += line.textLength()
 
-                match block_format.alignment():
-                    case Qt.AlignmentFlag.AlignLeft:
-                        line_x += 0
+            line_bottoms.append(block_bottom)
+            line_ends.append(character_count)
 
-                    case Qt.AlignmentFlag.AlignHCenter:
-                        line_x += (self.__page_layout.textWidth() - block_width_reduce - line_rect.width()) / 2
+            if is_relayout:
+                line = block_layout.createLine()
+            else:
+                line_number += 1
+                line = block_layout.lineAt(line_number)
 
-                    case Qt.AlignmentFlag.AlignRight:
-                        line_x += self.__page_layout.textWidth() - block_width_reduce - line_rect.width()
+        state.root_y += block_y
 
-                line.setLineWidth(max(line_rect.width(), line_rect.height() / 2))
-                line.setPosition(QPointF(line_x, line_y))
+        if (state.remaining_text_height != self.__page_layout.textHeight()) and (
+            state.remaining_text_height - block_format.bottomMargin() <= 0
+        ):
+            state.root_x = self.__page_layout.textXPosition(state.page_count)
+            state.root_y = self.__page_layout.textYPosition(state.page_count)
 
-                block_y += line.height() * block_format.lineHeight()
-                remaining_text_height -= line.height() * block_format.lineHeight()
+            state.remaining_text_height = self.__page_layout.textHeight()
+            state.page_count += 1
 
-                character_count += line.textLength()
+        else:
+            state.root_y += block_format.bottomMargin()
+            state.remaining_text_height -= block_format.bottomMargin()
 
-                line = block_layout.createLine()
+        if is_relayout:
+            block_layout.endLayout()
 
-            root_y += block_y
+        self.__block_cache.setBlock(index, page_index, block_top, block_bottom, line_count, character_count, False)
+        self.__block_cache.setLines(index, line_bottoms, line_ends)
 
-            if (remaining_text_height != self.__page_layout.textHeight()) and (
-                remaining_text_height - block_format.bottomMargin() <= 0
-            ):
-                root_x = self.__page_layout.textXPosition(page_count)
-                root_y = self.__page_layout.textYPosition(page_count)
+        return True
 
-                remaining_text_height = self.__page_layout.textHeight()
-                page_count += 1
+    def relayout(self) -> None:
+        # forget cached layout, e.g. when page layout is changed
+        self.__block_cache.clear()
+        self.__document_character_count = 0
+        self.documentChanged(0, 0, 0)
 
-            else:
-                root_y += block_format.bottomMargin()
-                remaining_text_height -= block_format.bottomMargin()
+    def blockBoundingRect(self, block: QTextBlock) -> QRectF:
+        return block.layout().boundingRect()
 
-            block_layout.endLayout()
+    def cursorRect(self, position: int) -> QRectF:
+        # rect of the line with the position across the whole width
+        position = max(0, min(position, self.document().characterCount() - 1))
 
-        difference = page_count - self.__page_layout.pageCount()
-        if difference > 0:
-            self.__page_layout.addPage(difference)
-        elif difference < 0:
-            self.__page_layout.removePage(-difference)
+        block: QTextBlock = self.document().findBlock(position)
+        i: int = block.blockNumber()
 
-        if self.__character_count != character_count:
-            self.__character_count = character_count
-            self.characterCountChanged.emit(self.__character_count)
+        if not block.isValid() or i >= self.__block_cache.blockCount():
+            return QRectF()
 
-        self.update.emit()
+        if self.__block_cache.isImage(i):
+            top: float = self.__block_cache.tops[i]
+            bottom: float = self.__block_cache.bottoms[i]
+        else:
+            line: QTextLine = block.layout().lineAt(
+                self.__block_cache.findLineByPosition(i, position - block.position())
+            )
+            top: float = line.y()
+            bottom: float = line.y() + line.height()
 
-    def blockBoundingRect(self, block: QTextBlock) -> QRectF:
-        return block.layout().boundingRect()
+        return QRectF(0, top, self.__page_layout.width(), bottom - top).adjusted(0, -1, 0, 1)
+
+    def rangeRect(self, start: int, end: int) -> QRectF:
+        # rect of blocks from start to end across the whole width
+        start = max(0, min(start, self.document().characterCount() - 1))
+        end = max(start, min(end, self.document().characterCount() - 1))
+
+        first_block_number: int = self.document().findBlock(start).blockNumber()
+        last_block_number: int = min(self.document().findBlock(end).blockNumber(), self.__block_cache.blockCount() - 1)
+
+        if first_block_number < 0 or first_block_number > last_block_number:
+            return QRectF()
+
+        top: float = self.__block_cache.tops[first_block_number]
+        bottom: float = self.__block_cache.bottoms[last_block_number]
+
+        return QRectF(0, top, self.__page_layout.width(), bottom - top).adjusted(0, -1, 0, 1)
 
     def paint(self, context: DocumentPaintContext):
         self.paintPage(context)
         self.paintText(context)
         self.paintImage(context)
 
-        self.update.emit()
-
     def paintPage(self, context: DocumentPaintContext) -> None:
         painter: QPainter = context.painter
         rect: QRectF = context.rect
 
-        old_pen: QPen = painter.pen()
+        page_picture: QPicture = self.pagePicture()
+
+        # paint only pages which intersect the rect
+        for i in self.__page_layout.findPages(rect.top(), rect.bottom()):
+            painter.drawPicture(
+                QPointF(self.__page_layout.pageXPosition(i), self.__page_layout.pageYPosition(i)), page_picture
+            )
+
+    def pagePicture(self) -> QPicture:
+        # records page chrome once, it is forgotten when page layout is changed
+        if self.__page_picture is not None:
+            return self.__page_picture
+
+        self.__page_picture = QPicture()
+
+        painter: QPainter = QPainter(self.__page_picture)
+
         pen: QPen = QPen()
         pen.setColor(self.__page_layout.borderColor())
         pen.setWidth(int(self.__page_layout.borderWidth()))
         pen.setJoinStyle(Qt.PenJoinStyle.MiterJoin)
         painter.setPen(pen)
 
-        for i in range(self.__page_layout.pageCount()):
-            page_rect: QRectF = QRectF(
-                self.__page_layout.pageXPosition(i),
-                self.__page_layout.pageYPosition(i),
-                self.__page_layout.pageWidth(),
-                self.__page_layout.pageHeight(),
+        page_rect: QRectF = QRectF(0, 0, self.__page_layout.pageWidth(), self.__page_layout.pageHeight())
+        painter.fillRect(page_rect, self.__page_layout.pageColor())
+
+        if self.__page_layout.borderWidth() > 0:
+            border_rect: QRectF = QRectF(
+                self.__page_layout.pageLeftMargin() + self.__page_layout.borderWidth() / 2,
+                self.__page_layout.pageTopMargin() + self.__page_layout.borderWidth() / 2,
+                self.__page_layout.pageWidth()
+                - self.__page_layout.pageLeftMargin()
+                - self.__page_layout.pageRightMargin()
+                - self.__page_layout.borderWidth(),
+                self.__page_layout.pageHeight()
+                - self.__page_layout.pageTopMargin()
+                - self.__page_layout.pageBottomMargin()
+                - self.__page_layout.borderWidth(),
             )
-            clip = page_rect.intersected(rect)
-            painter.fillRect(clip, self.__page_layout.pageColor())
-
-            if self.__page_layout.borderWidth() > 0:
-                border_rect: QRectF = QRectF(
-                    self.__page_layout.pageXPosition(i)
-                    + self.__page_layout.pageLeftMargin()
-                    + self.__page_layout.borderWidth() / 2,
-                    self.__page_layout.pageYPosition(i)
-                    + self.__page_layout.pageTopMargin()
-                    + self.__page_layout.borderWidth() / 2,
-                    self.__page_layout.pageWidth()
-                    - self.__page_layout.pageLeftMargin()
-                    - self.__page_layout.pageRightMargin()
-                    - self.__page_layout.borderWidth(),
-                    self.__page_layout.pageHeight()
-                    - self.__page_layout.pageTopMargin()
-                    - self.__page_layout.pageBottomMargin()
-                    - self.__page_layout.borderWidth(),
-                )
-                painter.drawRect(border_rect)
+            painter.drawRect(border_rect)
 
-        painter.setPen(old_pen)
+        painter.end()
+
+        return self.__page_picture
 
     def paintText(self, context: DocumentPaintContext):
         painter: QPainter = context.painter
@@ -528,20 +749,20 @@ class TextDocumentLayout(QAbstractTextDocumentLayout):
         cursor_selection.format.setForeground(self.__cursor_selection_foreground_color)
         cursor_selection.format.setBackground(self.__cursor_selection_background_color)
 
-        for i in range(self.document().blockCount()):
+        # paint only blocks which intersect the rect
+        for i in self.__block_cache.findBlocks(rect.top(), rect.bottom()):
+            # skip, we have paintImage method
+            if self.__block_cache.isImage(i):
+                continue
+
             block: QTextBlock = self.document().findBlockByNumber(i)
+            if not block.isValid():
+                break
+
             block_layout: QTextLayout = block.layout()
             block_position: int = block.position()
             block_length: int = block.length()
 
-            # skip, we have paintImage method
-            it: QTextBlock.iterator = block.begin()
-            if it != block.end():
-                fragment: QTextFragment = it.fragment()
-
-                if fragment.charFormat().isImageFormat():
-                    continue
-
             format_ranges: list[QTextLayout.FormatRange] = []
 
             # show selections and hyperlinks
@@ -602,6 +823,7 @@ class TextDocumentLayout(QAbstractTextDocumentLayout):
 
     def paintImage(self, context: DocumentPaintContext):
         painter: QPainter = context.painter
+        rect: QRectF = context.rect
         cursor: QTextCursor = context.cursor
 
         old_pen: QPen = painter.pen()
@@ -614,9 +836,20 @@ class TextDocumentLayout(QAbstractTextDocumentLayout):
         pen.setJoinStyle(Qt.PenJoinStyle.MiterJoin)
         painter.setPen(pen)
 
-        for image_format in self.__image_layout:
-            image: QImage = self.document().resource(QTextDocument.ResourceType.ImageResource, image_format.name)
-            painter.drawImage(image_format.rect, image)
+        # images go in the same order as blocks, so paint only images which intersect the rect
+        first_image_index: int = bisect_left(self.__image_layout, rect.top(), key=lambda image: image.rect.bottom())
+        last_image_index: int = bisect_right(self.__image_layout, rect.bottom(), key=lambda image: image.rect.top())
+
+        for image_format in self.__image_layout[first_image_index:last_image_index]:
+            if not image_format.rect.intersects(rect):
+                continue
+
+            # image may be missing if it was damaged in the file
+            image: QImage | None = self.document().resource(
+                QTextDocument.ResourceType.ImageResource, image_format.name
+            )
+            if image is not None:
+                painter.drawImage(image_format.rect, image)
 
             # draw cursor
 
@@ -665,8 +898,11 @@ class TextDocumentLayout(QAbstractTextDocumentLayout):
 
     @Slot()
     def onPageLayoutInternalChanged(self) -> None:
-        self.documentChanged(0, 0, 0)
+        self.__page_picture = None
+        self.relayout()
 
     @Slot()
     def onPageLayoutExternalChanged(self) -> None:
-        self.documentChanged(0, 0, 0)
+        if not self.__is_page_count_changing:
+            self.__page_picture = None
+            self.relayout()
@@ -0,0 +1,77 @@
+import time
+from array import array
+
+from PySide6.QtCore import QObject, Signal, QThreadPool, QRegularExpression
+
+from core.editor.text_editor.match_table import MatchTable
+
+
+class TextSearcher(QObject):
+    # searches snapshots of the raw text of the document on its own threads, so long searches don't block the editor.
+    # matches are sent in batches, a search stops between blocks or every few matches of a long block
+    # when a newer one is started or it is cancelled.
+    # one match of a pathological expression is bounded by the match limit of PCRE2
+
+    matchesFound: Signal = Signal(int, object, object)  # search, starts, ends
+    searchFinished: Signal = Signal(int)  # search
+
+    def __init__(self) -> None:
+        super().__init__()
+
+        # a cancelled search may still finish its block, so the next one gets another thread
+        self.__thread_pool: QThreadPool = QThreadPool()
+        self.__thread_pool.setMaxThreadCount(2)
+
+        self.__search: int = 0  # the last search, the others are cancelled
+        self.__batch_time: float = 0.05  # s
+
+    def search(self, text: str, expr: QRegularExpression) -> int:
+        # blocks of the text are separated by paragraph separators like in QTextDocument.toRawText
+        self.__search += 1
+        search: int = self.__search
+
+        # every thread matches with its own copy
+        expr = QRegularExpression(expr)
+
+        self.__thread_pool.start(lambda: self.run(search, text, expr))
+
+        return search
+
+    def cancel(self) -> None:
+        self.__search += 1
+
+    def isCancelled(self, search: int) -> bool:
+        return search != self.__search
+
+    def stop(self) -> None:
+        self.cancel()
+        self.__thread_pool.waitForDone()
+
+    def run(self, search: int, text: str, expr: QRegularExpression) -> None:
+        starts: array = array("q")
+        ends: array = array("q")
+
+        position: int = 0
+        batch_end: float = time.perf_counter() + self.__batch_time
+
+        # QTextDocument.find searches non-breaking spaces as spaces
+        for block_text in text.replace("\u00a0", " ").split("\u2029"):
+            if self.isCancelled(search):
+                return
+
+            if not MatchTable.searchText(block_text, position, expr, starts, ends, lambda: self.isCancelled(search)):
+                return
+
+            position += MatchTable.utf16Length(block_text) + 1
+
+            if len(starts) > 0 and time.perf_counter() > batch_end:
+                self.matchesFound.emit(search, starts, ends)
+
+                starts = array("q")
+                ends = array("q")
+                batch_end = time.perf_counter() + self.__batch_time
+
+        if len(starts) > 0:
+            self.matchesFound.emit(search, starts, ends)
+
+        self.searchFinished.emit(search)
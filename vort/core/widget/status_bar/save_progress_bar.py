@@ -0,0 +1,17 @@
+from PySide6.QtWidgets import QWidget, QProgressBar
+
+
+class SaveProgressBar(QProgressBar):
+    # it is shown only while the document is being saved
+
+    def __init__(self, parent: QWidget | None = None) -> None:
+        super().__init__(parent)
+
+        self.setFixedWidth(100)
+        self.setTextVisible(False)
+        self.hide()
+
+    def setProgress(self, written_count: int, section_count: int) -> None:
+        self.setMaximum(section_count)
+        self.setValue(written_count)
+        self.setVisible(written_count < section_count)
@@ -52,6 +52,17 @@ class DocumentEditorWindow(QObject):
         self.ui.close_document_action.triggered.connect(self.closeDocument)
         self.ui.save_document_action.triggered.connect(self.saveDocument)
 
+        self.ui.text_editor.file_component.documentSaveProgressChanged.connect(self.ui.save_progress.setProgress)
+        self.ui.text_editor.file_component.documentSaved.connect(self.onDocumentSaved)
+        self.ui.text_editor.file_component.documentSaveFailed.connect(self.onDocumentSaveFailed)
+        self.ui.text_editor.file_component.documentRecovered.connect(self.onDocumentRecovered)
+        self.ui.text_editor.file_component.recoveryFailed.connect(self.onRecoveryFailed)
+        self.ui.text_editor.file_component.documentLoadProgressChanged.connect(self.onDocumentLoadProgressChanged)
+        self.ui.text_editor.file_component.documentLoaded.connect(self.ui.status_bar.clearMessage)
+        self.ui.text_editor.file_component.documentLoadFailed.connect(self.onDocumentLoadFailed)
+        self.ui.text_editor.file_component.documentDamaged.connect(self.onDocumentDamaged)
+        self.ui.text_editor.file_component.imageDamaged.connect(self.onImageDamaged)
+
         # history
 
         self.ui.undo_action.triggered.connect(self.undo)
@@ -184,6 +195,7 @@ class DocumentEditorWindow(QObject):
     @Slot()
     def closeApplication(self) -> None:
         self.closeDocument()
+        self.ui.text_editor.file_component.waitForSave()
         self.ui.close()
 
     @Slot()
@@ -219,11 +231,17 @@ class DocumentEditorWindow(QObject):
 
         filepath, _ = QFileDialog.getOpenFileName(filter="Vort file (*.vrt)", dir=resource_path("./vort/document"))
 
+        # dialog was canceled
+        if filepath == "":
+            return
+
         if self.filepath != filepath:
-            self.ui.text_editor.file_component.loadDocumentFile(filepath)
             self.filepath = filepath
             self.is_document_open = True
-            self.is_document_changed = False
+            self.ui.text_editor.file_component.loadDocumentFile(filepath)
+
+            # changes recovered from the journal aren't saved by the user
+            self.is_document_changed = self.ui.text_editor.file_component.isDocumentRecovered()
 
     @Slot()
     def closeDocument(self) -> None:
@@ -252,24 +270,99 @@ class DocumentEditorWindow(QObject):
                 filepath, _ = QFileDialog.getSaveFileName(
                     filter="Vort file (*.vrt)", dir=resource_path("./vort/document")
                 )
+
+                # dialog was canceled
+                if filepath == "":
+                    return
+
                 self.ui.text_editor.file_component.saveDocumentFile(filepath)
                 self.filepath = filepath
             else:
                 self.ui.text_editor.file_component.saveDocumentFile(self.filepath)
 
+            # document is written in background, changes are marked again if it fails
             self.is_document_changed = False
 
+    @Slot(str)
+    def onDocumentSaved(self, filepath: str) -> None:
+        self.ui.save_progress.hide()
+        self.ui.status_bar.showMessage(f"Saved {os.path.basename(filepath)}", 3000)
+
+    @Slot(str)
+    def onDocumentRecovered(self, filepath: str) -> None:
+        # journal of a progressively loaded document is replayed after the document is opened
+        self.is_document_changed = True
+        self.ui.status_bar.showMessage(f"Unsaved changes of {os.path.basename(filepath)} are recovered", 5000)
+
+    @Slot(str, str)
+    def onRecoveryFailed(self, filepath: str, error: str) -> None:
+        # recovery file is written in background, the document is still saved by the user
+        self.ui.status_bar.showMessage(f"{os.path.basename(filepath)} couldn't be updated: {error}", 5000)
+
+    @Slot(int, int)
+    def onDocumentLoadProgressChanged(self, loaded_count: int, block_count: int) -> None:
+        self.ui.status_bar.showMessage(f"Loading {loaded_count * 100 // max(block_count, 1)}%")
+
+    @Slot(str, str)
+    def onDocumentLoadFailed(self, filepath: str, error: str) -> None:
+        # previous document stays open, it isn't saved over the file which couldn't be opened
+        self.filepath = ""
+
+        message: QMessageBox = QMessageBox(
+            QMessageBox.Icon.Warning,
+            "File not opened",
+            f"{os.path.basename(filepath)} couldn't be opened: {error}",
+            QMessageBox.StandardButton.Ok,
+            self.ui,
+        )
+        message.exec()
+
+    @Slot(str, list)
+    def onDocumentDamaged(self, filepath: str, errors: list[str]) -> None:
+        errors_text: str = "\n".join(errors)
+
+        message: QMessageBox = QMessageBox(
+            QMessageBox.Icon.Warning,
+            "File damaged",
+            f"Some parts of {os.path.basename(filepath)} are damaged and were skipped, "
+            f"they won't be in the file when it is saved:\n{errors_text}",
+            QMessageBox.StandardButton.Ok,
+            self.ui,
+        )
+        message.exec()
+
+    @Slot(str)
+    def onImageDamaged(self, name: str) -> None:
+        # image is found damaged when it is painted, so it isn't reported in a message box
+        self.ui.status_bar.showMessage(f"Image {name} is damaged, it won't be saved with the document", 5000)
+
+    @Slot(str, str)
+    def onDocumentSaveFailed(self, filepath: str, error: str) -> None:
+        self.ui.save_progress.hide()
+
+        if filepath == self.filepath:
+            self.is_document_changed = True
+
+        message: QMessageBox = QMessageBox(
+            QMessageBox.Icon.Warning,
+            "File not saved",
+            f"{os.path.basename(filepath)} couldn't be saved: {error}",
+            QMessageBox.StandardButton.Ok,
+            self.ui,
+        )
+        message.exec()
+
     # history
 
     @Slot()
     def undo(self) -> None:
-        editor_context = self.ui.text_editor.context()
+        editor_context = self.ui.text_editor.editableContext()
         if editor_context is not None:
             editor_context.text_editor.context().history_component.undo()
 
     @Slot()
     def redo(self) -> None:
-        editor_context = self.ui.text_editor.context()
+        editor_context = self.ui.text_editor.editableContext()
         if editor_context is not None:
             editor_context.text_editor.context().history_component.redo()
 
@@ -277,7 +370,7 @@ class DocumentEditorWindow(QObject):
 
     @Slot()
     def cut(self) -> None:
-        editor_context = self.ui.text_editor.context()
+        editor_context = self.ui.text_editor.editableContext()
         if editor_context is not None:
             editor_context.text_editor.context().clipboard_component.cut()
 
@@ -289,13 +382,13 @@ class DocumentEditorWindow(QObject):
 
     @Slot()
     def paste(self) -> None:
-        editor_context = self.ui.text_editor.context()
+        editor_context = self.ui.text_editor.editableContext()
         if editor_context is not None:
             editor_context.text_editor.context().clipboard_component.paste()
 
     @Slot()
     def pastePlain(self) -> None:
-        editor_context = self.ui.text_editor.context()
+        editor_context = self.ui.text_editor.editableContext()
         if editor_context is not None:
             editor_context.text_editor.context().clipboard_component.pastePlain()
 
@@ -347,21 +440,22 @@ class DocumentEditorWindow(QObject):
 
     @Slot()
     def replace(self) -> None:
-        editor_context = self.ui.text_editor.context()
+        editor_context = self.ui.text_editor.editableContext()
         if editor_context is not None:
             editor_context.text_editor.context().finder_component.replace(self.ui.replace_line.replaceData())
 
     @Slot()
     def replaceAll(self) -> None:
-        editor_context = self.ui.text_editor.context()
+        editor_context = self.ui.text_editor.editableContext()
         if editor_context is not None:
-            editor_context.text_editor.context().finder_component.replaceAll(self.ui.replace_line.replaceData())
+            count: int = editor_context.text_editor.context().finder_component.replaceAll(self.ui.replace_line.replaceData())
+            self.ui.status_bar.showMessage(f"Replaced {count}", 3000)
 
     # insert
 
     @Slot()
     def insertImage(self) -> None:
-        editor_context: DocumentEditorContext | None = self.ui.text_editor.context()
+        editor_context: DocumentEditorContext | None = self.ui.text_editor.editableContext()
 
         if editor_context is None:
             return
@@ -380,7 +474,7 @@ class DocumentEditorWindow(QObject):
 
     @Slot()
     def insertHyperlink(self) -> None:
-        editor_context: DocumentEditorContext | None = self.ui.text_editor.context()
+        editor_context: DocumentEditorContext | None = self.ui.text_editor.editableContext()
 
         if editor_context is None:
             return
@@ -403,7 +497,7 @@ class DocumentEditorWindow(QObject):
 
     @Slot(str)
     def onUserFontFamilyChanged(self, font_family: str) -> None:
-        editor_context = self.ui.text_editor.context()
+        editor_context = self.ui.text_editor.editableContext()
         if editor_context is not None:
             self.ui.text_editor.blockSignals(True)
             editor_context.text_editor.context().char_component.setFontFamily(font_family)
@@ -415,7 +509,7 @@ class DocumentEditorWindow(QObject):
 
     @Slot(int)
     def onUserFontSizeChanged(self, font_size: int) -> None:
-        editor_context = self.ui.text_editor.context()
+        editor_context = self.ui.text_editor.editableContext()
         if editor_context is not None:
             self.ui.text_editor.blockSignals(True)
             editor_context.text_editor.context().char_component.setFontSize(font_size)
@@ -429,7 +523,7 @@ class DocumentEditorWindow(QObject):
 
     @Slot(bool)
     def onUserBoldTurned(self, is_bold) -> None:
-        editor_context = self.ui.text_editor.context()
+        editor_context = self.ui.text_editor.editableContext()
         if editor_context is not None:
             self.ui.text_editor.blockSignals(True)
             editor_context.text_editor.context().char_component.setBold(is_bold)
@@ -441,7 +535,7 @@ class DocumentEditorWindow(QObject):
 
     @Slot(bool)
     def onUserItalicTurned(self, is_italic) -> None:
-        editor_context = self.ui.text_editor.context()
+        editor_context = self.ui.text_editor.editableContext()
         if editor_context is not None:
             self.ui.text_editor.blockSignals(True)
             editor_context.text_editor.context().char_component.setItalic(is_italic)
@@ -453,7 +547,7 @@ class DocumentEditorWindow(QObject):
 
     @Slot(bool)
     def onUserUnderlinedTurned(self, is_underlined) -> None:
-        editor_context = self.ui.text_editor.context()
+        editor_context = self.ui.text_editor.editableContext()
         if editor_context is not None:
             self.ui.text_editor.blockSignals(True)
             editor_context.text_editor.context().char_component.setUnderlined(is_underlined)
@@ -467,7 +561,7 @@ class DocumentEditorWindow(QObject):
 
     @Slot(QColor)
     def onUserForegroundColorChanged(self, color: QColor) -> None:
-        editor_context = self.ui.text_editor.context()
+        editor_context = self.ui.text_editor.editableContext()
         if editor_context is not None:
             self.ui.text_editor.blockSignals(True)
             editor_context.text_editor.context().char_component.setForegroundColor(color)
@@ -479,7 +573,7 @@ class DocumentEditorWindow(QObject):
 
     @Slot(QColor)
     def onUserBackgroundColorChanged(self, color: QColor) -> None:
-        editor_context = self.ui.text_editor.context()
+        editor_context = self.ui.text_editor.editableContext()
         if editor_context is not None:
             self.ui.text_editor.blockSignals(True)
             editor_context.text_editor.context().char_component.setBackgroundColor(color)
@@ -493,7 +587,7 @@ class DocumentEditorWindow(QObject):
 
     @Slot(Qt.AlignmentFlag)
     def onUserParagraphAlignmentChanged(self, alignment: Qt.AlignmentFlag) -> None:
-        editor_context = self.ui.text_editor.context()
+        editor_context = self.ui.text_editor.editableContext()
         if editor_context is not None:
             self.ui.text_editor.blockSignals(True)
             editor_context.text_editor.context().paragraph_component.setAlignment(alignment)
@@ -521,7 +615,7 @@ class DocumentEditorWindow(QObject):
 
     @Slot(float)
     def onUserFirstLineIndentChanged(self, indent: float) -> None:
-        editor_context = self.ui.text_editor.context()
+        editor_context = self.ui.text_editor.editableContext()
         if editor_context is not None:
             self.ui.text_editor.blockSignals(True)
             editor_context.text_editor.context().paragraph_component.setFirstLineIndent(indent)
@@ -529,7 +623,7 @@ class DocumentEditorWindow(QObject):
 
     @Slot(int)
     def onUserIndentChanged(self, indent: int) -> None:
-        editor_context = self.ui.text_editor.context()
+        editor_context = self.ui.text_editor.editableContext()
         if editor_context is not None:
             self.ui.text_editor.blockSignals(True)
             editor_context.text_editor.context().paragraph_component.setIndent(indent)
@@ -537,7 +631,7 @@ class DocumentEditorWindow(QObject):
 
     @Slot()
     def indentRight(self) -> None:
-        editor_context = self.ui.text_editor.context()
+        editor_context = self.ui.text_editor.editableContext()
         if editor_context is not None:
             self.ui.text_editor.blockSignals(True)
             editor_context.text_editor.context().paragraph_component.indentRight()
@@ -545,7 +639,7 @@ class DocumentEditorWindow(QObject):
 
     @Slot()
     def indentLeft(self) -> None:
-        editor_context = self.ui.text_editor.context()
+        editor_context = self.ui.text_editor.editableContext()
         if editor_context is not None:
             self.ui.text_editor.blockSignals(True)
             editor_context.text_editor.context().paragraph_component.indentLeft()
@@ -555,7 +649,7 @@ class DocumentEditorWindow(QObject):
 
     @Slot(float)
     def onUserIndentStepChanged(self, step: float) -> None:
-        editor_context = self.ui.text_editor.context()
+        editor_context = self.ui.text_editor.editableContext()
         if editor_context is not None:
             self.ui.text_editor.blockSignals(True)
             editor_context.text_editor.context().layout.setIndentStep(step)
@@ -563,7 +657,7 @@ class DocumentEditorWindow(QObject):
 
     @Slot(float)
     def onUserLineSpacingChanged(self, spacing: float) -> None:
-        editor_context = self.ui.text_editor.context()
+        editor_context = self.ui.text_editor.editableContext()
         if editor_context is not None:
             self.ui.text_editor.blockSignals(True)
             editor_context.text_editor.context().paragraph_component.setLineSpacing(spacing)
@@ -596,7 +690,7 @@ class DocumentEditorWindow(QObject):
 
     @Slot(float)
     def onUserParagraphTopMarginChanged(self, margin: float) -> None:
-        editor_context = self.ui.text_editor.context()
+        editor_context = self.ui.text_editor.editableContext()
         if editor_context is not None:
             self.ui.text_editor.blockSignals(True)
             editor_context.text_editor.context().paragraph_component.setTopMargin(margin)
@@ -604,7 +698,7 @@ class DocumentEditorWindow(QObject):
 
     @Slot(float)
     def onUserParagraphBottomMarginChanged(self, margin: float) -> None:
-        editor_context = self.ui.text_editor.context()
+        editor_context = self.ui.text_editor.editableContext()
         if editor_context is not None:
             self.ui.text_editor.blockSignals(True)
             editor_context.text_editor.context().paragraph_component.setBottomMargin(margin)
@@ -612,7 +706,7 @@ class DocumentEditorWindow(QObject):
 
     @Slot(float)
     def onUserParagraphLeftMarginChanged(self, margin: float) -> None:
-        editor_context = self.ui.text_editor.context()
+        editor_context = self.ui.text_editor.editableContext()
         if editor_context is not None:
             self.ui.text_editor.blockSignals(True)
             editor_context.text_editor.context().paragraph_component.setLeftMargin(margin)
@@ -620,7 +714,7 @@ class DocumentEditorWindow(QObject):
 
     @Slot(float)
     def onUserParagraphRightMarginChanged(self, margin: float) -> None:
-        editor_context = self.ui.text_editor.context()
+        editor_context = self.ui.text_editor.editableContext()
         if editor_context is not None:
             self.ui.text_editor.blockSignals(True)
             editor_context.text_editor.context().paragraph_component.setRightMargin(margin)
@@ -640,7 +734,7 @@ class DocumentEditorWindow(QObject):
 
     @Slot()
     def applyStyle(self) -> None:
-        editor_context = self.ui.text_editor.context()
+        editor_context = self.ui.text_editor.editableContext()
         if editor_context is not None:
             self.ui.text_editor.blockSignals(True)
             editor_context.text_editor.context().text_style_component.setTextStyle(self.ui.style_combo_box.style())
@@ -648,7 +742,7 @@ class DocumentEditorWindow(QObject):
 
     @Slot()
     def clearStyle(self) -> None:
-        editor_context = self.ui.text_editor.context()
+        editor_context = self.ui.text_editor.editableContext()
         if editor_context is not None:
             self.ui.text_editor.blockSignals(True)
             editor_context.text_editor.context().text_style_component.clearTextStyle()
@@ -740,7 +834,7 @@ class DocumentEditorWindow(QObject):
 
     @Slot(SettingsContext)
     def onSettingsApplied(self, context: SettingsContext) -> None:
-        editor_context: DocumentEditorContext | None = self.ui.text_editor.context()
+        editor_context: DocumentEditorContext | None = self.ui.text_editor.editableContext()
 
         if editor_context is None:
             return
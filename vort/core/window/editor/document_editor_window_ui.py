@@ -10,6 +10,7 @@ from core.widget.status_bar.char_count_label import CharCountLabel
 from core.widget.status_bar.zoom_slider import ZoomSlider
 from core.widget.status_bar.find_line import FindLine
 from core.widget.status_bar.reaplce_line import ReplaceLine
+from core.widget.status_bar.save_progress_bar import SaveProgressBar
 
 from core.widget.text_style.text_style_combo_box import TextStyleComboBox
 
@@ -247,6 +248,10 @@ class DocumentEditorWindowUI(QMainWindow):
 
         self.zoom_slider: ZoomSlider = ZoomSlider(self)
 
+        # save
+
+        self.save_progress: SaveProgressBar = SaveProgressBar(self)
+
     def setupMenuBar(self) -> None:
         self.menu_bar = QMenuBar()
 
@@ -359,6 +364,7 @@ class DocumentEditorWindowUI(QMainWindow):
         self.status_bar.addPermanentWidget(self.find_line)
         self.status_bar.addPermanentWidget(self.replace_line)
         self.status_bar.addPermanentWidget(QWidget(), 1)
+        self.status_bar.addPermanentWidget(self.save_progress)
         self.status_bar.addPermanentWidget(self.character_count)
         self.status_bar.addPermanentWidget(self.zoom_slider)
 
@@ -0,0 +1,82 @@
+# finds and replaces text in .vrt files without opening them in the editor
+#
+# run from the vort directory:
+# python find_replace.py "lorem" --replace "ipsum" ./vort/document/
+
+import argparse
+import os
+import time
+
+from core.editor.document_finder import DocumentFinder, DocumentFinderResult
+
+from core.util import resource_path
+
+
+def documentFilepaths(paths: list[str]) -> list[str]:
+    # files of directories are taken without subdirectories
+    filepaths: list[str] = []
+
+    for path in paths:
+        if os.path.isdir(path):
+            filepaths.extend(
+                os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith(".vrt")
+            )
+        else:
+            filepaths.append(path)
+
+    return filepaths
+
+
+def main() -> None:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser()
+    parser.add_argument("find", help="text or regular expression to find")
+    parser.add_argument("paths", nargs="*", default=[resource_path("./vort/document/")], help=".vrt files or directories")
+    parser.add_argument("--replace", default=None, help="replacement, \\1 is a captured group in regex mode")
+    parser.add_argument("--regex", action="store_true", help="find a regular expression")
+    parser.add_argument("--case", action="store_true", help="match case")
+    parser.add_argument("--whole", action="store_true", help="match whole words")
+    parser.add_argument("--processes", type=int, default=None, help="number of processes, all cores by default")
+    args = parser.parse_intermixed_args()
+
+    finder: DocumentFinder = DocumentFinder(args.find, args.regex, args.case, args.whole)
+    if args.find == "" or not finder.expr().isValid():
+        parser.error(f"pattern {args.find!r} isn't valid")
+
+    # paths which don't exist aren't searched, e.g. the document directory before the editor was opened
+    missing_paths: list[str] = [path for path in args.paths if not os.path.exists(path)]
+    if missing_paths:
+        parser.error(f"{', '.join(missing_paths)} not found")
+
+    filepaths: list[str] = documentFilepaths(args.paths)
+
+    match_count: int = 0
+    replaced_count: int = 0
+    failed_count: int = 0
+
+    start: float = time.perf_counter()
+
+    result: DocumentFinderResult
+    for result in finder.findFiles(filepaths, args.replace, args.processes):
+        if result.error != "":
+            print(f"{result.filepath}: {result.error}")
+            failed_count += 1
+
+        elif result.matchCount() > 0:
+            if args.replace is not None:
+                print(f"{result.filepath}: {result.replaced_count} replaced")
+            else:
+                print(f"{result.filepath}: {result.matchCount()} matches")
+
+        match_count += result.matchCount()
+        replaced_count += result.replaced_count
+
+    duration: float = time.perf_counter() - start
+
+    print(
+        f"{len(filepaths)} documents, {match_count} matches, {replaced_count} replaced, {failed_count} failed "
+        f"in {duration:.2f} s, {len(filepaths) / max(duration, 1e-9):.1f} documents/s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import gc
+import os
+import sys
+import time
+from typing import Callable
+
+import pytest
+
+# editors are created without a display, modules are imported from the vort directory like in main.py
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PySide6.QtCore import QCoreApplication
+from PySide6.QtWidgets import QApplication
+
+from core.editor.document_editor.component.file_component import FileComponent
+from core.editor.document_editor.document_editor import DocumentEditor
+from core.editor.document_editor.document_editor_context import DocumentEditorContext
+from core.editor.document_file import DocumentFile
+
+
+@pytest.fixture(scope="session")
+def app() -> QApplication:
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture(autouse=True)
+def collect_garbage() -> None:
+    # documents, layouts and their components reference each other, so they are freed by the collector.
+    # it is run after every test, so they aren't destroyed in the middle of the next test's layout
+    yield
+    gc.collect()
+
+
+@pytest.fixture
+def process_events(app: QApplication) -> Callable[[float], None]:
+    # runs the event loop for the duration in seconds, so timers and queued signals are delivered
+
+    def processEvents(duration: float) -> None:
+        end: float = time.perf_counter() + duration
+        while time.perf_counter() < end:
+            QCoreApplication.processEvents()
+
+    return processEvents
+
+
+@pytest.fixture
+def editor(process_events: Callable[[float], None]) -> DocumentEditor:
+    # shown editor with a default document and a few lines of text
+    editor: DocumentEditor = DocumentEditor()
+    editor.ui.resize(900, 700)
+    editor.ui.show()
+    editor.file_component.setDocumentFile(DocumentFile.default_file())
+    editor.context().text_editor.context().cursor.insertText("lorem ipsum " * 200)
+
+    process_events(0.2)
+
+    yield editor
+
+    editor.file_component.closeDocumentFile()
+
+
+@pytest.fixture
+def make_file_component(app: QApplication) -> Callable[[], tuple[FileComponent, list[DocumentEditorContext]]]:
+    # file component without an editor and the contexts it has created, they are closed after the test
+    file_components: list[FileComponent] = []
+
+    def makeFileComponent() -> tuple[FileComponent, list[DocumentEditorContext]]:
+        file_component: FileComponent = FileComponent()
+        # documents are loaded at once unless a test turns the progressive load on
+        file_component.setProgressiveLoadTurned(False)
+
+        contexts: list[DocumentEditorContext] = []
+        file_component.contextChanged.connect(contexts.append)
+
+        file_components.append(file_component)
+        return file_component, contexts
+
+    yield makeFileComponent
+
+    for file_component in file_components:
+        file_component.stopWriter()
+        file_component.closeDocumentFile()
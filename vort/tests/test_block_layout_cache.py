@@ -0,0 +1,80 @@
+from array import array
+
+from core.editor.text_editor.block_layout_cache import BlockLayoutCache, LayoutState
+
+
+def makeCache(bottoms: list[float]) -> BlockLayoutCache:
+    cache: BlockLayoutCache = BlockLayoutCache()
+    cache.replace(0, -1, len(bottoms))
+
+    top: float = 0.0
+    for i, bottom in enumerate(bottoms):
+        cache.setBlock(i, 0, top, bottom, 1, 10 + i, False)
+        top = bottom
+
+    return cache
+
+
+def test_find_block_returns_first_block_not_above_point() -> None:
+    cache: BlockLayoutCache = makeCache([10.0, 20.0, 30.0, 40.0])
+
+    assert cache.findBlock(-5.0) == 0
+    assert cache.findBlock(5.0) == 0
+    assert cache.findBlock(10.0) == 0
+    assert cache.findBlock(10.5) == 1
+    assert cache.findBlock(39.0) == 3
+    assert cache.findBlock(45.0) == cache.blockCount()
+
+
+def test_replace_keeps_records_around_replaced_blocks() -> None:
+    cache: BlockLayoutCache = makeCache([10.0, 20.0, 30.0, 40.0])
+
+    cache.replace(1, 2, 3)
+
+    assert cache.blockCount() == 5
+    assert list(cache.character_counts) == [10, 0, 0, 0, 13]
+    assert cache.characterCount() == 23
+    assert cache.characterCount(0, 1) == 10
+
+    cache.clear()
+
+    assert cache.blockCount() == 0
+    assert cache.characterCount() == 0
+
+
+def test_state_round_trip() -> None:
+    cache: BlockLayoutCache = makeCache([10.0, 20.0])
+
+    state: LayoutState = LayoutState()
+    state.root_x = 1.5
+    state.root_y = 2.5
+    state.remaining_text_height = 3.5
+    state.page_count = 4
+    cache.setState(1, state)
+
+    assert cache.state(1).isEqual(state)
+    assert not cache.state(0).isEqual(state)
+
+
+def test_find_blocks_returns_blocks_intersecting_range() -> None:
+    cache: BlockLayoutCache = makeCache([10.0, 20.0, 30.0, 40.0])
+
+    assert cache.findBlocks(12.0, 25.0) == range(1, 3)
+    assert cache.findBlocks(20.0, 20.0) == range(1, 3)
+    assert cache.findBlocks(-10.0, -5.0) == range(0, 0)
+    assert cache.findBlocks(50.0, 60.0) == range(4, 4)
+
+
+def test_find_line_bisects_lines_of_block() -> None:
+    cache: BlockLayoutCache = makeCache([30.0])
+    cache.line_counts[0] = 3
+    cache.setLines(0, array("d", [10.0, 20.0, 30.0]), array("i", [5, 12, 20]))
+
+    assert cache.findLine(0, 0.0) == 0
+    assert cache.findLine(0, 15.0) == 1
+    assert cache.findLine(0, 35.0) == 3
+
+    assert cache.findLineByPosition(0, 0) == 0
+    assert cache.findLineByPosition(0, 4) == 0
+    assert cache.findLineByPosition(0, 5) == 1
+    assert cache.findLineByPosition(0, 20) == 2
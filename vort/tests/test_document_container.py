@@ -0,0 +1,97 @@
+import pytest
+
+from core.editor.document_container import (
+    DocumentContainer,
+    DocumentContainerError,
+    DocumentContainerReader,
+    DocumentContainerWriter,
+    Section,
+    SectionCodec,
+    SectionKind,
+)
+
+
+def writeContainer(filepath: str) -> dict[str, Section]:
+    with DocumentContainerWriter(filepath) as writer:
+        return {
+            "settings": writer.addSection(SectionKind.Settings, "settings", b'{"page_width": 21}', SectionCodec.Lzma),
+            "text": writer.addSection(SectionKind.Text, "text", b"<p>text</p>" * 100, SectionCodec.Lzma),
+            "a.png": writer.addSection(SectionKind.Image, "a.png", b"a" * 64, SectionCodec.Raw),
+            "b.png": writer.addSection(SectionKind.Image, "b.png", b"b" * 64, SectionCodec.Raw),
+        }
+
+
+def damage(filepath: str, offset: int) -> None:
+    with open(filepath, "r+b") as f:
+        f.seek(offset)
+        byte: bytes = f.read(1)
+        f.seek(offset)
+        f.write(bytes([byte[0] ^ 0xFF]))
+
+
+def test_sections_round_trip(tmp_path) -> None:
+    filepath: str = str(tmp_path / "document.vrt")
+    writeContainer(filepath)
+
+    assert DocumentContainer.isContainer(filepath)
+
+    with DocumentContainerReader(filepath) as reader:
+        assert [section.name for section in reader.sections(SectionKind.Image)] == ["a.png", "b.png"]
+        assert reader.readSection(reader.section(SectionKind.Text, "text")) == b"<p>text</p>" * 100
+        assert reader.readSection(reader.section(SectionKind.Image, "b.png")) == b"b" * 64
+        assert reader.section(SectionKind.Image, "c.png") is None
+
+
+def test_damaged_section_leaves_others_readable(tmp_path) -> None:
+    filepath: str = str(tmp_path / "document.vrt")
+    sections: dict[str, Section] = writeContainer(filepath)
+
+    damage(filepath, sections["a.png"].offset + 10)
+
+    with DocumentContainerReader(filepath) as reader:
+        with pytest.raises(DocumentContainerError):
+            reader.readSection(reader.section(SectionKind.Image, "a.png"))
+
+        assert reader.readSection(reader.section(SectionKind.Image, "b.png")) == b"b" * 64
+        assert reader.readSection(reader.section(SectionKind.Text, "text")) == b"<p>text</p>" * 100
+
+
+def test_damaged_table_of_contents_is_rejected(tmp_path) -> None:
+    filepath: str = str(tmp_path / "document.vrt")
+    sections: dict[str, Section] = writeContainer(filepath)
+
+    damage(filepath, sections["b.png"].offset + sections["b.png"].size + 2)
+
+    with pytest.raises(DocumentContainerError):
+        DocumentContainerReader(filepath)
+
+
+def test_file_which_isnt_container_is_rejected(tmp_path) -> None:
+    filepath: str = str(tmp_path / "document.vrt")
+    with open(filepath, "wb") as f:
+        f.write(b"not a container at all, just some bytes")
+
+    assert not DocumentContainer.isContainer(filepath)
+
+    with pytest.raises(DocumentContainerError):
+        DocumentContainerReader(filepath)
+
+
+@pytest.mark.parametrize(
+    "codec, level",
+    [(SectionCodec.Raw, None), (SectionCodec.Zlib, 1), (SectionCodec.Zlib, None), (SectionCodec.Lzma, 0)],
+)
+def test_section_codecs_round_trip(tmp_path, codec: SectionCodec, level: int | None) -> None:
+    filepath: str = str(tmp_path / "document.vrt")
+    data: bytes = b"<p>text</p>" * 1000
+
+    with DocumentContainerWriter(filepath) as writer:
+        writer.addSection(SectionKind.Text, "text", data, codec, level)
+
+    with DocumentContainerReader(filepath) as reader:
+        section: Section = reader.section(SectionKind.Text, "text")
+
+        assert section.codec == codec
+        assert reader.readSection(section) == data
+        if codec != SectionCodec.Raw:
+            assert section.size < len(data)
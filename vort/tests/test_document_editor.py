@@ -0,0 +1,128 @@
+from typing import Callable
+
+import pytest
+from PySide6.QtCore import Qt, QEvent, QRect, QRectF
+from PySide6.QtGui import QKeyEvent, QTextCursor
+
+from core.editor.document_editor.document_editor import DocumentEditor
+from core.editor.text_editor.text_document_context import TextDocumentContext
+
+
+def invalidatedRects(editor: DocumentEditor, monkeypatch: pytest.MonkeyPatch) -> list[QRectF]:
+    rects: list[QRectF] = []
+    monkeypatch.setattr(editor, "invalidate", rects.append)
+    return rects
+
+
+def test_repaint_request_without_cursor_change_repaints_viewport(
+    editor: DocumentEditor, process_events: Callable[[float], None], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    text_context: TextDocumentContext = editor.context().text_editor.context()
+
+    # cursor is painted where it is
+    text_context.finder_component.repaintRequest.emit()
+    process_events(0.1)
+
+    rects: list[QRectF] = invalidatedRects(editor, monkeypatch)
+
+    # e.g. highlighting of the finder is changed
+    text_context.finder_component.repaintRequest.emit()
+
+    assert rects == [editor.visibleRect()]
+    assert not editor.visibleRect().isEmpty()
+
+
+def test_cursor_move_repaints_cursor_lines(
+    editor: DocumentEditor, process_events: Callable[[float], None], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    text_context: TextDocumentContext = editor.context().text_editor.context()
+
+    text_context.cursor.setPosition(0)
+    text_context.finder_component.repaintRequest.emit()
+    process_events(0.1)
+
+    rects: list[QRectF] = invalidatedRects(editor, monkeypatch)
+
+    text_context.cursor.setPosition(1)
+    text_context.finder_component.repaintRequest.emit()
+
+    assert len(rects) == 1
+    assert 0 < rects[0].height() < editor.visibleRect().height() / 2
+
+
+def test_only_pages_near_viewport_have_items(editor: DocumentEditor, process_events: Callable[[float], None]) -> None:
+    text_context: TextDocumentContext = editor.context().text_editor.context()
+    for _ in range(300):
+        text_context.cursor.insertBlock()
+        text_context.cursor.insertText("lorem ipsum " * 10)
+
+    process_events(0.2)
+
+    page_count: int = editor.context().page_layout.pageCount()
+    assert page_count > 10
+    assert 0 < editor.context().canvas.pageItemCount() <= 3
+
+    editor.ui.verticalScrollBar().setValue(editor.ui.verticalScrollBar().maximum())
+    process_events(0.1)
+
+    page_indexes: list[int] = [item.index() for item in editor.context().canvas.childItems()]
+    assert page_count - 1 in page_indexes
+    assert 0 not in page_indexes
+    assert 0 < editor.context().canvas.pageItemCount() <= 3
+
+
+def test_document_is_read_only_while_loading(
+    editor: DocumentEditor, process_events: Callable[[float], None], tmp_path
+) -> None:
+    filepath: str = str(tmp_path / "long.vrt")
+
+    editor.context().text_editor.context().cursor.insertText("lorem ipsum dolor sit amet\n" * 5000)
+    editor.file_component.saveDocumentFile(filepath)
+    editor.file_component.waitForSave()
+
+    # unsaved change of the last session is replayed when the document is loaded
+    text_cursor: QTextCursor = QTextCursor(editor.context().text_editor.context().document)
+    text_cursor.insertText("consectetur ")
+    text: str = editor.context().text_editor.context().document.toPlainText()
+    editor.file_component.closeJournal(False)
+
+    editor.file_component.loadDocumentFile(filepath)
+    assert editor.file_component.isLoading()
+    assert editor.editableContext() is None
+
+    # the cursor moves, but nothing is typed
+    text_context: TextDocumentContext = editor.context().text_editor.context()
+    editor.onKeyPressed(QKeyEvent(QEvent.Type.KeyPress, Qt.Key.Key_Right, Qt.KeyboardModifier.NoModifier))
+    editor.onKeyPressed(QKeyEvent(QEvent.Type.KeyPress, Qt.Key.Key_X, Qt.KeyboardModifier.NoModifier, "x"))
+
+    while editor.file_component.isLoading():
+        process_events(0.01)
+
+    assert text_context.document.toPlainText() == text
+    assert editor.file_component.isDocumentRecovered()
+    assert editor.editableContext() is editor.context()
+
+    editor.onKeyPressed(QKeyEvent(QEvent.Type.KeyPress, Qt.Key.Key_X, Qt.KeyboardModifier.NoModifier, "x"))
+    assert text_context.document.toPlainText() != text
+
+    editor.file_component.stopWriter()
+
+
+def test_visible_tiles_fit_the_budget_when_zoomed(
+    editor: DocumentEditor, process_events: Callable[[float], None], monkeypatch
+) -> None:
+    canvas = editor.context().canvas
+    canvas.tileCache().setMemoryBudget(1)
+    editor.ui.setZoomFactor(3)
+    process_events(0.2)
+
+    assert canvas.tileCache().memoryBudget() >= 2 * canvas.tileCache().visibleMemory() > 0
+    assert canvas.tileCache().tileCount() > 0
+
+    rendered: list[QRect] = []
+    render_tile = canvas.renderTile
+    monkeypatch.setattr(canvas, "renderTile", lambda rect, scale: rendered.append(rect) or render_tile(rect, scale))
+    editor.ui.viewport().update()
+    process_events(0.2)
+
+    assert rendered == []
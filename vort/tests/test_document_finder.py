@@ -0,0 +1,121 @@
+from PySide6.QtCore import QRegularExpression
+from PySide6.QtGui import QFont, QTextBlock, QTextCharFormat, QTextCursor, QTextDocument
+from PySide6.QtWidgets import QApplication
+
+from core.editor.document_file import DocumentFile
+from core.editor.document_finder import DocumentFinder, DocumentFinderResult
+from core.editor.document_model import DocumentModel
+from core.editor.document_writer import DocumentWriter
+from core.editor.text_editor.match_table import MatchTable
+
+
+def makeDocument() -> QTextDocument:
+    # characters out of the bmp are before matches, and a match crosses runs of different formats
+    document: QTextDocument = QTextDocument()
+    cursor: QTextCursor = QTextCursor(document)
+
+    bold: QTextCharFormat = QTextCharFormat()
+    bold.setFontWeight(QFont.Weight.Bold)
+
+    cursor.insertText("\U0001f600 cat dog", QTextCharFormat())
+    cursor.insertBlock()
+    cursor.insertText("\U0001f600\U0001f600 ", QTextCharFormat())
+    cursor.insertText("ca", bold)
+    cursor.insertText("t \U0001f600cat", QTextCharFormat())
+
+    return document
+
+
+def test_matches_after_surrogate_pairs_are_found_like_in_the_editor(app: QApplication) -> None:
+    document: QTextDocument = makeDocument()
+
+    table: MatchTable = MatchTable()
+    table.build(document, QRegularExpression("cat"))
+
+    starts, ends = DocumentFinder("cat").findModel(DocumentModel.fromDocument(document))
+
+    assert list(starts) == list(table.starts)
+    assert list(ends) == list(table.ends)
+
+
+def test_matches_after_surrogate_pairs_are_replaced(app: QApplication) -> None:
+    model: DocumentModel = DocumentModel.fromDocument(makeDocument())
+
+    assert DocumentFinder("cat").replaceModel(model, "bird") == 3
+
+    document: QTextDocument = QTextDocument()
+    model.insert(QTextCursor(document))
+
+    assert document.toPlainText() == "\U0001f600 bird dog\n\U0001f600\U0001f600 bird \U0001f600bird"
+
+    # replacement takes the format of the last replaced character, which isn't bold
+    block: QTextBlock = document.begin()
+    while block.isValid():
+        for it in block:
+            assert it.fragment().charFormat().fontWeight() != QFont.Weight.Bold
+
+        block = block.next()
+
+
+def test_file_with_unsaved_changes_of_the_editor_isnt_replaced(app: QApplication, tmp_path) -> None:
+    filepath: str = str(tmp_path / "recovered.vrt")
+
+    file: DocumentFile = DocumentFile.default_file()
+    file.text_model = DocumentModel.fromDocument(makeDocument())
+    DocumentWriter().writeDocumentFile(filepath, file)
+
+    with open(filepath, "rb") as f:
+        data: bytes = f.read()
+
+    # the editor checkpointed its changes, they would be replayed on top of the replaced text
+    with open(f"{filepath}.recovery", "wb") as f:
+        f.write(data)
+
+    result: DocumentFinderResult = DocumentFinder("cat").findFile(filepath, "bird")
+
+    assert result.matchCount() == 3
+    assert result.replaced_count == 0
+    assert result.error != ""
+
+    with open(filepath, "rb") as f:
+        assert f.read() == data
+
+
+def test_replaced_file_is_written_and_found_again(app: QApplication, tmp_path) -> None:
+    filepaths: list[str] = [str(tmp_path / f"{i}.vrt") for i in range(3)]
+
+    for i, filepath in enumerate(filepaths):
+        document: QTextDocument = QTextDocument()
+        document.setPlainText("lorem ipsum\n" * i + "dolor")
+
+        file: DocumentFile = DocumentFile.default_file()
+        file.text_model = DocumentModel.fromDocument(document)
+        DocumentWriter().writeDocumentFile(filepath, file)
+
+    finder: DocumentFinder = DocumentFinder("(\\w+) ipsum", is_regex_turned=True)
+    results: list[DocumentFinderResult] = list(finder.findFiles(filepaths, "ipsum \\1", process_count=1))
+
+    assert [result.filepath for result in results] == filepaths
+    assert [result.replaced_count for result in results] == [0, 1, 2]
+    assert all(result.error == "" for result in results)
+
+    document = QTextDocument()
+    DocumentFinder.readDocumentFile(filepaths[2]).text_model.insert(QTextCursor(document))
+    assert document.toPlainText() == "ipsum lorem\nipsum lorem\ndolor"
+
+    assert [result.matchCount() for result in finder.findFiles(filepaths, process_count=1)] == [0, 0, 0]
+
+
+def test_damaged_file_is_reported_and_not_written(app: QApplication, tmp_path) -> None:
+    filepath: str = str(tmp_path / "damaged.vrt")
+
+    with open(filepath, "wb") as f:
+        f.write(b"not a document")
+
+    result: DocumentFinderResult = DocumentFinder("lorem").findFile(filepath, "ipsum")
+
+    assert result.error != ""
+    assert result.replaced_count == 0
+
+    with open(filepath, "rb") as f:
+        assert f.read() == b"not a document"
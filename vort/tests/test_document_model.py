@@ -0,0 +1,104 @@
+import pytest
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QColor, QFont, QTextBlockFormat, QTextCharFormat, QTextCursor, QTextDocument
+from PySide6.QtWidgets import QApplication
+
+from core.editor.document_model import DocumentModel, DocumentModelError
+
+
+def makeDocument() -> QTextDocument:
+    document: QTextDocument = QTextDocument()
+    cursor: QTextCursor = QTextCursor(document)
+
+    bold: QTextCharFormat = QTextCharFormat()
+    bold.setFontWeight(QFont.Weight.Bold)
+
+    colored: QTextCharFormat = QTextCharFormat()
+    colored.setForeground(QColor("red"))
+
+    right: QTextBlockFormat = QTextBlockFormat()
+    right.setAlignment(Qt.AlignmentFlag.AlignRight)
+
+    indented: QTextBlockFormat = QTextBlockFormat()
+    indented.setIndent(2)
+
+    cursor.insertText("lorem ")
+    cursor.insertText("ipsum", bold)
+    cursor.insertBlock(right, colored)
+    cursor.insertText("\U0001f600 dolor", colored)
+    cursor.insertBlock(indented)
+    cursor.insertBlock(QTextBlockFormat())
+    cursor.insertText("sit ")
+    cursor.insertText("amet", bold)
+
+    return document
+
+
+def blocksOf(document: QTextDocument) -> list[tuple]:
+    # text and formats of every block and fragment
+    blocks: list[tuple] = []
+
+    block = document.begin()
+    while block.isValid():
+        fragments: list[tuple] = []
+
+        it = block.begin()
+        while not it.atEnd():
+            fragments.append((it.fragment().text(), it.fragment().charFormat()))
+            it += 1
+
+        blocks.append((block.blockFormat(), block.charFormat(), fragments))
+        block = block.next()
+
+    return blocks
+
+
+def test_document_round_trips_through_bytes(app: QApplication) -> None:
+    document: QTextDocument = makeDocument()
+
+    model: DocumentModel = DocumentModel.fromBytes(DocumentModel.fromDocument(document).toBytes())
+
+    loaded: QTextDocument = QTextDocument()
+    model.insert(QTextCursor(loaded))
+
+    assert loaded.toPlainText() == document.toPlainText()
+    assert blocksOf(loaded) == blocksOf(document)
+
+
+def test_formats_are_shared_between_runs(app: QApplication) -> None:
+    model: DocumentModel = DocumentModel.fromDocument(makeDocument())
+
+    # bold runs of the first and the last block refer to the same format
+    assert len(model.formats) < len(model.runs) // 2 + len(model.blocks) // 3 * 2
+    assert len(model.blocks) // 3 == 4
+
+
+def test_blocks_replace_blocks_at_cursor(app: QApplication) -> None:
+    document: QTextDocument = makeDocument()
+    model: DocumentModel = DocumentModel.fromBlocks(document.findBlockByNumber(1), document.findBlockByNumber(2))
+
+    target: QTextDocument = QTextDocument()
+    cursor: QTextCursor = QTextCursor(target)
+    model.insert(cursor)
+
+    # first block takes the formats of the model
+    assert target.blockCount() == 2
+    assert blocksOf(target) == blocksOf(document)[1:3]
+
+
+@pytest.mark.parametrize("size", [0, 10, 30])
+def test_truncated_bytes_are_rejected(app: QApplication, size: int) -> None:
+    data: bytes = DocumentModel.fromDocument(makeDocument()).toBytes()
+
+    with pytest.raises(DocumentModelError):
+        DocumentModel.fromBytes(data[:size])
+
+
+def test_other_data_is_rejected(app: QApplication) -> None:
+    data: bytes = DocumentModel.fromDocument(makeDocument()).toBytes()
+
+    with pytest.raises(DocumentModelError):
+        DocumentModel.fromBytes(b"XXXX" + data[4:])
+
+    with pytest.raises(DocumentModelError):
+        DocumentModel.fromBytes(data[:-3])
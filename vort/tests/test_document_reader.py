@@ -0,0 +1,50 @@
+import os
+
+import pytest
+from PySide6.QtGui import QImage, QColor
+from PySide6.QtWidgets import QApplication
+
+from core.editor.document_container import DocumentContainerError, DocumentContainerReader, Section, SectionKind
+from core.editor.document_file import DocumentFile
+from core.editor.document_reader import DocumentReader
+from core.editor.document_writer import DocumentWriter
+
+
+def writeDamagedFile(filepath: str) -> None:
+    # file with one image, a byte of the image section is changed
+    image: QImage = QImage(40, 30, QImage.Format.Format_RGB32)
+    image.fill(QColor("red"))
+
+    file: DocumentFile = DocumentFile.default_file()
+    file.html_text = "<p>lorem</p>"
+    file.png_image["red"] = DocumentWriter.encodeImage(image)
+    DocumentWriter().writeDocumentFile(filepath, file)
+
+    with DocumentContainerReader(filepath) as reader:
+        section: Section = reader.section(SectionKind.Image, "red")
+
+    with open(filepath, "r+b") as f:
+        f.seek(section.offset + section.size // 2)
+        byte: bytes = f.read(1)
+        f.seek(-1, os.SEEK_CUR)
+        f.write(bytes([byte[0] ^ 0xFF]))
+
+
+def test_damaged_image_is_skipped_or_raises_in_strict_reading(app: QApplication, tmp_path) -> None:
+    filepath: str = str(tmp_path / "damaged.vrt")
+    writeDamagedFile(filepath)
+
+    errors: list[str] = []
+    file: DocumentFile = DocumentReader.readDocumentFile(filepath, errors, is_mapped=False)
+
+    assert file.html_text == "<p>lorem</p>"
+    assert file.png_image == {}
+    assert errors == ["Section red is damaged"]
+
+    with pytest.raises(DocumentContainerError):
+        DocumentReader.readDocumentFile(filepath, is_strict=True, is_mapped=False)
+
+    # mapped image is verified when it is used first time
+    file = DocumentReader.readDocumentFile(filepath)
+    assert isinstance(file.png_image["red"], memoryview)
+    assert "red" in file.png_image_checksum
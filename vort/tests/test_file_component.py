@@ -0,0 +1,424 @@
+import os
+from typing import Callable
+
+import pytest
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QImage, QColor, QFont, QTextBlockFormat, QTextCharFormat, QTextCursor
+
+from core.editor.document_container import DocumentContainerReader, Section, SectionCodec, SectionKind
+from core.editor.document_editor.component.file_component import FileComponent
+from core.editor.document_editor.document_editor_context import DocumentEditorContext
+from core.editor.document_file import DocumentFile
+from core.editor.document_model import DocumentModel
+from core.editor.document_writer import DocumentWriter
+from core.editor.text_editor.image_store import ImageStore
+from core.editor.text_editor.text_document_context import TextDocumentContext
+
+MakeFileComponent = Callable[[], tuple[FileComponent, list[DocumentEditorContext]]]
+
+
+def damageSection(filepath: str, kind: SectionKind, name: str) -> None:
+    # a byte in the middle of the section, decoding alone wouldn't always notice it
+    with DocumentContainerReader(filepath) as reader:
+        section: Section = reader.section(kind, name)
+
+    with open(filepath, "r+b") as f:
+        f.seek(section.offset + section.size // 2)
+        byte: bytes = f.read(1)
+        f.seek(-1, os.SEEK_CUR)
+        f.write(bytes([byte[0] ^ 0xFF]))
+
+
+def saveDocumentWithImages(make_file_component: MakeFileComponent, filepath: str) -> list[str]:
+    file_component, contexts = make_file_component()
+    file_component.setDocumentFile(DocumentFile.default_file())
+
+    text_context: TextDocumentContext = contexts[-1].text_editor.context()
+    text_context.cursor.insertText("lorem ipsum dolor sit amet\n" * 50)
+
+    for color in ["red", "green", "blue"]:
+        image: QImage = QImage(40, 30, QImage.Format.Format_RGB32)
+        image.fill(QColor(color))
+        text_context.clipboard_component.insertImage(image)
+
+    file_component.saveDocumentFile(filepath)
+    file_component.waitForSave()
+
+    with DocumentContainerReader(filepath) as reader:
+        return [section.name for section in reader.sections(SectionKind.Image)]
+
+
+def mappedFilepaths() -> set[str]:
+    with open("/proc/self/maps") as f:
+        return {line.split(None, 5)[5].strip() for line in f if len(line.split(None, 5)) == 6}
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/maps"), reason="mappings of the process are listed by /proc")
+def test_saving_onto_loaded_file_releases_mapped_images(make_file_component: MakeFileComponent, tmp_path) -> None:
+    filepath: str = str(tmp_path / "images.vrt")
+    names: list[str] = saveDocumentWithImages(make_file_component, filepath)
+
+    file_component, contexts = make_file_component()
+    file_component.loadDocumentFile(filepath)
+    image_store: ImageStore = contexts[-1].text_editor.context().document.imageStore()
+
+    assert all(isinstance(image_store.encodedImage(name), memoryview) for name in names)
+    assert filepath in mappedFilepaths()
+
+    file_component.saveDocumentFile(filepath)
+    file_component.waitForSave()
+
+    # the file is replaced, not rewritten, and nothing maps the old one
+    assert all(isinstance(image_store.encodedImage(name), bytes) for name in names)
+    assert not any(path.startswith(filepath) for path in mappedFilepaths())
+
+    file_component, contexts = make_file_component()
+    file_component.loadDocumentFile(filepath)
+    image_store = contexts[-1].text_editor.context().document.imageStore()
+
+    assert sorted(image_store.names()) == sorted(names)
+    assert all(image_store.image(name) is not None for name in names)
+
+
+def test_damaged_mapped_image_is_detected_on_first_use(make_file_component: MakeFileComponent, tmp_path) -> None:
+    filepath: str = str(tmp_path / "damaged.vrt")
+    names: list[str] = saveDocumentWithImages(make_file_component, filepath)
+
+    damageSection(filepath, SectionKind.Image, names[0])
+
+    file_component, contexts = make_file_component()
+    file_component.loadDocumentFile(filepath)
+    image_store: ImageStore = contexts[-1].text_editor.context().document.imageStore()
+
+    damaged_names: list[str] = []
+    file_component.imageDamaged.connect(damaged_names.append)
+
+    assert image_store.image(names[0]) is None
+    assert image_store.encodedImage(names[0]) is None
+    assert all(image_store.image(name) is not None for name in names[1:])
+    assert damaged_names == [names[0]]
+
+
+def test_damaged_settings_fall_back_to_defaults(make_file_component: MakeFileComponent, tmp_path) -> None:
+    filepath: str = str(tmp_path / "document.vrt")
+
+    file: DocumentFile = DocumentFile.default_file()
+    file.page_width = 10.0
+    file.html_text = "<p>text</p>"
+
+    file_component, _ = make_file_component()
+    file_component.writeDocumentFile(filepath, file)
+
+    assert file_component.readDocumentFile(filepath).page_width == 10.0
+
+    damageSection(filepath, SectionKind.Settings, "settings")
+    read_file: DocumentFile = file_component.readDocumentFile(filepath)
+
+    assert read_file.page_width == DocumentFile.default_file().page_width
+    assert read_file.html_text == file.html_text
+
+
+def test_damaged_sections_are_reported_on_load(make_file_component: MakeFileComponent, tmp_path) -> None:
+    filepath: str = str(tmp_path / "document.vrt")
+
+    file: DocumentFile = DocumentFile.default_file()
+    file.html_text = "<p>text</p>"
+
+    file_component, _ = make_file_component()
+    file_component.writeDocumentFile(filepath, file)
+    damageSection(filepath, SectionKind.Settings, "settings")
+
+    reports: list[tuple[str, list]] = []
+    file_component.documentDamaged.connect(lambda *report: reports.append(report))
+    file_component.loadDocumentFile(filepath)
+
+    assert len(reports) == 1
+    assert reports[0][0] == filepath
+    assert reports[0][1] == ["Section settings is damaged"]
+
+
+def test_failed_load_is_reported(make_file_component: MakeFileComponent, tmp_path) -> None:
+    filepath: str = str(tmp_path / "document.vrt")
+
+    file: DocumentFile = DocumentFile.default_file()
+    file.html_text = "<p>text</p>"
+
+    file_component, _ = make_file_component()
+    file_component.writeDocumentFile(filepath, file)
+    damageSection(filepath, SectionKind.Text, "text")
+
+    failures: list[tuple[str, str]] = []
+    file_component.documentLoadFailed.connect(lambda *failure: failures.append(failure))
+    file_component.loadDocumentFile(filepath)
+    file_component.loadDocumentFile(str(tmp_path / "missing.vrt"))
+
+    assert [failure[0] for failure in failures] == [filepath, str(tmp_path / "missing.vrt")]
+    assert failures[0][1] == "Section text is damaged"
+
+
+def test_failed_save_is_reported(make_file_component: MakeFileComponent, tmp_path) -> None:
+    # directory which doesn't exist
+    filepath: str = str(tmp_path / "missing" / "failed.vrt")
+
+    file_component, _ = make_file_component()
+    file_component.setDocumentFile(DocumentFile.default_file())
+
+    failures: list[tuple[str, str]] = []
+    file_component.documentSaveFailed.connect(lambda *failure: failures.append(failure))
+
+    file_component.saveDocumentFile(filepath)
+    file_component.waitForSave()
+
+    assert [failure[0] for failure in failures] == [filepath]
+    assert not os.path.exists(f"{filepath}.tmp")
+
+
+def test_failed_removal_of_recovery_file_is_reported(make_file_component: MakeFileComponent, tmp_path) -> None:
+    filepath: str = str(tmp_path / "document.vrt")
+
+    # directory can't be removed as a file
+    os.mkdir(f"{filepath}.recovery")
+
+    file_component, _ = make_file_component()
+
+    failures: list[tuple[str, str]] = []
+    file_component.recoveryFailed.connect(lambda *failure: failures.append(failure))
+    file_component.removeRecoveryFile(filepath)
+
+    assert [failure[0] for failure in failures] == [f"{filepath}.recovery"]
+
+
+def test_error_of_any_kind_is_reported_and_temporary_file_is_removed(tmp_path) -> None:
+    filepath: str = str(tmp_path / "failed.vrt")
+
+    # settings which can't be written as json
+    file: DocumentFile = DocumentFile.default_file()
+    file.page_width = object()
+
+    writer: DocumentWriter = DocumentWriter()
+    failures: list[tuple[str, str]] = []
+    writer.failed.connect(lambda *failure: failures.append(failure))
+
+    writer.write(filepath, file, {kind: writer.compression(kind) for kind in SectionKind})
+
+    assert [failure[0] for failure in failures] == [filepath]
+    assert not os.path.exists(filepath)
+    assert not os.path.exists(f"{filepath}.tmp")
+
+
+def test_compression_is_sent_with_save(make_file_component: MakeFileComponent, tmp_path) -> None:
+    filepath: str = str(tmp_path / "compressed.vrt")
+
+    file_component, _ = make_file_component()
+    file_component.setDocumentFile(DocumentFile.default_file())
+
+    failures: list[tuple[str, str]] = []
+    file_component.documentSaveFailed.connect(lambda *failure: failures.append(failure))
+
+    # lzma raises its own error for a preset which doesn't exist
+    file_component.setCompression(SectionKind.Text, SectionCodec.Lzma, 99)
+    file_component.saveDocumentFile(filepath)
+    file_component.waitForSave()
+
+    assert [failure[0] for failure in failures] == [filepath]
+    assert not os.path.exists(filepath)
+
+    # the next save uses the changed compression
+    file_component.setCompression(SectionKind.Text, SectionCodec.Lzma, 1)
+    file_component.saveDocumentFile(filepath)
+    file_component.waitForSave()
+
+    with DocumentContainerReader(filepath) as reader:
+        assert reader.section(SectionKind.Text, "model").codec == SectionCodec.Lzma
+        assert reader.section(SectionKind.Settings, "settings").codec == SectionCodec.Zlib
+
+
+def editDocument(text_context: TextDocumentContext) -> None:
+    # text, formats of blocks and characters and removed blocks are journaled
+    cursor: QTextCursor = QTextCursor(text_context.document)
+    cursor.movePosition(QTextCursor.MoveOperation.End)
+    cursor.insertText("\U0001f600 consectetur")
+    cursor.insertBlock()
+
+    char_format: QTextCharFormat = QTextCharFormat()
+    char_format.setFontWeight(QFont.Weight.Bold)
+    cursor.insertText("adipiscing", char_format)
+
+    block_format: QTextBlockFormat = QTextBlockFormat()
+    block_format.setAlignment(Qt.AlignmentFlag.AlignRight)
+    cursor.setBlockFormat(block_format)
+
+    cursor.setPosition(10)
+    cursor.setPosition(text_context.document.findBlockByNumber(3).position() + 5, QTextCursor.MoveMode.KeepAnchor)
+    cursor.removeSelectedText()
+
+
+def documentData(context: DocumentEditorContext) -> bytes:
+    return DocumentModel.fromDocument(context.text_editor.context().document).toBytes()
+
+
+def test_checkpoint_is_written_to_recovery_file(make_file_component: MakeFileComponent, tmp_path) -> None:
+    filepath: str = str(tmp_path / "checkpoint.vrt")
+    saveDocumentWithImages(make_file_component, filepath)
+
+    with open(filepath, "rb") as f:
+        saved_data: bytes = f.read()
+
+    file_component, contexts = make_file_component()
+    file_component.loadDocumentFile(filepath)
+
+    editDocument(contexts[-1].text_editor.context())
+    file_component.checkpointJournal()
+    file_component.waitForSave()
+
+    # settings aren't journaled, so a change of them alone is checkpointed too
+    contexts[-1].page_layout.setPageColor(QColor("gray"))
+    file_component.checkpointJournal()
+    file_component.waitForSave()
+
+    contexts[-1].text_editor.context().cursor.insertText("elit")
+
+    with open(filepath, "rb") as f:
+        assert f.read() == saved_data
+
+    assert os.path.exists(f"{filepath}.recovery")
+
+    # the app crashes, so neither the journal nor the recovery file is removed
+    document_data: bytes = documentData(contexts[-1])
+    file_component.closeJournal(False)
+    file_component.stopWriter()
+
+    file_component, contexts = make_file_component()
+    file_component.loadDocumentFile(filepath)
+
+    assert file_component.isDocumentRecovered()
+    assert documentData(contexts[-1]) == document_data
+    assert contexts[-1].page_layout.pageColor() == QColor("gray")
+
+    # changes are discarded
+    file_component.closeDocumentFile()
+
+    assert not os.path.exists(f"{filepath}.journal")
+    assert not os.path.exists(f"{filepath}.recovery")
+
+    file_component, contexts = make_file_component()
+    file_component.loadDocumentFile(filepath)
+
+    assert not file_component.isDocumentRecovered()
+    assert contexts[-1].page_layout.pageColor() != QColor("gray")
+
+
+def test_checkpoint_waits_for_pause_and_long_journal(make_file_component: MakeFileComponent, tmp_path) -> None:
+    filepath: str = str(tmp_path / "checkpoint.vrt")
+    saveDocumentWithImages(make_file_component, filepath)
+
+    file_component, contexts = make_file_component()
+    file_component.loadDocumentFile(filepath)
+    file_component.setCheckpointJournalSize(1024 * 1024)
+
+    # user is typing
+    editDocument(contexts[-1].text_editor.context())
+    file_component.onCheckpointTimeout()
+    assert not file_component.isSaving()
+
+    # journal is short, it is replayed quickly
+    file_component.setCheckpointIdleTime(0.0)
+    file_component.onCheckpointTimeout()
+    assert not file_component.isSaving()
+
+    file_component.setCheckpointJournalSize(0)
+    file_component.onCheckpointTimeout()
+    assert file_component.isSaving()
+
+    file_component.waitForSave()
+    assert os.path.exists(f"{filepath}.recovery")
+
+    # settings aren't journaled
+    file_component.setCheckpointJournalSize(1024 * 1024)
+    contexts[-1].page_layout.setPageColor(QColor("gray"))
+    file_component.onCheckpointTimeout()
+    assert file_component.isSaving()
+
+
+def test_saved_document_replaces_recovery_file(make_file_component: MakeFileComponent, tmp_path) -> None:
+    filepath: str = str(tmp_path / "saved.vrt")
+    saveDocumentWithImages(make_file_component, filepath)
+
+    file_component, contexts = make_file_component()
+    file_component.loadDocumentFile(filepath)
+
+    editDocument(contexts[-1].text_editor.context())
+    file_component.checkpointJournal()
+    file_component.waitForSave()
+
+    saved: list[str] = []
+    file_component.documentSaved.connect(saved.append)
+
+    document_data: bytes = documentData(contexts[-1])
+    file_component.saveDocumentFile(filepath)
+    file_component.waitForSave()
+
+    # only the save of the user is reported
+    assert saved == [filepath]
+    assert not os.path.exists(f"{filepath}.journal")
+    assert not os.path.exists(f"{filepath}.recovery")
+
+    file_component, contexts = make_file_component()
+    file_component.loadDocumentFile(filepath)
+
+    assert not file_component.isDocumentRecovered()
+    assert documentData(contexts[-1]) == document_data
+
+
+def test_journal_replays_changes_with_their_formats(make_file_component: MakeFileComponent, tmp_path) -> None:
+    filepath: str = str(tmp_path / "journal.vrt")
+    saveDocumentWithImages(make_file_component, filepath)
+
+    file_component, contexts = make_file_component()
+    file_component.loadDocumentFile(filepath)
+
+    editDocument(contexts[-1].text_editor.context())
+
+    document_data: bytes = documentData(contexts[-1])
+    file_component.closeJournal(False)
+    file_component.stopWriter()
+
+    file_component, contexts = make_file_component()
+    file_component.loadDocumentFile(filepath)
+
+    assert file_component.isDocumentRecovered()
+    assert documentData(contexts[-1]) == document_data
+
+
+def test_progressive_load_matches_load_at_once(make_file_component: MakeFileComponent, tmp_path) -> None:
+    filepath: str = str(tmp_path / "progressive.vrt")
+
+    file_component, contexts = make_file_component()
+    file_component.setDocumentFile(DocumentFile.default_file())
+    contexts[-1].text_editor.context().cursor.insertText("lorem ipsum dolor sit amet\n" * 3000)
+    editDocument(contexts[-1].text_editor.context())
+    file_component.saveDocumentFile(filepath)
+    file_component.waitForSave()
+
+    file_component, contexts = make_file_component()
+    file_component.loadDocumentFile(filepath)
+    document_data: bytes = documentData(contexts[-1])
+
+    file_component, contexts = make_file_component()
+    file_component.setProgressiveLoadTurned(True)
+
+    progress: list[tuple[int, int]] = []
+    file_component.documentLoadProgressChanged.connect(lambda *changed: progress.append(changed))
+
+    file_component.loadDocumentFile(filepath)
+
+    # first pages are shown before the rest is loaded
+    assert file_component.isLoading()
+    assert contexts[-1].page_layout.pageCount() >= 3
+
+    file_component.waitForLoad()
+
+    assert not file_component.isLoading()
+    assert documentData(contexts[-1]) == document_data
+    assert progress[-1][0] == progress[-1][1]
+    assert [loaded for loaded, _ in progress] == sorted(loaded for loaded, _ in progress)
@@ -0,0 +1,169 @@
+from typing import Callable
+
+import pytest
+from PySide6.QtCore import QRectF, QRegularExpression
+from PySide6.QtGui import QTextBlock, QTextCursor, QTextLayout
+
+from core.editor.document_editor.component.file_component import FileComponent
+from core.editor.document_editor.document_editor_context import DocumentEditorContext
+from core.editor.document_file import DocumentFile
+from core.editor.text_editor.text_document_context import TextDocumentContext
+from core.editor.text_editor.text_searcher import TextSearcher
+
+MakeFileComponent = Callable[[], tuple[FileComponent, list[DocumentEditorContext]]]
+
+
+def highlightedRanges(block: QTextBlock) -> list[tuple[int, int]]:
+    format_range: QTextLayout.FormatRange
+    return [(format_range.start, format_range.length) for format_range in block.layout().formats()]
+
+
+def makeTextContext(make_file_component: MakeFileComponent, text: str) -> TextDocumentContext:
+    file_component, contexts = make_file_component()
+    file_component.setDocumentFile(DocumentFile.default_file())
+
+    text_context: TextDocumentContext = contexts[-1].text_editor.context()
+    text_context.cursor.insertText(text)
+
+    return text_context
+
+
+def test_match_at_end_of_block_after_surrogate_pairs_is_highlighted(
+    make_file_component: MakeFileComponent, process_events: Callable[[float], None]
+) -> None:
+    # every emoji is two utf-16 units, so the match ends after the length of the python string
+    text_context: TextDocumentContext = makeTextContext(make_file_component, "\U0001f600\U0001f600\U0001f600 a")
+
+    text_context.finder_component.find("a")
+    process_events(0.3)
+
+    assert text_context.finder_component.matchCount() == 1
+    assert highlightedRanges(text_context.document.firstBlock()) == [(7, 1)]
+
+
+def test_matches_follow_edits_and_are_selected_in_order(make_file_component: MakeFileComponent) -> None:
+    text_context: TextDocumentContext = makeTextContext(make_file_component, "lorem ipsum\nlorem dolor\nsit lorem")
+    finder = text_context.finder_component
+
+    finder.find("lorem")
+    finder.waitForSearch()
+    assert finder.matchCount() == 3
+    assert (text_context.cursor.selectionStart(), text_context.cursor.selectionEnd()) == (0, 5)
+
+    finder.find("lorem")
+    assert text_context.cursor.selectionStart() == 12
+
+    # a match is removed and one is added before the selected one
+    text_context.cursor.setPosition(0)
+    text_context.cursor.insertText("lorem ")
+    text_context.cursor.setPosition(18)
+    text_context.cursor.setPosition(23, QTextCursor.MoveMode.KeepAnchor)
+    text_context.cursor.removeSelectedText()
+
+    assert finder.matchCount() == 3
+    assert highlightedRanges(text_context.document.firstBlock()) == [(0, 5), (6, 5)]
+
+    finder.findPrevious("lorem")
+    assert text_context.cursor.selectionStart() == 6
+
+
+def test_replace_all_is_one_undoable_edit(make_file_component: MakeFileComponent) -> None:
+    text: str = "lorem ipsum\nlorem dolor lorem\nsit amet"
+    text_context: TextDocumentContext = makeTextContext(make_file_component, text)
+    finder = text_context.finder_component
+
+    finder.find("lorem")
+
+    # replacement which matches the pattern is replaced once
+    assert finder.replaceAll("lorem lorem") == 3
+    assert text_context.document.toPlainText() == text.replace("lorem", "lorem lorem")
+    assert finder.matchCount() == 6
+
+    text_context.document.undo()
+    assert text_context.document.toPlainText() == text
+    assert finder.matchCount() == 3
+
+
+def test_replace_all_expands_captured_groups_and_backslashes(make_file_component: MakeFileComponent) -> None:
+    text: str = "\U0001f600 ab=1, cd=22\nef=333"
+    text_context: TextDocumentContext = makeTextContext(make_file_component, text)
+    finder = text_context.finder_component
+
+    finder.setRegexTurned(True)
+    finder.find("(\\w+)=(\\d+)")
+
+    assert finder.replaceAll("\\2\\\\\\1 \\0") == 3
+    assert text_context.document.toPlainText() == "\U0001f600 1\\ab ab=1, 22\\cd cd=22\n333\\ef ef=333"
+
+
+def test_replace_all_keeps_references_in_plain_mode(make_file_component: MakeFileComponent) -> None:
+    text_context: TextDocumentContext = makeTextContext(make_file_component, "a.b a.b")
+    finder = text_context.finder_component
+
+    finder.find("a.b")
+
+    assert finder.replaceAll("\\1\\\\") == 2
+    assert text_context.document.toPlainText() == "\\1\\\\ \\1\\\\"
+
+
+def test_replace_expands_groups_of_selected_match(make_file_component: MakeFileComponent) -> None:
+    text_context: TextDocumentContext = makeTextContext(make_file_component, "x1 y2")
+    finder = text_context.finder_component
+
+    finder.setRegexTurned(True)
+    finder.find("([a-z])(\\d)")
+    finder.waitForSearch()
+    finder.replace("\\2\\1")
+
+    assert text_context.document.toPlainText() == "1x y2"
+
+
+def test_typed_pattern_is_searched_once_it_stops_changing(
+    make_file_component: MakeFileComponent, process_events: Callable[[float], None], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    text_context: TextDocumentContext = makeTextContext(make_file_component, "lorem ipsum dolor\n" * 100)
+    finder = text_context.finder_component
+
+    patterns: list[str] = []
+    search = TextSearcher.search
+
+    def countedSearch(searcher: TextSearcher, text: str, expr: QRegularExpression) -> int:
+        patterns.append(expr.pattern())
+        return search(searcher, text, expr)
+
+    monkeypatch.setattr(TextSearcher, "search", countedSearch)
+
+    for i in range(1, len("dolor") + 1):
+        finder.find("dolor"[:i])
+
+    assert patterns == []
+    assert not text_context.cursor.hasSelection()
+
+    process_events(0.3)
+
+    # the last pattern is searched and its next match is selected
+    assert patterns == ["dolor"]
+    assert finder.matchCount() == 100
+    assert text_context.cursor.selectedText() == "dolor"
+
+
+def test_visible_blocks_are_highlighted_before_the_rest(
+    make_file_component: MakeFileComponent, process_events: Callable[[float], None]
+) -> None:
+    text_context: TextDocumentContext = makeTextContext(make_file_component, "lorem ipsum dolor\n" * 3000)
+    finder = text_context.finder_component
+
+    # the first blocks are visible
+    finder.setVisibleRect(QRectF(0, 0, 800, 600))
+    finder.find("ipsum")
+    finder.waitForSearch()
+
+    first_block: QTextBlock = text_context.document.firstBlock()
+    last_block: QTextBlock = text_context.document.lastBlock().previous()
+
+    assert highlightedRanges(first_block) == [(6, 5)]
+    assert highlightedRanges(last_block) == []
+
+    process_events(1.0)
+
+    assert highlightedRanges(last_block) == [(6, 5)]
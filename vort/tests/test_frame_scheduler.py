@@ -0,0 +1,50 @@
+from typing import Callable
+
+from PySide6.QtCore import QRectF, QRect
+
+from core.editor.document_editor.document_editor import DocumentEditor
+from core.editor.document_editor.frame_scheduler import FrameScheduler
+
+
+def test_invalidations_within_frame_are_one_frame(process_events: Callable[[float], None]) -> None:
+    scheduler: FrameScheduler = FrameScheduler()
+
+    rects: list[QRect] = []
+    scheduler.frameRequested.connect(rects.append)
+    scheduler.frameRequested.connect(scheduler.onFramePainted)
+
+    scheduler.beginAction()
+    for i in range(5):
+        scheduler.invalidate(QRectF(10 * i, 10 * i, 50, 20))
+
+    process_events(0.05)
+
+    assert scheduler.frameCount() == 1
+    assert scheduler.paintCount() == 1
+    assert scheduler.actionPaintCount() == 1
+    assert rects == [QRect(0, 0, 90, 60)]
+
+
+def test_nothing_is_requested_without_changes(process_events: Callable[[float], None]) -> None:
+    scheduler: FrameScheduler = FrameScheduler()
+
+    scheduler.invalidate(QRectF())
+    process_events(0.05)
+
+    assert scheduler.frameCount() == 0
+    assert not scheduler.isFramePending()
+
+
+def test_editor_paints_once_per_frame(editor: DocumentEditor, process_events: Callable[[float], None]) -> None:
+    scheduler: FrameScheduler = editor.frameScheduler()
+    scheduler.resetCounters()
+    scheduler.beginAction()
+
+    # all invalidations arrive within one frame interval
+    for i in range(5):
+        editor.invalidate(QRectF(10 * i, 10 * i, 50, 20))
+
+    process_events(0.1)
+
+    assert scheduler.frameCount() == 1
+    assert scheduler.actionPaintCount() == 1
@@ -0,0 +1,140 @@
+import pytest
+from PySide6.QtCore import QRectF
+from PySide6.QtGui import QImage, QPainter, QTextCursor, QTextDocument, QTextLayout
+from PySide6.QtWidgets import QApplication
+
+from core.editor.document_paint_context import DocumentPaintContext
+from core.editor.page_layout.page_layout import PageLayout
+from core.editor.header_editor.header_document_context import HeaderDocumentContext
+from core.editor.header_editor.header_document_layout import HeaderDocumentLayout
+from core.editor.header_editor.header_editor import HeaderEditor
+from core.editor.footer_editor.footer_document_context import FooterDocumentContext
+from core.editor.footer_editor.footer_document_layout import FooterDocumentLayout
+from core.editor.footer_editor.footer_editor import FooterEditor
+
+EDITORS: dict[str, tuple[type, type, type]] = {
+    "header": (HeaderDocumentLayout, HeaderDocumentContext, HeaderEditor),
+    "footer": (FooterDocumentLayout, FooterDocumentContext, FooterEditor),
+}
+
+
+def makePageLayout(page_count: int) -> PageLayout:
+    page_layout: PageLayout = PageLayout()
+    page_layout.setPageWidth(400)
+    page_layout.setPageHeight(300)
+    page_layout.setPageSpacing(20)
+    page_layout.setPageLeftPadding(30)
+    page_layout.setPageRightPadding(30)
+    page_layout.setHeaderHeight(40)
+    page_layout.setFooterHeight(40)
+    page_layout.addPage(page_count - 1)
+
+    return page_layout
+
+
+def makeEditor(kind: str, page_layout: PageLayout, is_paginated: bool) -> HeaderEditor | FooterEditor:
+    # editor is set up like FileComponent does it
+    layout_type, context_type, editor_type = EDITORS[kind]
+
+    document: QTextDocument = QTextDocument()
+    layout = layout_type(document, page_layout)
+    document.setDocumentLayout(layout)
+
+    context = context_type(document, layout, QTextCursor(document))
+    editor = editor_type(context)
+
+    context.page_component.addPage(page_layout.pageCount())
+    context.page_component.setFirstPageIncluded(False)
+    context.pagination_component.setPaginationTurned(is_paginated)
+    context.pagination_component.setPaginationStartingNumber(3)
+    context.text_component.setTextTurned(not is_paginated)
+    context.text_component.setText("lorem ipsum")
+
+    return editor
+
+
+def pageTexts(editor: HeaderEditor | FooterEditor) -> list[str]:
+    return [editor.context().layout.pageText(i) for i in range(editor.context().page_component.pageCount())]
+
+
+@pytest.mark.parametrize("kind", list(EDITORS))
+def test_page_text_is_built_from_template(app: QApplication, kind: str) -> None:
+    page_layout: PageLayout = makePageLayout(4)
+    editor = makeEditor(kind, page_layout, True)
+    context = editor.context()
+
+    # first page is excluded, pages are numbered from the starting number
+    assert pageTexts(editor) == ["", "4", "5", "6"]
+
+    context.page_component.setFirstPageIncluded(True)
+    assert pageTexts(editor) == ["3", "4", "5", "6"]
+
+    context.text_component.setTextTurned(True)
+    assert pageTexts(editor) == ["lorem ipsum"] * 4
+
+    context.text_component.setText("dolor")
+    assert pageTexts(editor) == ["dolor"] * 4
+
+    context.text_component.setTextTurned(False)
+    assert pageTexts(editor) == [""] * 4
+
+
+@pytest.mark.parametrize("kind", list(EDITORS))
+def test_pages_follow_page_layout_without_blocks(app: QApplication, kind: str) -> None:
+    page_layout: PageLayout = makePageLayout(2)
+    editor = makeEditor(kind, page_layout, True)
+
+    changes: list[tuple[int, int, int]] = []
+    editor.context().document.contentsChange.connect(lambda *change: changes.append(change))
+
+    for count in [3, 7, 1]:
+        page_layout.addPage(count)
+    page_layout.removePage(4)
+
+    # template isn't changed by added and removed pages
+    assert editor.context().page_component.pageCount() == page_layout.pageCount() == 9
+    assert editor.context().document.blockCount() == 1
+    assert changes == []
+    assert pageTexts(editor)[-1] == "11"
+
+
+@pytest.mark.parametrize("kind", list(EDITORS))
+def test_page_text_layouts_are_shared_and_cleared_by_template_change(app: QApplication, kind: str) -> None:
+    page_layout: PageLayout = makePageLayout(3)
+    editor = makeEditor(kind, page_layout, False)
+    layout = editor.context().layout
+
+    text_layout: QTextLayout = layout.pageTextLayout("lorem ipsum")
+    assert layout.pageTextLayout("lorem ipsum") is text_layout
+    assert text_layout.lineCount() == 1
+
+    # font of the template is used by the next layout
+    editor.context().formatting_component.setFontSize(40)
+
+    assert layout.pageTextLayout("lorem ipsum") is not text_layout
+    assert layout.pageTextLayout("lorem ipsum").boundingRect().height() > text_layout.boundingRect().height()
+
+
+@pytest.mark.parametrize("kind", list(EDITORS))
+def test_only_visible_pages_are_painted(app: QApplication, kind: str, monkeypatch: pytest.MonkeyPatch) -> None:
+    page_layout: PageLayout = makePageLayout(50)
+    editor = makeEditor(kind, page_layout, True)
+    layout = editor.context().layout
+
+    painted: list[int] = []
+    pageText = layout.pageText
+
+    def paintedPageText(index: int) -> str:
+        painted.append(index)
+        return pageText(index)
+
+    monkeypatch.setattr(layout, "pageText", paintedPageText)
+
+    image: QImage = QImage(400, 2000, QImage.Format.Format_ARGB32)
+    painter: QPainter = QPainter(image)
+    rect: QRectF = QRectF(0, page_layout.pageYPosition(10), 400, page_layout.pageHeight() * 2)
+    layout.paint(DocumentPaintContext(painter, rect, editor.context().cursor))
+    painter.end()
+
+    assert painted == list(page_layout.findPages(rect.top(), rect.bottom()))
+    assert 10 in painted and len(painted) <= 3
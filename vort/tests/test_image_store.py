@@ -0,0 +1,56 @@
+import zlib
+
+from PySide6.QtGui import QImage, QColor
+from PySide6.QtWidgets import QApplication
+
+from core.editor.document_writer import DocumentWriter
+from core.editor.text_editor.image_store import ImageStore
+
+
+def makeImage(color: str) -> QImage:
+    image: QImage = QImage(40, 30, QImage.Format.Format_RGB32)
+    image.fill(QColor(color))
+    return image
+
+
+def test_inserted_image_is_stored_once_and_not_decoded_again(app: QApplication) -> None:
+    image_store: ImageStore = ImageStore()
+
+    name: str = image_store.insertImage(makeImage("red"))
+
+    assert image_store.insertImage(makeImage("red")) == name
+    assert image_store.insertImage(makeImage("blue")) != name
+    assert len(image_store.names()) == 2
+
+    assert image_store.image(name) is not None
+    assert image_store.decodeCount() == 0
+    assert name == ImageStore.imageName(image_store.encodedImage(name))
+
+
+def test_evicted_image_is_decoded_from_encoded_bytes(app: QApplication) -> None:
+    image_store: ImageStore = ImageStore()
+    image_store.setMemoryBudget(makeImage("red").sizeInBytes())
+
+    red_name: str = image_store.insertImage(makeImage("red"))
+    blue_name: str = image_store.insertImage(makeImage("blue"))
+
+    assert image_store.memoryUsage() == makeImage("red").sizeInBytes()
+    assert image_store.image(red_name).pixelColor(0, 0) == QColor("red")
+    assert image_store.decodeCount() == 1
+    assert image_store.image(blue_name).pixelColor(0, 0) == QColor("blue")
+    assert image_store.decodeCount() == 2
+
+
+def test_image_with_wrong_checksum_is_damaged(app: QApplication) -> None:
+    image_store: ImageStore = ImageStore()
+    data: bytes = DocumentWriter.encodeImage(makeImage("red"))
+
+    image_store.addImage("good", memoryview(data), checksum=zlib.crc32(data))
+    image_store.addImage("bad", memoryview(data), checksum=zlib.crc32(data) ^ 1)
+
+    image_store.copyMappedImages()
+
+    assert image_store.encodedImage("good") == data
+    assert image_store.image("good") is not None
+    assert image_store.encodedImage("bad") is None
+    assert image_store.image("bad") is None
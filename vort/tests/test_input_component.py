@@ -0,0 +1,76 @@
+from PySide6.QtGui import QTextDocument, QTextCursor, QTextBlock, QTextFragment, QTextImageFormat
+from PySide6.QtWidgets import QApplication
+
+from core.editor.text_editor.component.input_component import InputComponent
+
+
+def makeDocument(paragraph_count: int) -> tuple[QTextDocument, QTextCursor]:
+    document: QTextDocument = QTextDocument()
+    # contentsChange is emitted only for a document with a layout
+    document.documentLayout()
+
+    cursor: QTextCursor = QTextCursor(document)
+
+    for i in range(paragraph_count):
+        if i != 0:
+            cursor.insertBlock()
+        cursor.insertText(f"paragraph {i}")
+
+    return document, cursor
+
+
+def insertImage(document: QTextDocument, position: int) -> None:
+    image_format: QTextImageFormat = QTextImageFormat()
+    image_format.setName("image")
+    image_format.setWidth(10)
+    image_format.setHeight(10)
+
+    cursor: QTextCursor = QTextCursor(document)
+    cursor.setPosition(position)
+    cursor.insertImage(image_format)
+
+
+def imagesHaveOwnBlocks(document: QTextDocument) -> bool:
+    block: QTextBlock = document.begin()
+    while block.isValid():
+        fragments: list[QTextFragment] = []
+
+        it: QTextBlock.iterator = block.begin()
+        while it != block.end():
+            fragments.append(it.fragment())
+            it += 1
+
+        if any(fragment.charFormat().isImageFormat() for fragment in fragments) and len(fragments) != 1:
+            return False
+
+        block = block.next()
+
+    return True
+
+
+def test_typing_next_to_image_moves_it_to_its_own_block(app: QApplication) -> None:
+    document, cursor = makeDocument(20)
+    input_component: InputComponent = InputComponent(cursor)
+
+    cursor.setPosition(document.findBlockByNumber(10).position() + 4)
+    input_component.insertText("x")
+    insertImage(document, cursor.position())
+
+    cursor.setPosition(document.findBlockByNumber(10).position() + 4)
+    input_component.insertText("y")
+
+    assert imagesHaveOwnBlocks(document)
+
+
+def test_changes_before_edit_are_fixed_up_with_it(app: QApplication) -> None:
+    document, cursor = makeDocument(20)
+    input_component: InputComponent = InputComponent(cursor)
+
+    # e.g. undo puts an image back into a paragraph far from the cursor
+    insertImage(document, document.findBlockByNumber(15).position() + 3)
+    assert not imagesHaveOwnBlocks(document)
+
+    cursor.setPosition(document.findBlockByNumber(2).position())
+    input_component.insertText("x")
+
+    assert imagesHaveOwnBlocks(document)
@@ -0,0 +1,139 @@
+import random
+from array import array
+
+import pytest
+from PySide6.QtCore import QRegularExpression
+from PySide6.QtGui import QTextCursor, QTextDocument
+from PySide6.QtWidgets import QApplication
+
+from core.editor.text_editor.match_table import MatchTable
+
+
+def makeDocument(paragraph_count: int) -> QTextDocument:
+    # contentsChange is emitted only for a document with a layout
+    document: QTextDocument = QTextDocument()
+    document.documentLayout()
+
+    cursor: QTextCursor = QTextCursor(document)
+    for i in range(paragraph_count):
+        if i != 0:
+            cursor.insertBlock()
+        cursor.insertText(f"lorem {i} ipsum \U0001f600 dolor lorem" * (i % 3))
+
+    return document
+
+
+def matchesOf(document: QTextDocument, expr: QRegularExpression) -> list[tuple[int, int]]:
+    table: MatchTable = MatchTable()
+    table.build(document, expr)
+    return list(zip(table.starts, table.ends))
+
+
+def test_build_finds_matches_of_every_block_in_order(app: QApplication) -> None:
+    document: QTextDocument = makeDocument(20)
+    expr: QRegularExpression = QRegularExpression("lorem")
+
+    # QTextDocument.find is what the table replaces
+    expected: list[tuple[int, int]] = []
+    cursor: QTextCursor = document.find(expr, 0)
+    while not cursor.isNull():
+        expected.append((cursor.selectionStart(), cursor.selectionEnd()))
+        cursor = document.find(expr, cursor)
+
+    assert matchesOf(document, expr) == expected
+
+
+def test_empty_and_invalid_patterns_have_no_matches(app: QApplication) -> None:
+    document: QTextDocument = makeDocument(5)
+
+    assert matchesOf(document, QRegularExpression("")) == []
+    assert matchesOf(document, QRegularExpression("(")) == []
+    assert matchesOf(document, QRegularExpression("x*")) == []
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_update_matches_rebuild_after_edits(app: QApplication, seed: int) -> None:
+    document: QTextDocument = makeDocument(30)
+    expr: QRegularExpression = QRegularExpression("lorem|\\d+ ipsum")
+
+    table: MatchTable = MatchTable()
+    table.build(document, expr)
+    document.contentsChange.connect(lambda *change: table.update(document, expr, *change))
+
+    # typing, removing across blocks, pasting blocks and editing inside a match
+    rng: random.Random = random.Random(seed)
+    cursor: QTextCursor = QTextCursor(document)
+
+    for _ in range(40):
+        position: int = rng.randrange(document.characterCount())
+        cursor.setPosition(position)
+
+        match rng.randrange(4):
+            case 0:
+                cursor.insertText(rng.choice(["lor", "em", "lorem ", "7 ipsum", "\U0001f600"]))
+            case 1:
+                end: int = min(position + rng.randrange(1, 60), document.characterCount() - 1)
+                cursor.setPosition(end, QTextCursor.MoveMode.KeepAnchor)
+                cursor.removeSelectedText()
+            case 2:
+                cursor.insertText("lorem\nipsum 3 ipsum\nlorem")
+            case 3:
+                cursor.insertBlock()
+
+        assert list(zip(table.starts, table.ends)) == matchesOf(document, expr)
+
+
+def test_find_matches_next_and_previous_bisect_starts(app: QApplication) -> None:
+    table: MatchTable = MatchTable()
+    table.starts.extend([3, 10, 20])
+    table.ends.extend([5, 12, 25])
+
+    assert table.findMatches(0, 3) == range(0, 0)
+    assert table.findMatches(3, 20) == range(0, 2)
+    assert table.findMatches(4, 100) == range(1, 3)
+
+    assert table.findNext(3) == 0
+    assert table.findNext(4) == 1
+    assert table.findNext(21) == -1
+
+    assert table.findPrevious(3) == -1
+    assert table.findPrevious(4) == 0
+    assert table.findPrevious(100) == 2
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_of_old_text_are_mapped_by_later_changes(app: QApplication, seed: int) -> None:
+    # the searcher reports matches of a snapshot, the table is patched by the changes made since
+    document: QTextDocument = makeDocument(30)
+    expr: QRegularExpression = QRegularExpression("lorem")
+
+    snapshot: QTextDocument = document.clone()
+
+    table: MatchTable = MatchTable()
+    changes: list[tuple[int, int, int]] = []
+    document.contentsChange.connect(lambda *change: changes.append(table.update(document, expr, *change)))
+
+    rng: random.Random = random.Random(seed)
+    cursor: QTextCursor = QTextCursor(document)
+
+    for _ in range(10):
+        cursor.setPosition(rng.randrange(document.characterCount()))
+        cursor.insertText(rng.choice(["lorem ", "x", "lo\nrem", "\U0001f600"]))
+
+    old_starts, old_ends = table.search(snapshot.firstBlock(), snapshot.lastBlock(), expr)
+    starts, ends = MatchTable.mapMatches(old_starts, old_ends, changes)
+    table.insert(starts, ends)
+
+    assert list(zip(table.starts, table.ends)) == matchesOf(document, expr)
+
+
+def test_insert_merges_sorted_matches(app: QApplication) -> None:
+    table: MatchTable = MatchTable()
+    table.starts.extend([10, 40])
+    table.ends.extend([12, 42])
+
+    table.insert(array("q", [0, 20, 30]), array("q", [2, 22, 32]))
+    table.insert(array("q", []), array("q", []))
+
+    assert list(table.starts) == [0, 10, 20, 30, 40]
+    assert list(table.ends) == [2, 12, 22, 32, 42]
@@ -0,0 +1,29 @@
+from core.editor.page_layout.page_layout import PageLayout
+
+
+def makePageLayout(page_count: int) -> PageLayout:
+    page_layout: PageLayout = PageLayout()
+    page_layout.setPageHeight(100)
+    page_layout.setPageSpacing(20)
+    page_layout.addPage(page_count - 1)
+    return page_layout
+
+
+def test_find_pages_returns_pages_intersecting_range() -> None:
+    page_layout: PageLayout = makePageLayout(5)
+
+    assert page_layout.findPages(0, 50) == range(0, 1)
+    assert page_layout.findPages(50, 130) == range(0, 2)
+
+    # spacing between pages
+    assert page_layout.findPages(105, 110) == range(0, 1)
+
+    assert page_layout.findPages(-100, 1000) == range(0, 5)
+    assert page_layout.findPages(250, 250) == range(2, 3)
+
+
+def test_find_pages_without_page_height_returns_all_pages() -> None:
+    page_layout: PageLayout = PageLayout()
+    page_layout.addPage(2)
+
+    assert page_layout.findPages(0, 10) == range(0, 3)
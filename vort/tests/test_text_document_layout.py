@@ -0,0 +1,191 @@
+from PySide6.QtCore import QPointF, QRectF, Qt
+from PySide6.QtGui import (
+    QTextDocument,
+    QTextCursor,
+    QTextBlock,
+    QTextBlockFormat,
+    QTextLayout,
+    QTextLine,
+    QImage,
+    QPainter,
+    QColor,
+)
+from PySide6.QtWidgets import QApplication
+
+from core.editor.document_paint_context import DocumentPaintContext
+from core.editor.page_layout.page_layout import PageLayout
+from core.editor.text_editor.text_document_layout import TextDocumentLayout, HitResult, Hit
+
+
+def makeLayout(paragraph_count: int) -> tuple[QTextDocument, TextDocumentLayout, PageLayout]:
+    page_layout: PageLayout = PageLayout()
+    page_layout.setPageWidth(400)
+    page_layout.setPageHeight(300)
+    page_layout.setPageSpacing(20)
+    page_layout.setPageTopPadding(30)
+    page_layout.setPageBottomPadding(30)
+    page_layout.setPageLeftPadding(30)
+    page_layout.setPageRightPadding(30)
+
+    document: QTextDocument = QTextDocument()
+    layout: TextDocumentLayout = TextDocumentLayout(document, page_layout)
+    document.setDocumentLayout(layout)
+
+    # line height of the editor's default block format
+    block_format: QTextBlockFormat = QTextBlockFormat()
+    block_format.setLineHeight(1, 1)
+
+    cursor: QTextCursor = QTextCursor(document)
+    cursor.setBlockFormat(block_format)
+    for i in range(paragraph_count):
+        if i != 0:
+            cursor.insertBlock()
+        cursor.insertText(f"paragraph {i} " + "lorem ipsum " * (i % 7))
+
+    return document, layout, page_layout
+
+
+def linePositions(document: QTextDocument) -> list[tuple[int, int, float, float, float]]:
+    positions: list[tuple[int, int, float, float, float]] = []
+
+    block: QTextBlock = document.begin()
+    while block.isValid():
+        block_layout: QTextLayout = block.layout()
+        for i in range(block_layout.lineCount()):
+            line: QTextLine = block_layout.lineAt(i)
+            positions.append((block.blockNumber(), line.textStart(), line.x(), line.y(), line.width()))
+        block = block.next()
+
+    return positions
+
+
+def assertSameAsRelayout(document: QTextDocument, layout: TextDocumentLayout, page_layout: PageLayout) -> None:
+    positions: list = linePositions(document)
+    character_count: int = layout.characterCount()
+    page_count: int = page_layout.pageCount()
+
+    layout.relayout()
+
+    assert linePositions(document) == positions
+    assert layout.characterCount() == character_count
+    assert page_layout.pageCount() == page_count
+
+
+def test_typing_lays_out_like_full_relayout(app: QApplication) -> None:
+    document, layout, page_layout = makeLayout(60)
+    cursor: QTextCursor = QTextCursor(document.findBlockByNumber(20))
+
+    # long enough to wrap and to push the following blocks onto the next page
+    for _ in range(40):
+        cursor.insertText("word ")
+
+    assert page_layout.pageCount() > 1
+    assertSameAsRelayout(document, layout, page_layout)
+
+
+def test_inserting_and_removing_blocks_lays_out_like_full_relayout(app: QApplication) -> None:
+    document, layout, page_layout = makeLayout(60)
+    cursor: QTextCursor = QTextCursor(document.findBlockByNumber(10))
+
+    for _ in range(15):
+        cursor.insertBlock()
+    assertSameAsRelayout(document, layout, page_layout)
+
+    cursor.setPosition(document.findBlockByNumber(5).position())
+    cursor.setPosition(document.findBlockByNumber(40).position(), QTextCursor.MoveMode.KeepAnchor)
+    cursor.removeSelectedText()
+    assertSameAsRelayout(document, layout, page_layout)
+
+
+def test_block_format_change_lays_out_like_full_relayout(app: QApplication) -> None:
+    document, layout, page_layout = makeLayout(60)
+    cursor: QTextCursor = QTextCursor(document.findBlockByNumber(30))
+
+    block_format: QTextBlockFormat = QTextBlockFormat()
+    block_format.setTopMargin(120)
+    block_format.setLeftMargin(40)
+    cursor.mergeBlockFormat(block_format)
+
+    assertSameAsRelayout(document, layout, page_layout)
+
+
+def test_removing_everything_leaves_one_page(app: QApplication) -> None:
+    document, layout, page_layout = makeLayout(60)
+
+    cursor: QTextCursor = QTextCursor(document)
+    cursor.select(QTextCursor.SelectionType.Document)
+    cursor.removeSelectedText()
+
+    assert page_layout.pageCount() == 1
+    assert layout.characterCount() == 0
+    assertSameAsRelayout(document, layout, page_layout)
+
+
+def paintImage(document: QTextDocument, layout: TextDocumentLayout, rect: QRectF) -> QImage:
+    image: QImage = QImage(400, 1600, QImage.Format.Format_ARGB32)
+    image.fill(Qt.GlobalColor.white)
+
+    painter: QPainter = QPainter(image)
+    painter.setClipRect(rect)
+    layout.paint(DocumentPaintContext(painter, rect, QTextCursor(document)))
+    painter.end()
+
+    return image
+
+
+def test_painting_exposed_rect_matches_full_paint(app: QApplication) -> None:
+    document, layout, page_layout = makeLayout(60)
+
+    rect: QRectF = QRectF(0, 500, 400, 300)
+    full_image: QImage = paintImage(document, layout, QRectF(0, 0, 400, 1600))
+    rect_image: QImage = paintImage(document, layout, rect)
+
+    assert rect_image.copy(rect.toRect()) == full_image.copy(rect.toRect())
+    assert rect_image.copy(0, 0, 400, 400) != full_image.copy(0, 0, 400, 400)
+
+
+def test_position_test_finds_line_of_position(app: QApplication) -> None:
+    document, layout, page_layout = makeLayout(60)
+
+    for position in range(document.characterCount() - 1):
+        block: QTextBlock = document.findBlock(position)
+        line: QTextLine = block.layout().lineForTextPosition(position - block.position())
+        x, _ = line.cursorToX(position - block.position(), QTextLine.Edge.Leading)  # type: ignore
+
+        assert layout.positionTest(position) == QPointF(x, line.y())
+
+
+def test_point_test_finds_position_under_point(app: QApplication) -> None:
+    document, layout, page_layout = makeLayout(60)
+
+    block: QTextBlock = document.begin()
+    while block.isValid():
+        block_layout: QTextLayout = block.layout()
+        for i in range(block_layout.lineCount()):
+            line: QTextLine = block_layout.lineAt(i)
+            point: QPointF = line.rect().center()
+            position: int = line.xToCursor(point.x(), QTextLine.CursorPosition.CursorBetweenCharacters)  # type: ignore
+
+            result: HitResult = layout.pointTest(point)
+
+            assert result.hit == Hit.Text
+            assert result.position == block.position() + position
+        block = block.next()
+
+    # between pages
+    assert layout.pointTest(QPointF(200, 305)).hit == Hit.NoHit
+
+
+def test_page_color_change_repaints_page_picture(app: QApplication) -> None:
+    document, layout, page_layout = makeLayout(60)
+    page_layout.setPageColor(QColor("red"))
+
+    rect: QRectF = QRectF(0, 0, 400, 1600)
+    assert paintImage(document, layout, rect).pixelColor(5, 5) == QColor("red")
+
+    page_layout.setPageColor(QColor("green"))
+    image: QImage = paintImage(document, layout, rect)
+
+    assert image.pixelColor(5, 5) == QColor("green")
+    # last page
+    assert image.pixelColor(5, int(page_layout.pageYPosition(page_layout.pageCount() - 1)) + 5) == QColor("green")
@@ -0,0 +1,99 @@
+import time
+from array import array
+from typing import Callable
+
+from PySide6.QtCore import QRegularExpression
+from PySide6.QtGui import QTextDocument
+from PySide6.QtWidgets import QApplication
+
+from core.editor.text_editor.match_table import MatchTable
+from core.editor.text_editor.text_searcher import TextSearcher
+
+
+def searchMatches(
+    text: str, expr: QRegularExpression, process_events: Callable[[float], None]
+) -> tuple[list[int], list[int]]:
+    searcher: TextSearcher = TextSearcher()
+
+    starts: array = array("q")
+    ends: array = array("q")
+    finished: list[int] = []
+
+    def onMatchesFound(search: int, found_starts: array, found_ends: array) -> None:
+        starts.extend(found_starts)
+        ends.extend(found_ends)
+
+    searcher.matchesFound.connect(onMatchesFound)
+    searcher.searchFinished.connect(finished.append)
+
+    searcher.search(text, expr)
+
+    deadline: float = time.perf_counter() + 5
+    while len(finished) == 0 and time.perf_counter() < deadline:
+        process_events(0.01)
+
+    searcher.stop()
+
+    return list(starts), list(ends)
+
+
+def test_searcher_positions_are_utf16_like_the_match_table(
+    app: QApplication, process_events: Callable[[float], None]
+) -> None:
+    expr: QRegularExpression = QRegularExpression("b")
+
+    for text in ["\U0001f600ab\nxb\nbb", "\U0001f600\U0001f600\n\nb \U0001f600b\nab", "ab\nb"]:
+        document: QTextDocument = QTextDocument()
+        document.setPlainText(text)
+
+        table: MatchTable = MatchTable()
+        table.build(document, expr)
+
+        assert searchMatches(document.toRawText(), expr, process_events) == (list(table.starts), list(table.ends))
+
+    # blocks are separated by paragraph separators in the raw text
+    assert searchMatches("\U0001f600ab\u2029xb\u2029bb", expr, process_events)[0] == [3, 6, 8, 9]
+
+
+def test_newer_search_cancels_older_one(app: QApplication, process_events: Callable[[float], None]) -> None:
+    searcher: TextSearcher = TextSearcher()
+
+    found: list[int] = []
+    finished: list[int] = []
+    searcher.matchesFound.connect(lambda search, starts, ends: found.append(search))
+    searcher.searchFinished.connect(finished.append)
+
+    text: str = "\u2029".join(["lorem ipsum dolor"] * 200000)
+    first: int = searcher.search(text, QRegularExpression("lorem"))
+    second: int = searcher.search("lorem", QRegularExpression("lorem"))
+
+    assert searcher.isCancelled(first)
+    assert not searcher.isCancelled(second)
+
+    deadline: float = time.perf_counter() + 5
+    while second not in finished and time.perf_counter() < deadline:
+        process_events(0.01)
+
+    searcher.stop()
+
+    # the first search stops between blocks and doesn't finish
+    assert first not in finished
+    assert finished == [second]
+
+
+def test_search_of_one_long_block_is_cancelled_between_matches(app: QApplication) -> None:
+    starts: array = array("q")
+    ends: array = array("q")
+    checks: list[int] = []
+
+    def isCancelled() -> bool:
+        checks.append(len(starts))
+        return len(checks) == 2
+
+    text: str = "lorem ipsum " * 100000
+    is_finished: bool = MatchTable.searchText(text, 0, QRegularExpression("lorem"), starts, ends, isCancelled)
+
+    assert not is_finished
+    assert len(checks) == 2
+    assert 0 < len(starts) < 100000
+    assert MatchTable.searchText("lorem ipsum " * 10, 0, QRegularExpression("lorem"), starts, ends, isCancelled)
@@ -0,0 +1,80 @@
+from PySide6.QtCore import QRect, QRectF
+from PySide6.QtGui import QPixmap
+from PySide6.QtWidgets import QApplication
+
+from core.editor.document_editor.tile_cache import TileCache
+
+
+def makePixmap() -> QPixmap:
+    pixmap: QPixmap = QPixmap(100, 50)
+    pixmap.fill()
+    return pixmap
+
+
+def test_least_recently_used_tiles_are_evicted(app: QApplication) -> None:
+    cache: TileCache = TileCache()
+    tile_size: int = cache.pixmapSize(makePixmap())
+    cache.setMemoryBudget(tile_size * 2)
+
+    cache.setTile((0, 0, 1.0), QRect(0, 0, 100, 50), makePixmap())
+    cache.setTile((0, 1, 1.0), QRect(0, 50, 100, 50), makePixmap())
+
+    # first tile is used again, so the second one is the least recently used
+    assert cache.tile((0, 0, 1.0)) is not None
+
+    cache.setTile((0, 2, 1.0), QRect(0, 100, 100, 50), makePixmap())
+
+    assert cache.tileCount() == 2
+    assert cache.memoryUsage() == tile_size * 2
+    assert cache.tile((0, 1, 1.0)) is None
+    assert cache.tile((0, 0, 1.0)) is not None
+
+
+def test_invalidate_drops_tiles_of_every_scale_under_rect(app: QApplication) -> None:
+    cache: TileCache = TileCache()
+
+    cache.setTile((0, 0, 1.0), QRect(0, 0, 100, 50), makePixmap())
+    cache.setTile((0, 0, 2.0), QRect(0, 0, 100, 50), makePixmap())
+    cache.setTile((0, 1, 1.0), QRect(0, 50, 100, 50), makePixmap())
+
+    cache.invalidate(QRectF(10, 10, 20, 20), range(0, 1))
+
+    assert cache.tile((0, 0, 1.0)) is None
+    assert cache.tile((0, 0, 2.0)) is None
+    assert cache.tile((0, 1, 1.0)) is not None
+    assert cache.memoryUsage() == cache.pixmapSize(makePixmap())
+
+
+def test_invalidate_only_looks_at_given_pages(app: QApplication) -> None:
+    cache: TileCache = TileCache()
+
+    cache.setTile((0, 0, 1.0), QRect(0, 0, 100, 50), makePixmap())
+    cache.setTile((1, 0, 1.0), QRect(0, 0, 100, 50), makePixmap())
+
+    cache.invalidate(QRectF(10, 10, 20, 20), range(1, 2))
+
+    assert cache.tile((0, 0, 1.0)) is not None
+    assert cache.tile((1, 0, 1.0)) is None
+
+    cache.removeTile((0, 0, 1.0))
+    cache.invalidate(QRectF(10, 10, 20, 20), range(0, 2))
+
+    assert cache.tileCount() == 0
+
+
+def test_budget_grows_with_visible_memory(app: QApplication) -> None:
+    cache: TileCache = TileCache()
+    tile_size: int = cache.pixmapSize(makePixmap())
+    cache.setMemoryBudget(tile_size)
+
+    cache.setVisibleMemory(tile_size * 2)
+    assert cache.memoryBudget() == tile_size * 4
+
+    for row in range(4):
+        cache.setTile((0, row, 1.0), QRect(0, row * 50, 100, 50), makePixmap())
+
+    assert cache.tileCount() == 4
+
+    cache.setVisibleMemory(0)
+    assert cache.memoryBudget() == tile_size
+    assert cache.tileCount() == 1